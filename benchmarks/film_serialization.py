@@ -0,0 +1,78 @@
+"""
+CPU time of turning a film `_source` into response bytes.
+
+Compares the former path (pydantic models validated again by FastAPI against `response_model`)
+with the current one (plain dicts dumped by orjson).
+
+    python -m benchmarks.film_serialization
+"""
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from models.film import FilmDetail, film_detail  # noqa: E402
+from models.genre import GenreUUID  # noqa: E402
+from models.person import PersonUUID  # noqa: E402
+
+PERSONS_PER_ROLE = 20
+REPEATS = 5000
+
+
+def make_source() -> dict:
+    def persons():
+        return [{'id': str(uuid.uuid4()), 'name': 'Adam Asber'} for _ in range(PERSONS_PER_ROLE)]
+
+    return {
+        'id': str(uuid.uuid4()),
+        'title': 'The Star',
+        'description': 'New World',
+        'imdb_rating': 8.5,
+        'genres': [{'id': str(uuid.uuid4()), 'name': 'Action'}, {'id': str(uuid.uuid4()), 'name': 'Sci-Fi'}],
+        'actors': persons(),
+        'writers': persons(),
+        'directors': persons(),
+    }
+
+
+async def model_path(source: dict, field) -> bytes:
+    film = FilmDetail(
+        uuid=source['id'],
+        title=source['title'],
+        imdb_rating=source['imdb_rating'],
+        description=source['description'],
+        genres=[GenreUUID(uuid=genre['id'], name=genre['name']) for genre in source['genres']],
+        actors=[PersonUUID(uuid=person['id'], full_name=person['name']) for person in source['actors']],
+        writers=[PersonUUID(uuid=person['id'], full_name=person['name']) for person in source['writers']],
+        directors=[PersonUUID(uuid=person['id'], full_name=person['name']) for person in source['directors']],
+    )
+    content = await serialize_response(field=field, response_content=film)
+    return ORJSONResponse(content).body
+
+
+async def dict_path(source: dict) -> bytes:
+    return ORJSONResponse(film_detail(source)).body
+
+
+async def main() -> None:
+    source = make_source()
+    field = create_response_field(name='Response_film_details', type_=FilmDetail)
+    assert await model_path(source, field) == await dict_path(source)
+
+    for name, run in (('models', lambda: model_path(source, field)), ('dicts', lambda: dict_path(source))):
+        started = time.process_time()
+        for _ in range(REPEATS):
+            await run()
+        per_request = (time.process_time() - started) / REPEATS * 1_000_000
+        print(f'{name:<7} {per_request:.1f}us per response')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+"""
+Top rated films on the index sorted by `imdb_rating` against an unsorted one.
+
+Seeds ES from tests/functional settings with two copies of synthetic films, one with the index sort of `movies`
+and one without it, then runs the queries of the top rated film list and of popular films of a genre on both.
+
+    python -m benchmarks.film_top_n [number of films]
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.helpers import async_streaming_bulk
+
+from tests.functional.settings import test_settings
+from tests.functional.testdata.indices import movie_index, settings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from models.film import FILM_LIST_FIELDS, TOP_RATED_SORT  # noqa: E402
+
+FILMS = 3_000_000
+GENRES = [str(uuid.uuid4()) for _ in range(20)]
+PAGE_SIZE = 50
+REPEATS = 200
+
+INDICES = {
+    'movies_sorted': movie_index,
+    'movies_unsorted': {**movie_index, 'settings': settings},
+}
+
+
+def films(count: int):
+    for _ in range(count):
+        film_id = str(uuid.uuid4())
+        genre_ids = random.sample(GENRES, 2)
+        yield {
+            'id': film_id,
+            'title': 'The Star',
+            'imdb_rating': round(random.uniform(1, 10), 1),
+            'genres': [{'id': genre_id, 'name': 'Action'} for genre_id in genre_ids],
+            'genre_ids': genre_ids,
+        }
+
+
+async def seed(es_client: AsyncElasticsearch, count: int) -> None:
+    for index_name, index_settings in INDICES.items():
+        if await es_client.indices.exists(index=index_name):
+            await es_client.indices.delete(index=index_name)
+        await es_client.indices.create(index=index_name, **index_settings)
+
+    def actions():
+        for film in films(count):
+            for index_name in INDICES:
+                yield {'_index': index_name, '_id': film['id'], '_source': film}
+
+    async for _ in async_streaming_bulk(client=es_client, actions=actions(), chunk_size=5000):
+        pass
+    await es_client.indices.refresh(index=list(INDICES))
+    await es_client.indices.forcemerge(index=list(INDICES), max_num_segments=1)
+
+
+async def measure(es_client: AsyncElasticsearch, index_name: str, make_query) -> list[float]:
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        await es_client.search(index=index_name, body=make_query(), filter_path=['hits.hits._source'],
+                               request_cache=False)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def top_rated(track_total_hits: bool):
+    return lambda: {'size': PAGE_SIZE, 'sort': TOP_RATED_SORT, '_source': FILM_LIST_FIELDS,
+                    'track_total_hits': track_total_hits, 'query': {'match_all': {}}}
+
+
+def popular(track_total_hits: bool):
+    return lambda: {'size': PAGE_SIZE, 'sort': TOP_RATED_SORT, '_source': FILM_LIST_FIELDS,
+                    'track_total_hits': track_total_hits,
+                    'query': {'bool': {'filter': [{'term': {'genre_ids': random.choice(GENRES)}}]}}}
+
+
+async def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else FILMS
+    es_client = AsyncElasticsearch(hosts=test_settings.es_url(), request_timeout=600)
+    await seed(es_client, count)
+
+    for query_name, make_query in (('top rated', top_rated), ('popular in genre', popular)):
+        for index_name, track_total_hits in (('movies_unsorted', True), ('movies_sorted', False)):
+            timings = await measure(es_client, index_name, make_query(track_total_hits))
+            print(f'{query_name:<17} {index_name:<16} p50={statistics.median(timings):.1f}ms '
+                  f'p99={statistics.quantiles(timings, n=100)[-1]:.1f}ms')
+
+    await es_client.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""
+Films of a person: nested queries over the cast against term filters on the flat `*_ids` fields.
+
+Seeds ES from tests/functional settings with films with large casts, then runs both queries for random
+persons directly against ES, including the work of finding out the roles of the person in every film.
+
+    python -m benchmarks.person_films
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.helpers import async_bulk
+
+from tests.functional.settings import test_settings
+from tests.functional.testdata.indices import movie_index
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from services.persons import PersonService  # noqa: E402
+
+FILMS = 5000
+PERSONS = 2000
+CAST_SIZE = 300
+REPEATS = 200
+ROLES = (('actor', 'actors'), ('director', 'directors'), ('writer', 'writers'))
+
+
+def nested_query(person_id: str) -> dict:
+    """Query the service used before the flat fields."""
+    return {
+        'size': 999,
+        '_source': ['id', 'actors.id', 'writers.id', 'directors.id'],
+        'query': {'bool': {'should': [
+            {'nested': {'path': path, 'query': {'term': {f'{path}.id': person_id}}}} for _, path in ROLES
+        ]}},
+    }
+
+
+def nested_roles(person_id: str, hits: list) -> list:
+    return [[role for role, path in ROLES if any(person['id'] == person_id for person in hit['_source'].get(path, []))]
+            for hit in hits]
+
+
+def flat_roles(person_id: str, hits: list) -> list:
+    return [hit.get('matched_queries', []) for hit in hits]
+
+
+async def seed(es_client: AsyncElasticsearch) -> list[str]:
+    if await es_client.indices.exists(index='movies'):
+        await es_client.indices.delete(index='movies')
+    await es_client.indices.create(index='movies', **movie_index)
+
+    persons = [{'id': str(uuid.uuid4()), 'name': 'Adam Asber'} for _ in range(PERSONS)]
+
+    def movies():
+        for _ in range(FILMS):
+            cast = {path: random.sample(persons, CAST_SIZE // 3) for _, path in ROLES}
+            film = {'id': str(uuid.uuid4()), 'title': 'The Star', 'imdb_rating': 8.5, 'genres': [], **cast}
+            film.update({f'{role}_ids': [person['id'] for person in cast[path]] for role, path in ROLES})
+            yield {'_index': 'movies', '_id': film['id'], '_source': film}
+
+    await async_bulk(client=es_client, actions=movies(), refresh='wait_for')
+    return [person['id'] for person in persons]
+
+
+async def measure(es_client: AsyncElasticsearch, person_ids: list[str], make_query, roles, filter_path) -> list[float]:
+    timings = []
+    for person_id in random.sample(person_ids, REPEATS):
+        started = time.perf_counter()
+        response = await es_client.search(index='movies', body=make_query(person_id), filter_path=filter_path)
+        roles(person_id, response.get('hits', {}).get('hits', []))
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def main() -> None:
+    es_client = AsyncElasticsearch(hosts=test_settings.es_url())
+    person_ids = await seed(es_client)
+
+    def flat_query(person_id):
+        return PersonService._films_with_person_query(person_id, 999, 1, PersonService.film_roles_fields)
+
+    for name, make_query, roles, filter_path in (
+            ('nested', nested_query, nested_roles, ['hits.hits._source']),
+            ('flat', flat_query, flat_roles, PersonService.films_filter_path),
+    ):
+        timings = await measure(es_client, person_ids, make_query, roles, filter_path)
+        print(f'{name:<7} p50={statistics.median(timings):.1f}ms p99={statistics.quantiles(timings, n=100)[-1]:.1f}ms')
+
+    await es_client.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""
+Latency of /api/v1/persons/search depending on page size.
+
+Seeds ES from tests/functional settings with persons sharing one name and films with them,
+then requests the search endpoint bypassing the response cache.
+
+    python -m benchmarks.person_search
+"""
+import asyncio
+import statistics
+import time
+import uuid
+
+import aiohttp
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.helpers import async_bulk
+
+from tests.functional.settings import test_settings
+from tests.functional.testdata.indices import movie_index, person_index
+
+PERSONS = 200
+FILMS_PER_PERSON = 5
+PAGE_SIZES = (10, 25, 50, 100)
+REPEATS = 30
+
+
+async def seed(es_client: AsyncElasticsearch) -> None:
+    for index_name, index_settings in (('persons', person_index), ('movies', movie_index)):
+        if await es_client.indices.exists(index=index_name):
+            await es_client.indices.delete(index=index_name)
+        await es_client.indices.create(index=index_name, **index_settings)
+
+    persons = [{'id': str(uuid.uuid4()), 'name': 'Adam Asber'} for _ in range(PERSONS)]
+    movies = [{
+        'id': str(uuid.uuid4()),
+        'title': 'The Star',
+        'description': 'New World',
+        'imdb_rating': 8.5,
+        'genres': [],
+        'actors': [person],
+        'writers': [person],
+        'directors': [],
+        'actor_ids': [person['id']],
+        'writer_ids': [person['id']],
+        'director_ids': [],
+    } for person in persons for _ in range(FILMS_PER_PERSON)]
+
+    actions = [{'_index': 'persons', '_id': row['id'], '_source': row} for row in persons]
+    actions += [{'_index': 'movies', '_id': row['id'], '_source': row} for row in movies]
+    await async_bulk(client=es_client, actions=actions, refresh='wait_for')
+
+
+async def measure(session: aiohttp.ClientSession, page_size: int) -> list[float]:
+    url = f'{test_settings.api_url()}/api/v1/persons/search'
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        async with session.get(url, params={'query': 'Adam', 'page_size': page_size},
+                               headers={'Cache-Control': 'no-cache'}) as response:
+            await response.read()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def main() -> None:
+    es_client = AsyncElasticsearch(hosts=test_settings.es_url())
+    await seed(es_client)
+    await es_client.close()
+
+    async with aiohttp.ClientSession() as session:
+        for page_size in PAGE_SIZES:
+            timings = await measure(session, page_size)
+            print(f'page_size={page_size:<4} p50={statistics.median(timings):.1f}ms '
+                  f'p99={statistics.quantiles(timings, n=100)[-1]:.1f}ms')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
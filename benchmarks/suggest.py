@@ -0,0 +1,72 @@
+"""
+Latency of /api/v1/suggest.
+
+Seeds ES from tests/functional settings with films and persons, then requests suggestions for random prefixes
+bypassing the response cache.
+
+    python -m benchmarks.suggest
+"""
+import asyncio
+import random
+import statistics
+import string
+import time
+import uuid
+
+import aiohttp
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.helpers import async_bulk
+
+from tests.functional.settings import test_settings
+from tests.functional.testdata.indices import movie_index, person_index
+
+FILMS = 100_000
+PERSONS = 50_000
+REPEATS = 500
+
+
+def random_name() -> str:
+    return ' '.join(''.join(random.choices(string.ascii_lowercase, k=random.randint(3, 9))).capitalize()
+                    for _ in range(random.randint(1, 3)))
+
+
+async def seed(es_client: AsyncElasticsearch) -> None:
+    for index_name, index_settings in (('persons', person_index), ('movies', movie_index)):
+        if await es_client.indices.exists(index=index_name):
+            await es_client.indices.delete(index=index_name)
+        await es_client.indices.create(index=index_name, **index_settings)
+
+    def actions():
+        for _ in range(PERSONS):
+            person_id = str(uuid.uuid4())
+            yield {'_index': 'persons', '_id': person_id, '_source': {'id': person_id, 'name': random_name()}}
+        for _ in range(FILMS):
+            film_id = str(uuid.uuid4())
+            yield {'_index': 'movies', '_id': film_id,
+                   '_source': {'id': film_id, 'title': random_name(), 'imdb_rating': 5.0}}
+
+    await async_bulk(client=es_client, actions=actions(), refresh='wait_for')
+
+
+async def main() -> None:
+    es_client = AsyncElasticsearch(hosts=test_settings.es_url())
+    await seed(es_client)
+    await es_client.close()
+
+    url = f'{test_settings.api_url()}/api/v1/suggest/'
+    async with aiohttp.ClientSession() as session:
+        for prefix_length in (1, 2, 3, 5):
+            timings = []
+            for _ in range(REPEATS):
+                prefix = ''.join(random.choices(string.ascii_lowercase, k=prefix_length))
+                started = time.perf_counter()
+                async with session.get(url, params={'query': prefix},
+                                       headers={'Cache-Control': 'no-cache'}) as response:
+                    await response.read()
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f'prefix_length={prefix_length} p50={statistics.median(timings):.1f}ms '
+                  f'p99={statistics.quantiles(timings, n=100)[-1]:.1f}ms')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
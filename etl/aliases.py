@@ -0,0 +1,141 @@
+import logging
+import re
+import time
+from typing import Optional
+
+from elasticsearch import Elasticsearch
+
+from backoff import backoff
+
+# Key of the mapping meta keeping the time the alias last pointed to the index, only such versions are rolled back to.
+ALIASED_META = "aliased_at"
+
+
+def versioned_name(alias: str, version: int) -> str:
+    """
+    Function gets name of a version of index, the API reads the index by its alias.
+    :param alias: Name of the alias, e.g. `movies`.
+    :param version: Version of the index.
+    :return: Name of the index, e.g. `movies_v2`.
+    """
+    return f"{alias}_v{version}"
+
+
+@backoff(limit_of_retries=10)
+def index_versions(client: Elasticsearch, alias: str) -> dict[int, str]:
+    """
+    Function gets existing versions of index.
+    :param client: Client of elasticsearch.
+    :param alias: Name of the alias.
+    :return: Names of the indices by version.
+    """
+    pattern = re.compile(rf"{re.escape(alias)}_v(\d+)")
+    response = client.indices.get(index=f"{alias}_v*", expand_wildcards="open,closed", allow_no_indices=True)
+    return {int(match.group(1)): name for name in response if (match := pattern.fullmatch(name))}
+
+
+@backoff(limit_of_retries=10)
+def aliased_versions(client: Elasticsearch, alias: str) -> list[str]:
+    """
+    Function gets versions of index the alias pointed to, those are complete unlike versions of failed rebuilds.
+    :param client: Client of elasticsearch.
+    :param alias: Name of the alias.
+    :return: Names of the indices, the one the alias pointed to most recently is the last.
+    """
+    pattern = re.compile(rf"{re.escape(alias)}_v(\d+)")
+    response = client.indices.get(index=f"{alias}_v*", expand_wildcards="open,closed", allow_no_indices=True)
+    aliased = {}
+    for name, info in response.items():
+        meta = info.get("mappings", {}).get("_meta", {})
+        if (match := pattern.fullmatch(name)) and ALIASED_META in meta:
+            aliased[name] = meta[ALIASED_META], int(match.group(1))
+    return sorted(aliased, key=aliased.get)
+
+
+@backoff(limit_of_retries=10)
+def aliased_index(client: Elasticsearch, alias: str) -> Optional[str]:
+    """
+    Function gets the index the alias points to.
+    :param client: Client of elasticsearch.
+    :param alias: Name of the alias.
+    :return: Name of the index, the alias itself for an index made before versions, None if there is neither.
+    """
+    if client.indices.exists_alias(name=alias):
+        return next(iter(client.indices.get_alias(name=alias)))
+    if client.indices.exists(index=alias):
+        return alias
+    return None
+
+
+@backoff(limit_of_retries=10)
+def create_versioned_index(client: Elasticsearch, alias: str, index: dict, version: int,
+                           aliased: bool = False) -> str:
+    """
+    Function creates a version of index.
+    :param client: Client of elasticsearch.
+    :param alias: Name of the alias.
+    :param index: Settings and mappings of the index.
+    :param version: Version of the index.
+    :param aliased: Whether the alias points to the new index at once.
+    :return: Name of the index.
+    """
+    index_name = versioned_name(alias, version)
+    client.indices.create(index=index_name, **index, **({"aliases": {alias: {}}} if aliased else {}))
+    logging.info(f"Index {index_name} was created.")
+    if aliased:
+        mark_aliased(client, index_name)
+    return index_name
+
+
+@backoff(limit_of_retries=10)
+def mark_aliased(client: Elasticsearch, index_name: str) -> None:
+    """
+    Function records in the mapping meta of the index that the alias points to it now.
+    :param client: Client of elasticsearch.
+    :param index_name: Name of the index.
+    :return: None
+    """
+    response = client.indices.get_mapping(index=index_name)
+    meta = next(iter(response.values()))["mappings"].get("_meta", {})
+    client.indices.put_mapping(index=index_name, meta={**meta, ALIASED_META: time.time()})
+
+
+@backoff(limit_of_retries=10)
+def delete_index(client: Elasticsearch, index_name: str) -> None:
+    """
+    Function deletes a version of index.
+    :param client: Client of elasticsearch.
+    :param index_name: Name of the index.
+    :return: None
+    """
+    client.indices.delete(index=index_name, ignore_unavailable=True)
+    logging.info(f"Index {index_name} was deleted.")
+
+
+def move_alias(client: Elasticsearch, alias: str, index_name: str) -> None:
+    """
+    Function atomically points the alias to the index, searches never see the alias without an index.
+    An index made before versions under the name of the alias is kept as version 0.
+    Both indices are marked as aliased, so that rollback can return to either of them.
+    :param client: Client of elasticsearch.
+    :param alias: Name of the alias.
+    :param index_name: Name of the index.
+    :return: None
+    """
+    actions = [{"add": {"index": index_name, "alias": alias}}]
+    current = aliased_index(client, alias)
+    if current == alias:
+        legacy_index = versioned_name(alias, 0)
+        # Clone needs a read only source, writes to the index fail until the alias replaces it.
+        client.indices.add_block(index=alias, block="write")
+        client.indices.clone(index=alias, target=legacy_index, settings={"index.blocks.write": False})
+        client.cluster.health(index=legacy_index, wait_for_status="yellow")
+        mark_aliased(client, legacy_index)
+        actions.insert(0, {"remove_index": {"index": alias}})
+    elif current is not None:
+        # Time of the version the alias moves from is updated too, it is the one to roll back to.
+        mark_aliased(client, current)
+        actions.insert(0, {"remove": {"index": current, "alias": alias}})
+    client.indices.update_aliases(actions=actions)
+    mark_aliased(client, index_name)
+    logging.info(f"Alias {alias} was moved from {current} to {index_name}.")
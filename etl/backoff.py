@@ -9,7 +9,7 @@ import random
 import logging
 
 
-def backoff(start_sleep_time=0.1, factor=2, border_sleep_time=10.0, limit_of_retries=10):
+def backoff(start_sleep_time=0.1, factor=2, border_sleep_time=10.0, limit_of_retries=10, exceptions=(Exception,)):
     """
     Функция для повторного выполнения функции через некоторое время, если возникла ошибка. Использует наивный экспоненциальный рост времени повтора (factor) до граничного времени ожидания (border_sleep_time)
 
@@ -20,6 +20,7 @@ def backoff(start_sleep_time=0.1, factor=2, border_sleep_time=10.0, limit_of_ret
     :param start_sleep_time: начальное время ожидания
     :param factor: во сколько раз нужно увеличивать время ожидания на каждой итерации
     :param border_sleep_time: максимальное время ожидания
+    :param exceptions: ошибки, после которых функция выполняется повторно, остальные пробрасываются сразу
     :return: результат выполнения функции
     """
 
@@ -32,7 +33,7 @@ def backoff(start_sleep_time=0.1, factor=2, border_sleep_time=10.0, limit_of_ret
                 try:
                     result_func = func(*args, **kwargs)
                     return result_func
-                except Exception as e:
+                except exceptions as e:
                     time.sleep(delay)
                     retries += 1
                     # Compute delay and chose between border_sleep_time and computed
@@ -0,0 +1,98 @@
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+import psycopg
+
+# Channel the triggers of change_feed.sql notify on, the payload is the name of the changed table.
+CHANNEL = "etl_changes"
+
+SQL_PATH = Path(__file__).with_name("change_feed.sql")
+
+TABLES = ("film_work", "genre", "person")
+
+# Pause between attempts to reconnect to database.
+RECONNECT_SECONDS = 5.0
+
+
+class ChangeFeed:
+    """
+    Notifications of Postgres about changed tables, so that the ETL runs as soon as a table changes.
+    The ETL still reads changed rows by its state, a lost notification only delays them until the next poll.
+    """
+
+    def __init__(self, database_params: dict, debounce_seconds: float = 1.0):
+        self.database_params = database_params
+        self.debounce_seconds = debounce_seconds
+        self._connection = None
+
+    @property
+    def connection(self) -> psycopg.Connection:
+        """
+        Connection to postgres DB listening to the channel, opened again after it was lost.
+        :return: Connection.
+        """
+        if self._connection is None or self._connection.closed:
+            self._connection = psycopg.connect(**self.database_params, autocommit=True)
+            self._connection.execute(f"LISTEN {CHANNEL}")
+        return self._connection
+
+    def close(self) -> None:
+        """
+        Method closes connection to postgres DB.
+        :return: None
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def install(self) -> None:
+        """
+        Method creates triggers notifying about changes of the tables.
+        :return: None
+        """
+        self.connection.execute(SQL_PATH.read_text())
+        logging.info("Change feed triggers were installed.")
+
+    def wait(self, timeout: float) -> set[str]:
+        """
+        Method waits for changes of the tables. After the first notification it waits `debounce_seconds` more,
+        so that a burst of changes runs the ETL once.
+        :param timeout: Max time to wait for the first notification in seconds.
+        :return: Names of the changed tables, empty if nothing changed.
+        """
+        tables = {notify.payload for notify in self.connection.notifies(timeout=timeout, stop_after=1)}
+        if tables:
+            deadline = time.monotonic() + self.debounce_seconds
+            while (left := deadline - time.monotonic()) > 0:
+                tables.update(notify.payload for notify in self.connection.notifies(timeout=left))
+        return tables
+
+    def listen(self, stopped: threading.Event, wake: Callable[[Iterable[str]], None]) -> None:
+        """
+        Method passes changed tables to `wake` until stopped.
+        After a reconnection all tables are passed, their notifications could be lost meanwhile.
+        :param stopped: Event stopping the feed.
+        :param wake: Function getting names of the changed tables.
+        :return: None
+        """
+        lost = False
+        while not stopped.is_set():
+            try:
+                tables = self.wait(timeout=1.0)
+            except psycopg.Error as e:
+                if not lost:
+                    logging.error(msg=f"Change feed lost connection to database. {e}")
+                lost = True
+                self.close()
+                stopped.wait(RECONNECT_SECONDS)
+                continue
+            if lost:
+                logging.info("Change feed reconnected to database.")
+                tables.update(TABLES)
+                lost = False
+            if tables:
+                wake(tables)
+        self.close()
@@ -0,0 +1,68 @@
+--
+-- Change feed of the ETL: tables notify the ETL about their changes on the channel etl_changes.
+-- Tables are resolved by search_path of the session installing the feed.
+-- The script can be run again, it replaces the functions and triggers.
+--
+
+--
+-- Name: etl_notify_change; Type: FUNCTION
+--
+
+CREATE OR REPLACE FUNCTION etl_notify_change() RETURNS trigger
+    LANGUAGE plpgsql
+    SET search_path FROM CURRENT
+    AS $$
+BEGIN
+    -- Notifications with the same payload are sent once per transaction.
+    PERFORM pg_notify('etl_changes', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$;
+
+
+--
+-- Name: etl_touch_film_work; Type: FUNCTION
+--
+-- Links of films with genres and persons are embedded into films, a changed link changes its film.
+-- clock_timestamp() is the time of the change, now() is the start of a transaction that can be long.
+--
+
+CREATE OR REPLACE FUNCTION etl_touch_film_work() RETURNS trigger
+    LANGUAGE plpgsql
+    SET search_path FROM CURRENT
+    AS $$
+BEGIN
+    IF TG_OP <> 'DELETE' THEN
+        UPDATE film_work SET modified = clock_timestamp() WHERE id = NEW.film_work_id;
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        UPDATE film_work SET modified = clock_timestamp() WHERE id = OLD.film_work_id;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+
+--
+-- Name: triggers; Type: TRIGGER
+--
+
+DROP TRIGGER IF EXISTS etl_notify_change ON film_work;
+CREATE TRIGGER etl_notify_change AFTER INSERT OR UPDATE ON film_work
+    FOR EACH STATEMENT EXECUTE FUNCTION etl_notify_change();
+
+DROP TRIGGER IF EXISTS etl_notify_change ON genre;
+CREATE TRIGGER etl_notify_change AFTER INSERT OR UPDATE ON genre
+    FOR EACH STATEMENT EXECUTE FUNCTION etl_notify_change();
+
+DROP TRIGGER IF EXISTS etl_notify_change ON person;
+CREATE TRIGGER etl_notify_change AFTER INSERT OR UPDATE ON person
+    FOR EACH STATEMENT EXECUTE FUNCTION etl_notify_change();
+
+DROP TRIGGER IF EXISTS etl_touch_film_work ON genre_film_work;
+CREATE TRIGGER etl_touch_film_work AFTER INSERT OR UPDATE OR DELETE ON genre_film_work
+    FOR EACH ROW EXECUTE FUNCTION etl_touch_film_work();
+
+DROP TRIGGER IF EXISTS etl_touch_film_work ON person_film_work;
+CREATE TRIGGER etl_touch_film_work AFTER INSERT OR UPDATE OR DELETE ON person_film_work
+    FOR EACH ROW EXECUTE FUNCTION etl_touch_film_work();
@@ -14032,6 +14032,13 @@ ALTER TABLE ONLY public.django_session
 CREATE INDEX film_work_title_idx ON content.film_work USING btree (title);
 
 
+--
+-- Name: film_work_modified_id_idx; Type: INDEX; Schema: content; Owner: db_user
+--
+
+CREATE INDEX film_work_modified_id_idx ON content.film_work USING btree (modified, id);
+
+
 --
 -- Name: genre_film_work_film_work_id_65abe300; Type: INDEX; Schema: content; Owner: db_user
 --
@@ -14053,6 +14060,13 @@ CREATE INDEX genre_film_work_genre_id_88fbcf0d ON content.genre_film_work USING
 CREATE INDEX genre_name_idx ON content.genre USING btree (name);
 
 
+--
+-- Name: genre_modified_id_idx; Type: INDEX; Schema: content; Owner: db_user
+--
+
+CREATE INDEX genre_modified_id_idx ON content.genre USING btree (modified, id);
+
+
 --
 -- Name: person_film_work_film_work_id_1724c536; Type: INDEX; Schema: content; Owner: db_user
 --
@@ -14074,6 +14088,13 @@ CREATE INDEX person_film_work_person_id_196d24de ON content.person_film_work USI
 CREATE INDEX person_full_name_idx ON content.person USING btree (full_name);
 
 
+--
+-- Name: person_modified_id_idx; Type: INDEX; Schema: content; Owner: db_user
+--
+
+CREATE INDEX person_modified_id_idx ON content.person USING btree (modified, id);
+
+
 --
 -- Name: auth_group_name_a6ea08ec_like; Type: INDEX; Schema: public; Owner: db_user
 --
@@ -1,86 +1,370 @@
+import argparse
 import logging
+import sys
+import threading
 import time
+from typing import Callable, Iterable, Iterator, Optional
 
+import psycopg
 from elasticsearch import Elasticsearch
+from redis import Redis
 
+from aliases import create_versioned_index
 from backoff import backoff
-from log import log_es_result
+from change_feed import ChangeFeed
+from log import log_bulk_throughput, log_es_result, log_linked_films, log_stage_timings, log_throughput
 from extract import Extract
-from load import load_data_to_elastic_search
+from linked_films import has_linked_films, linked_films_reloaded, queue_linked_films, take_linked_films
+from leaderboards import (backfill_genre_leaderboards, genre_leaderboards_complete, mark_genre_leaderboards_complete,
+                          update_genre_leaderboards)
+from load import (BulkLoader, linked_ids, partial_updates, publish_changes, restore_index_after_bulk,
+                  tune_index_for_bulk)
+from pipeline import Pipeline
+from queries import generate_filmwork_by_ids_query, generate_films_of_genres_query, generate_films_of_persons_query
 from settings import BaseConfigs
+from similar import SimilarFilms
+from supervisor import Supervisor
+from state.etl_state import INITIAL_STATE, StateETL
 from transform import transform_data_from_db_for_loading_to_es
 from indices import movie_index, genre_index, person_index
 
 logging.getLogger().setLevel(logging.INFO)
 
+INDEX_NAMES = ["movies", "genres", "persons"]
+
+# Names of the indices by the tables they are loaded from.
+TABLE_INDICES = {"film_work": "movies", "genre": "genres", "person": "persons"}
+
+# Queries of films linked to entries of the tables, films embed names of genres and persons.
+LINKED_FILMS_QUERIES = {
+    "genre": generate_films_of_genres_query,
+    "person": generate_films_of_persons_query,
+}
+
 
 class ETL:
-    def __init__(self, configs: BaseConfigs, table_name: str, index_name: str, index: dict):
+    def __init__(self, configs: BaseConfigs, table_name: str, index_name: str, index: dict,
+                 write_index: Optional[str] = None, etl_state: Optional[StateETL] = None):
+        """
+        :param index_name: Name of the index the API reads, an alias of its current version.
+        :param write_index: Version of the index to rebuild instead of loading changes to the current one.
+        :param etl_state: State of the rebuild, the state of configs by default.
+        """
         self.database_params = configs.dsn
         self.elasticsearch_host = configs.es_url
-        self.etl_state = configs.etl_state
+        # Client keeps a pool of connections to ES, it is shared by all batches.
+        self.es_client = Elasticsearch(hosts=self.elasticsearch_host)
+        self.loader = BulkLoader(self.es_client, max_chunk_bytes=configs.bulk_max_chunk_bytes,
+                                 concurrency=configs.bulk_concurrency, max_retries=configs.bulk_max_retries)
+        self.etl_state = etl_state or configs.etl_state
+        self.redis = Redis(host=configs.redis_settings['redis_host'], port=configs.redis_settings['redis_port'])
+        self.cache_invalidation_channel = configs.cache_invalidation_channel
         self.size_of_batch = configs.batch
+        self.streaming = configs.extract_streaming
+        self.pipeline_queue_size = configs.pipeline_queue_size
         self.table_name = table_name
         self.index_name = index_name
         self.index = index
+        # A rebuilt version of the index is not read by the API until its alias is moved, nothing to notify about.
+        self.write_index = write_index or index_name
+        self.rebuild = write_index is not None
+        self.extractor = Extract(self.table_name, self.database_params, self.size_of_batch, configs.extract_itersize,
+                                 configs.extract_horizon_lag_seconds)
+        # Linked films are read in the load stage, while the extractor streams entries of the table.
+        self.films_extractor = Extract("film_work", self.database_params, self.size_of_batch)
+
+    def close(self) -> None:
+        """
+        Method closes connections to postgres DB, ES and redis.
+        :return: None
+        """
+        self.extractor.close()
+        self.films_extractor.close()
+        self.es_client.close()
+        self.redis.close()
 
     @backoff(limit_of_retries=10)
     def create_index_if_doesnt_exist(self) -> None:
         """
-        Method checks index, if it doesn't exist - create.
+        Method checks index, if it doesn't exist - create its first version behind the alias.
         :return: None
         """
-        client = Elasticsearch(hosts=self.elasticsearch_host)
+        if not self.es_client.indices.exists(index=self.index_name):
+            create_versioned_index(self.es_client, self.index_name, self.index, version=1, aliased=True)
 
-        if not client.indices.exists(index=self.index_name):
-            response = client.indices.create(index=self.index_name, **self.index)
-            if response.get("acknowledged"):
-                logging.info(f"Index {self.index_name} was created successfully.")
-            else:
-                logging.error("Error of creating index.")
+    def extract_batches(self) -> Iterator[tuple[list, tuple[str, str]]]:
+        """
+        Method extracts data changed since the last state in batches, in order of modified datetime and id.
+        Rows modified after the safe horizon are left to the next run, their transactions may be still open.
+        In streaming mode the query runs once, otherwise once per batch.
+        :return: Batches of data with modified datetime and id of the last entry of the batch.
+        """
+        last_state = self.etl_state.get_last_state(self.table_name)
+        until = self.extractor.safe_horizon()
+        if self.streaming:
+            yield from self.extractor.stream_data_from_db(last_state, until)
+            return
 
-    def run_etl(self):
+        # Set initially value of size_of_current_batch as size_of_batch to begin cycle.
+        size_of_current_batch = self.size_of_batch
+
+        # Check size of batch from DB, if it will be not equals size_of_batch - finish cycle.
+        while size_of_current_batch == self.size_of_batch:
+            # Get batch of data after the last entry (modified time, id), with size of batch equals size_of_batch.
+            # If size_of_current_batch not equals to size_of_batch - finish cycle.
+            data_from_db, size_of_current_batch, last_state = self.extractor.extract_data_from_db(last_state, until)
+            if data_from_db:
+                yield data_from_db, last_state
+
+    def transform_batch(self, batch: tuple[list, tuple[str, str]]) -> tuple[list, int, tuple[str, str]]:
+        """
+        Method transforms a batch of data from DB for loading to ES.
+        :param batch: Data from DB with modified datetime and id of the last entry.
+        :return: Transformed data, number of rows from DB, modified datetime and id of the last entry.
+        """
+        data_from_db, last_state = batch
+        transformed_for_elasticsearch_data_from_db = transform_data_from_db_for_loading_to_es(
+            index_name=self.index_name, data_from_db=data_from_db)
+        if self.rebuild:
+            for action in transformed_for_elasticsearch_data_from_db:
+                action["_index"] = self.write_index
+        return transformed_for_elasticsearch_data_from_db, len(data_from_db), last_state
+
+    def load_batch(self, batch: tuple[list, int, tuple[str, str]], loaded_ids: set[str],
+                   reload_linked_films: bool = True) -> int:
+        """
+        Method loads a transformed batch to ES and queues films linked to it, then moves the state past it.
+        :param batch: Transformed data, number of rows from DB, modified datetime and id of the last entry.
+        :param loaded_ids: Ids of loaded documents, ids of the batch are added.
+        :param reload_linked_films: Whether to reload films linked to the loaded genres or persons.
+        :return: Number of queued films.
+        """
+        transformed_for_elasticsearch_data_from_db, _, last_state = batch
+        batch_ids = {action["_id"] for action in transformed_for_elasticsearch_data_from_db}
+
+        # Genres and persons films are no longer linked to list them in their cached responses.
+        previous_ids = None
+        if self.index_name == "movies" and not self.rebuild:
+            previous_ids = linked_ids(self.es_client, self.index_name, sorted(batch_ids))
+
+        # Films are updated partially, their similar films are kept.
+        actions = transformed_for_elasticsearch_data_from_db
+        result_of_etl_loading = self.loader.load(partial_updates(actions) if self.index_name == "movies" else actions)
+        loaded_ids.update(batch_ids)
+
+        # Leaderboards of genres are kept by the ETL of the index the API reads, a rebuild does not write them.
+        if self.index_name == "movies" and not self.rebuild:
+            update_genre_leaderboards(self.redis, transformed_for_elasticsearch_data_from_db)
+
+        linked_films = 0
+        if not self.rebuild:
+            # Let the API evict cached responses of the changed documents.
+            publish_changes(self.redis, self.cache_invalidation_channel, transformed_for_elasticsearch_data_from_db,
+                            previous_ids)
+            if reload_linked_films:
+                linked_films = self.queue_linked_films(batch_ids)
+
+        # Set new state, only after the batch was loaded and its films were queued.
+        self.etl_state.set_last_state(self.table_name, last_state)
+
+        # Log result of loading.
+        log_es_result(result_of_etl_loading, self.table_name)
+        return linked_films
+
+    @backoff(limit_of_retries=10)
+    def movies_index_exists(self) -> bool:
+        """
+        Method checks that index of films exists.
+        :return: True if it exists.
+        """
+        return self.es_client.indices.exists(index="movies")
+
+    def queue_linked_films(self, changed_ids: set[str]) -> int:
+        """
+        Method queues films linked to the changed genres or persons, so that films show their new names.
+        The ETL of films reloads them after its own loads: a film it read before the names changed is loaded first.
+        :param changed_ids: Ids of the changed entries.
+        :return: Number of queued films.
+        """
+        if self.table_name not in LINKED_FILMS_QUERIES or not changed_ids:
+            return 0
+        # Films are loaded by the ETL of films with current names first.
+        if not self.movies_index_exists():
+            return 0
+
+        query = LINKED_FILMS_QUERIES[self.table_name](sorted(changed_ids))
+        film_ids = sorted(str(row["id"]) for row in self.films_extractor.fetch_all(query))
+        queue_linked_films(self.redis, film_ids)
+        return len(film_ids)
+
+    def reload_linked_films(self) -> int:
+        """
+        Method reloads films queued by the ETL of genres and persons.
+        Films are updated partially, their similar films are kept.
+        :return: Number of reloaded films.
+        """
+        film_ids = take_linked_films(self.redis)
+        for start in range(0, len(film_ids), self.size_of_batch):
+            ids = film_ids[start:start + self.size_of_batch]
+            films = self.films_extractor.fetch_all(generate_filmwork_by_ids_query(ids))
+            transformed_films = transform_data_from_db_for_loading_to_es(index_name="movies", data_from_db=films)
+            previous_ids = linked_ids(self.es_client, self.index_name, ids)
+            self.loader.load(partial_updates(transformed_films))
+            publish_changes(self.redis, self.cache_invalidation_channel, transformed_films, previous_ids)
+        linked_films_reloaded(self.redis)
+        if film_ids:
+            logging.info(f"{len(film_ids)} films linked to changed genres or persons were reloaded to ES.")
+        return len(film_ids)
+
+    def run_etl(self) -> set[str]:
         """
         Method runs ETL process: check indexes, get state, get data from db, transform data, load data.
+        Extract, transform and load of consecutive batches run concurrently.
+        Films linked to the changed genres or persons are queued, the ETL of films reloads them after its loads.
+        :return: Ids of loaded documents.
         """
         # Check index, if it doesn't exist - create.
         self.create_index_if_doesnt_exist()
 
-        extractor = Extract(self.table_name, self.database_params, self.size_of_batch)
+        # All entries are loaded from the start, e.g. after the state was reset.
+        full_load = self.etl_state.get_last_state(self.table_name)[0] == INITIAL_STATE
 
-        # Set initially value of size_of_current_batch as size_of_batch to begin cycle.
-        size_of_current_batch = self.size_of_batch
+        # Films loaded before leaderboards of genres were kept are not in them, the full load builds them anyway.
+        if self.index_name == "movies" and not self.rebuild and not full_load \
+                and not genre_leaderboards_complete(self.redis):
+            backfill_genre_leaderboards(self.redis, self.es_client, self.index_name)
 
-        # Check size of batch from DB, if it will be not equals size_of_batch - finish cycle.
-        while size_of_current_batch == self.size_of_batch:
-            state_modified = self.etl_state.get_last_state(self.table_name)
+        # Settings left by a failed full load are restored first.
+        restore_index_after_bulk(self.es_client, self.write_index)
+        if full_load:
+            tune_index_for_bulk(self.es_client, self.write_index)
 
-            # Get batch of data with modified time starting from last_modified, with size of batch equals size_of_batch.
-            # If size_of_current_batch not equals to size_of_batch - finish cycle.
-            data_from_db, size_of_current_batch, last_modified = extractor.extract_data_from_db(state_modified)
+        loaded_ids = set()
+        rows = 0
+        linked_films = 0
+        self.loader.reset_stats()
+        started = time.perf_counter()
+
+        def load(batch):
+            nonlocal rows, linked_films
+            # A full load of genres or persons is not a change of names, films get current names from their ETL.
+            linked_films += self.load_batch(batch, loaded_ids, reload_linked_films=not full_load)
+            rows += batch[1]
+
+        try:
+            stages = Pipeline(self.pipeline_queue_size).run(self.extract_batches(), self.transform_batch, load)
+        finally:
+            if full_load:
+                restore_index_after_bulk(self.es_client, self.write_index)
+
+        # Leaderboards of genres are complete once all films were loaded from the start.
+        if full_load and self.index_name == "movies" and not self.rebuild:
+            mark_genre_leaderboards_complete(self.redis)
+
+        log_throughput(self.table_name, rows, time.perf_counter() - started)
+        log_stage_timings(self.table_name, stages)
+        log_bulk_throughput(self.table_name, self.loader.docs, self.loader.seconds, self.loader.rejections)
+        if self.table_name in LINKED_FILMS_QUERIES and not self.rebuild:
+            log_linked_films(self.table_name, len(loaded_ids), linked_films)
+        if self.index_name == "movies" and not self.rebuild:
+            self.reload_linked_films()
 
-            transformed_for_elasticsearch_data_from_db = transform_data_from_db_for_loading_to_es(
-                index_name=self.index_name, data_from_db=data_from_db)
+        return loaded_ids
 
-            result_of_etl_loading = load_data_to_elastic_search(self.elasticsearch_host,
-                                                                transformed_for_elasticsearch_data_from_db)
 
-            # Set new state.
-            self.etl_state.set_last_state(self.table_name, last_modified)
+def build_etls(configs: BaseConfigs, index_names: list[str]) -> dict[str, ETL]:
+    """
+    Function builds ETL of the given indices, each keeps its connections until it is closed.
+    :param configs: Configs of ETL.
+    :param index_names: Names of the indices to run ETL for.
+    :return: ETL by the name of the index.
+    """
+    etls = {}
+    if "movies" in index_names:
+        etls["movies"] = ETL(configs, table_name="film_work", index_name="movies", index=movie_index)
+    if "genres" in index_names:
+        etls["genres"] = ETL(configs, table_name="genre", index_name="genres", index=genre_index)
+    if "persons" in index_names:
+        etls["persons"] = ETL(configs, table_name="person", index_name="persons", index=person_index)
+    return etls
 
-            # Log result of loading.
-            log_es_result(result_of_etl_loading, self.table_name)
+
+def build_jobs(configs: BaseConfigs, etls: dict[str, ETL], wake: Callable[[Iterable[str]], None] = lambda names: None
+               ) -> dict[str, tuple[Callable[[], None], float]]:
+    """
+    Function builds jobs of the ETL with intervals between their runs.
+    :param configs: Configs of ETL.
+    :param etls: ETL by the name of the index.
+    :param wake: Function running jobs with the given names without waiting for their schedule.
+    :return: Job and interval between its runs in seconds by the name of the index.
+    """
+    jobs = {}
+
+    def run_linked(etl: ETL) -> Callable[[], None]:
+        def run() -> None:
+            etl.run_etl()
+            # Films linked to the changed entries are reloaded by the ETL of films.
+            if has_linked_films(etl.redis):
+                wake(["movies"])
+
+        return run
+
+    if etl_movies := etls.get("movies"):
+        similar_films = SimilarFilms(etl_movies.es_client, top_k=configs.similar_films_top_k,
+                                     batch_size=configs.similar_films_batch)
+
+        def run_movies() -> None:
+            changed_films = etl_movies.run_etl()
+            if changed_films:
+                similar_films.update(changed_films)
+
+        jobs["movies"] = run_movies, configs.run_movies_etl_every_seconds or configs.run_etl_every_seconds
+    if etl_genres := etls.get("genres"):
+        jobs["genres"] = run_linked(etl_genres), configs.run_genres_etl_every_seconds or configs.run_etl_every_seconds
+    if etl_persons := etls.get("persons"):
+        jobs["persons"] = (run_linked(etl_persons),
+                           configs.run_persons_etl_every_seconds or configs.run_etl_every_seconds)
+    return jobs
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load movies, genres and persons from Postgres to Elasticsearch.")
+    parser.add_argument("indices", nargs="*", metavar="index",
+                        help=f"Indices to run ETL for: {', '.join(INDEX_NAMES)}. All by default.")
+    parser.add_argument("--once", action="store_true", help="Run ETL of every index once and exit.")
+    args = parser.parse_args()
+    # Choices of argparse reject an empty list of positional arguments.
+    if unknown := set(args.indices) - set(INDEX_NAMES):
+        parser.error(f"unknown indices: {', '.join(sorted(unknown))}")
+
     configs = BaseConfigs()
+    etls = build_etls(configs, args.indices or INDEX_NAMES)
+    # Jobs wake the ETL of films through the supervisor they are run by.
+    jobs = build_jobs(configs, etls, wake=lambda names: supervisor.wake(names))
+    supervisor = Supervisor(jobs, once=args.once)
 
-    etl_movies = ETL(configs, table_name="film_work", index_name="movies", index=movie_index)
-    etl_genres = ETL(configs, table_name="genre", index_name="genres", index=genre_index)
-    etl_persons = ETL(configs, table_name="person", index_name="persons", index=person_index)
+    listener = None
+    if configs.change_feed and not args.once:
+        change_feed = ChangeFeed(configs.dsn, configs.change_feed_debounce_seconds)
+        try:
+            change_feed.install()
+        except psycopg.Error as e:
+            logging.error(msg=f"Change feed was not installed, tables are polled only. {e}")
+            change_feed.close()
+        else:
+            listener = threading.Thread(target=change_feed.listen, name="change-feed", daemon=True,
+                                        args=(supervisor.stopped,
+                                              lambda tables: supervisor.wake(TABLE_INDICES[table] for table in tables
+                                                                             if table in TABLE_INDICES)))
+            listener.start()
 
-    while True:
-        etl_movies.run_etl()
-        etl_genres.run_etl()
-        etl_persons.run_etl()
-        time.sleep(configs.run_etl_every_seconds)
+    try:
+        succeeded = supervisor.run()
+    finally:
+        # The feed closes its connection once it sees the stop, it waits for notifications for a second at most.
+        supervisor.stopped.set()
+        if listener is not None:
+            listener.join(timeout=5)
+        for etl in etls.values():
+            etl.close()
+    sys.exit(0 if succeeded else 1)
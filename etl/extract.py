@@ -1,46 +1,165 @@
 import logging
+import time
+from typing import Iterator, Optional
 
 import psycopg
 from psycopg.rows import dict_row
 from psycopg import ClientCursor
 
 from backoff import backoff
-from queries import generate_filmwork_query, generate_person_query, generate_genre_query
+from queries import generate_filmwork_query, generate_horizon_query, generate_person_query, generate_genre_query
+
+QUERIES = {
+    "film_work": generate_filmwork_query,
+    "person": generate_person_query,
+    "genre": generate_genre_query,
+}
+
+# Reconnections of a stream in a row before giving up.
+STREAM_RETRIES = 10
+
+# Application name of connections of the ETL, their transactions do not hold the horizon of extraction back.
+APPLICATION_NAME = "etl"
+
+
+def last_state_of(batch: list) -> tuple[str, str]:
+    """
+    Function gets the position of the last entry of a batch, the next batch starts right after it.
+    :param batch: Batch of data from DB ordered by modified datetime and id.
+    :return: Modified datetime and id of the last entry.
+    """
+    return str(batch[-1]["modified"]), str(batch[-1]["id"])
 
 
 class Extract:
-    def __init__(self, table_name: str, database_params, size_of_batch):
+    def __init__(self, table_name: str, database_params, size_of_batch, itersize: int = 1000,
+                 horizon_lag_seconds: Optional[float] = None):
+        """
+        :param horizon_lag_seconds: Lag of the horizon rows are read up to, rows are read up to now if not set.
+        """
         self.table_name = table_name
         self.database_params = database_params
         self.size_of_batch = size_of_batch
+        self.itersize = itersize
+        self.horizon_lag_seconds = horizon_lag_seconds
+        self._connection = None
 
-    @backoff(limit_of_retries=10)
-    def extract_data_from_db(self, last_modified: str) -> (list, int, str):
+    @property
+    def connection(self) -> psycopg.Connection:
         """
-        Method extracts data from postgres DB.
-        :param last_modified: Last modified of data.
-        :return: List of data, size of current batch, modified datetime of last entry.
+        Connection to postgres DB, kept open between batches and opened again after it was lost.
+        :return: Connection.
         """
-        with psycopg.connect(**self.database_params, row_factory=dict_row,
-                             cursor_factory=ClientCursor) as conn, conn.cursor() as cursor:
-            executed_data = {}
+        if self._connection is None or self._connection.closed:
+            self._connection = psycopg.connect(**self.database_params, application_name=APPLICATION_NAME,
+                                               row_factory=dict_row, cursor_factory=ClientCursor, autocommit=True)
+        return self._connection
 
-            if self.table_name == "film_work":
-                cursor.execute(generate_filmwork_query(last_modified, self.size_of_batch))
+    def close(self) -> None:
+        """
+        Method closes connection to postgres DB.
+        :return: None
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
 
-            elif self.table_name == "person":
-                cursor.execute(generate_person_query(last_modified, self.size_of_batch))
+    def safe_horizon(self) -> Optional[str]:
+        """
+        Method gets the horizon rows are read up to. Rows modified before it are committed, so that the state
+        never moves past a row of a transaction that commits later.
+        :return: Modified datetime, None if rows are read up to now.
+        """
+        if self.horizon_lag_seconds is None:
+            return None
+        return str(self.fetch_all(generate_horizon_query(self.horizon_lag_seconds, APPLICATION_NAME))[0]["horizon"])
 
-            elif self.table_name == "genre":
-                cursor.execute(generate_genre_query(last_modified, self.size_of_batch))
+    @backoff(limit_of_retries=10)
+    def extract_data_from_db(self, last_state: tuple[str, str],
+                             until: Optional[str] = None) -> (list, int, tuple[str, str]):
+        """
+        Method extracts data from postgres DB.
+        :param last_state: Last modified and id of data.
+        :param until: Horizon rows are read up to, None for all rows.
+        :return: List of data, size of current batch, modified datetime and id of last entry.
+        """
+        try:
+            return self._extract_data_from_db(last_state, until)
+        except (psycopg.OperationalError, psycopg.InterfaceError):
+            # Connection is broken, backoff retries with a new one.
+            self.close()
+            raise
+
+    def _extract_data_from_db(self, last_state: tuple[str, str],
+                              until: Optional[str] = None) -> (list, int, tuple[str, str]):
+        with self.connection.cursor() as cursor:
+            cursor.execute(QUERIES[self.table_name](*last_state, self.size_of_batch, until=until))
 
             executed_data = cursor.fetchall()
             size_of_current_batch = len(executed_data)
 
-            # Get modified date of the last entry in the batch.
+            # Get modified date and id of the last entry in the batch.
             if size_of_current_batch == 0:
                 logging.info('There is no new data to extract.')
-                return [], 0, last_modified
-            last_modified = str(executed_data[-1]["modified"])
+                return [], 0, last_state
+
+            return executed_data, size_of_current_batch, last_state_of(executed_data)
+
+    @backoff(limit_of_retries=10)
+    def fetch_all(self, query: str) -> list:
+        """
+        Method runs a query against postgres DB.
+        :param query: Query.
+        :return: All rows of the result.
+        """
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(query)
+                return cursor.fetchall()
+        except (psycopg.OperationalError, psycopg.InterfaceError):
+            # Connection is broken, backoff retries with a new one.
+            self.close()
+            raise
+
+    def stream_data_from_db(self, last_state: tuple[str, str],
+                            until: Optional[str] = None) -> Iterator[tuple[list, tuple[str, str]]]:
+        """
+        Method streams data from postgres DB: the query runs once, rows are read through a server-side cursor
+        `itersize` rows at a time and handed over in batches of `size_of_batch`.
+        A lost connection is reopened and the stream continues after the last handed over batch.
+        :param last_state: Last modified and id of data.
+        :param until: Horizon rows are read up to, None for all rows.
+        :return: Batches of data with modified datetime and id of the last entry of the batch.
+        """
+        retries = 0
+        while True:
+            try:
+                for batch, batch_last_state in self._stream_data_from_db(last_state, until):
+                    yield batch, batch_last_state
+                    last_state = batch_last_state
+                    retries = 0
+                return
+            except (psycopg.OperationalError, psycopg.InterfaceError) as e:
+                self.close()
+                retries += 1
+                if retries > STREAM_RETRIES:
+                    logging.critical(msg=f"The number of reconnections exceeded. {e}")
+                    raise
+                logging.error(msg=f"Database error. {e}")
+                time.sleep(min(0.1 * 2 ** retries, 10.0))
+
+    def _stream_data_from_db(self, last_state: tuple[str, str],
+                             until: Optional[str] = None) -> Iterator[tuple[list, tuple[str, str]]]:
+        # Server-side cursors live in a transaction, the connection is in autocommit mode otherwise.
+        with self.connection.transaction(), self.connection.cursor(name=f"etl_{self.table_name}") as cursor:
+            cursor.itersize = self.itersize
+            cursor.execute(QUERIES[self.table_name](*last_state, until=until))
 
-            return executed_data, size_of_current_batch, last_modified
+            batch = []
+            for row in cursor:
+                batch.append(row)
+                if len(batch) == self.size_of_batch:
+                    yield batch, last_state_of(batch)
+                    batch = []
+            if batch:
+                yield batch, last_state_of(batch)
@@ -39,9 +39,19 @@ settings = {
     }
 }
 
+# Films are stored sorted the way the top rated lists read them,
+# so those queries stop after the first page instead of sorting every match.
+movie_settings = {
+  **settings,
+  "index": {
+    "sort.field": ["imdb_rating", "id"],
+    "sort.order": ["desc", "asc"]
+  }
+}
+
 
 movie_index = {
-  "settings": settings
+  "settings": movie_settings
   ,
   "mappings": {
     "dynamic": "strict",
@@ -71,6 +81,9 @@ movie_index = {
         "fields": {
           "raw": {
             "type":  "keyword"
+          },
+          "suggest": {
+            "type": "completion"
           }
         }
       },
@@ -116,6 +129,22 @@ movie_index = {
             "analyzer": "ru_en"
           }
         }
+      },
+      "genre_ids": {
+        "type": "keyword"
+      },
+      "actor_ids": {
+        "type": "keyword"
+      },
+      "writer_ids": {
+        "type": "keyword"
+      },
+      "director_ids": {
+        "type": "keyword"
+      },
+      "similar_ids": {
+        "type": "keyword",
+        "doc_values": False
       }
     }
   }
@@ -162,6 +191,9 @@ person_index = {
         "fields": {
           "raw": {
             "type":  "keyword"
+          },
+          "suggest": {
+            "type": "completion"
           }
         }
       }
@@ -0,0 +1,97 @@
+import logging
+
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import scan
+from redis import Redis
+
+from backoff import backoff
+
+# Keys are read by GenreService of the API as well. Scores are negated ratings, so that films with the same rating
+# are ordered by id as in the sort of Elasticsearch.
+GENRE_LEADERBOARD_KEY = "leaderboard:v2:genre:{genre_id}"
+FILM_GENRES_KEY = "leaderboard:v2:film-genres"
+LEADERBOARDS_COMPLETE_KEY = "leaderboard:v2:complete"
+
+# Keys of leaderboards scored by ratings, deleted once the leaderboards are built again.
+LEGACY_KEYS = ("leaderboard:film-genres", "leaderboard:complete")
+LEGACY_GENRE_LEADERBOARDS = "leaderboard:genre:*"
+
+# Films read from the index per update of leaderboards while they are built from the index.
+BACKFILL_BATCH = 1000
+
+
+@backoff(limit_of_retries=10)
+def update_genre_leaderboards(redis_client: Redis, data: list) -> None:
+    """
+    Function for updating sorted sets of films per genre, scored by negated IMDb rating.
+    Films are also removed from leaderboards of genres they no longer have.
+    :param redis_client: Redis client.
+    :param data: List of data loaded to the Elasticsearch.
+    :return: None
+    """
+    films = [action["_source"] for action in data if action["_index"] == "movies"]
+    if not films:
+        return
+
+    previous_genres = redis_client.hmget(FILM_GENRES_KEY, [film["id"] for film in films])
+
+    with redis_client.pipeline() as pipe:
+        for film, previous in zip(films, previous_genres):
+            genre_ids = film.get("genre_ids") or []
+            for genre_id in set(previous.decode().split(",") if previous else []) - set(genre_ids):
+                pipe.zrem(GENRE_LEADERBOARD_KEY.format(genre_id=genre_id), film["id"])
+
+            # Films without rating go last, as in the sort of Elasticsearch.
+            score = -film["imdb_rating"] if film.get("imdb_rating") is not None else float("inf")
+            for genre_id in genre_ids:
+                pipe.zadd(GENRE_LEADERBOARD_KEY.format(genre_id=genre_id), {film["id"]: score})
+            pipe.hset(FILM_GENRES_KEY, film["id"], ",".join(genre_ids))
+        pipe.execute()
+
+
+@backoff(limit_of_retries=10)
+def mark_genre_leaderboards_complete(redis_client: Redis) -> None:
+    """
+    Function for marking leaderboards as built from all films, the API reads them only after that.
+    :param redis_client: Redis client.
+    :return: None
+    """
+    redis_client.set(LEADERBOARDS_COMPLETE_KEY, 1)
+
+
+@backoff(limit_of_retries=10)
+def genre_leaderboards_complete(redis_client: Redis) -> bool:
+    """
+    Function for checking that leaderboards were built from all films.
+    :param redis_client: Redis client.
+    :return: True if they were.
+    """
+    return bool(redis_client.exists(LEADERBOARDS_COMPLETE_KEY))
+
+
+def backfill_genre_leaderboards(redis_client: Redis, es_client: Elasticsearch, index_name: str = "movies") -> int:
+    """
+    Function for building leaderboards from films already loaded to the index, e.g. when the ETL runs with
+    leaderboards for the first time or their keys changed. Leaderboards of the previous keys are deleted.
+    :param redis_client: Redis client.
+    :param es_client: Client of elasticsearch.
+    :param index_name: Name of index of films.
+    :return: Number of films.
+    """
+    films = []
+    count = 0
+    for hit in scan(es_client, index=index_name, query={"_source": ["id", "imdb_rating", "genre_ids"]}):
+        films.append({"_index": "movies", "_source": hit["_source"]})
+        if len(films) == BACKFILL_BATCH:
+            update_genre_leaderboards(redis_client, films)
+            count += len(films)
+            films = []
+    if films:
+        update_genre_leaderboards(redis_client, films)
+        count += len(films)
+    mark_genre_leaderboards_complete(redis_client)
+
+    legacy_keys = [*LEGACY_KEYS, *redis_client.scan_iter(match=LEGACY_GENRE_LEADERBOARDS, count=1000)]
+    redis_client.unlink(*legacy_keys)
+    logging.info(f"Leaderboards of genres were built from {count} films of '{index_name}'.")
+    return count
@@ -0,0 +1,54 @@
+from redis import Redis
+
+from backoff import backoff
+
+# Films linked to changed genres or persons, the ETL of films reloads them after its own loads, so that a film
+# read before the names changed never overwrites the reloaded one.
+LINKED_FILMS_KEY = "etl:linked-films"
+# Films taken by the ETL of films, they are taken again after a failed reload.
+RELOADING_FILMS_KEY = "etl:linked-films:reloading"
+
+
+@backoff(limit_of_retries=10)
+def queue_linked_films(redis_client: Redis, film_ids: list[str]) -> None:
+    """
+    Function for queueing films to reload by the ETL of films.
+    :param redis_client: Redis client.
+    :param film_ids: Ids of the films.
+    :return: None
+    """
+    if film_ids:
+        redis_client.sadd(LINKED_FILMS_KEY, *film_ids)
+
+
+@backoff(limit_of_retries=10)
+def has_linked_films(redis_client: Redis) -> bool:
+    """
+    Function for checking that films are queued or taken for reloading.
+    :param redis_client: Redis client.
+    :return: True if they are.
+    """
+    return bool(redis_client.exists(LINKED_FILMS_KEY, RELOADING_FILMS_KEY))
+
+
+@backoff(limit_of_retries=10)
+def take_linked_films(redis_client: Redis) -> list[str]:
+    """
+    Function for taking queued films for reloading. Films queued meanwhile stay in the queue for the next reload.
+    Films taken by a failed reload are taken again before new ones.
+    :param redis_client: Redis client.
+    :return: Ids of the films.
+    """
+    if not redis_client.exists(RELOADING_FILMS_KEY) and redis_client.exists(LINKED_FILMS_KEY):
+        redis_client.renamenx(LINKED_FILMS_KEY, RELOADING_FILMS_KEY)
+    return sorted(film_id.decode() for film_id in redis_client.smembers(RELOADING_FILMS_KEY))
+
+
+@backoff(limit_of_retries=10)
+def linked_films_reloaded(redis_client: Redis) -> None:
+    """
+    Function for marking taken films as reloaded.
+    :param redis_client: Redis client.
+    :return: None
+    """
+    redis_client.delete(RELOADING_FILMS_KEY)
@@ -1,18 +1,269 @@
+import json
+import logging
+import random
+import time
+from typing import Iterator, Optional
+
 from elasticsearch import Elasticsearch
-from elasticsearch.helpers import bulk
+from elasticsearch.exceptions import TransportError
+from elasticsearch.helpers import BulkIndexError, parallel_bulk, streaming_bulk
+from redis import Redis
 
 from backoff import backoff
 
+PERSON_ID_FIELDS = ("actor_ids", "writer_ids", "director_ids")
+
+# Chunks are not made smaller than that after rejections.
+MIN_CHUNK_BYTES = 256 * 1024
+
+# Settings of an index during a full load, searches do not see new documents until it ends.
+BULK_SETTINGS = {"index.refresh_interval": "-1", "index.number_of_replicas": 0}
+
+# Key of the mapping meta keeping settings of an index to restore after a full load.
+RESTORE_SETTINGS_META = "settings_before_bulk"
+
+# Prefix of keys of responses cached by the API and path params its endpoints take ids of the indices as.
+CACHE_PREFIX = "fastapi-cache"
+INDEX_PATH_PARAMS = {"movies": "film_id", "genres": "genre_id", "persons": "person_id"}
+
+
+class BulkLoader:
+    """
+    Loads data to Elasticsearch in chunks limited by payload bytes, `concurrency` chunks at a time.
+    Documents rejected by overloaded Elasticsearch (429) are sent again after a pause with smaller and fewer
+    chunks, sizes grow back while Elasticsearch keeps up.
+    """
+
+    def __init__(self, client: Elasticsearch, max_chunk_bytes: int = 10 * 1024 * 1024, concurrency: int = 2,
+                 max_retries: int = 8):
+        self.client = client
+        self.max_chunk_bytes = max_chunk_bytes
+        self.max_concurrency = concurrency
+        self.max_retries = max_retries
+        self.chunk_bytes = max_chunk_bytes
+        self.concurrency = concurrency
+        self.docs = 0
+        self.seconds = 0.0
+        self.rejections = 0
+
+    def reset_stats(self) -> None:
+        """
+        Method resets counters of loaded documents, time of loading and rejections.
+        :return: None
+        """
+        self.docs = 0
+        self.seconds = 0.0
+        self.rejections = 0
+
+    # Rejections are retried inside, failed documents would fail again: only lost connections are retried.
+    @backoff(limit_of_retries=10, exceptions=(TransportError,))
+    def load(self, data: list) -> tuple[int, list]:
+        """
+        Method for loading data to Elasticsearch.
+        Documents failed to index and documents rejected more than `max_retries` times raise BulkIndexError.
+        :param data: List with prepared data for inserting to the Elasticsearch
+        :return: Number of loaded documents and errors.
+        """
+        started = time.perf_counter()
+        success = 0
+        pending = data
+        for retry in range(self.max_retries + 1):
+            rejected = []
+            # Results come in the order of the actions.
+            for (ok, item), action in zip(self._bulk(pending), pending):
+                if ok:
+                    success += 1
+                elif next(iter(item.values())).get("status") == 429:
+                    rejected.append(action)
+                else:
+                    raise BulkIndexError(f"Document {next(iter(item.values())).get('_id')} failed to index.", [item])
+
+            if not rejected:
+                # Elasticsearch keeps up, let chunks grow back.
+                self.chunk_bytes = min(self.max_chunk_bytes, self.chunk_bytes * 2)
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                break
+
+            self.rejections += len(rejected)
+            self.chunk_bytes = max(MIN_CHUNK_BYTES, self.chunk_bytes // 2)
+            self.concurrency = max(1, self.concurrency // 2)
+            delay = min(0.5 * 2 ** retry, 30.0)
+            logging.warning(f"{len(rejected)} documents were rejected by ES, they are sent again in {delay:.1f}s "
+                            f"in chunks of {self.chunk_bytes} bytes by {self.concurrency}.")
+            time.sleep(delay / 2 + random.uniform(0, delay / 2))
+            pending = rejected
+        else:
+            raise BulkIndexError(f"{len(pending)} document(s) were rejected by ES.", pending)
+
+        self.docs += success
+        self.seconds += time.perf_counter() - started
+        return success, []
+
+    def _bulk(self, data: list) -> Iterator[tuple[bool, dict]]:
+        # Chunks are limited by bytes, the number of documents in a chunk is not.
+        options = {"chunk_size": len(data) or 1, "max_chunk_bytes": self.chunk_bytes,
+                   "raise_on_error": False, "raise_on_exception": False}
+        if self.concurrency > 1:
+            return parallel_bulk(self.client, data, thread_count=self.concurrency, queue_size=self.concurrency,
+                                 **options)
+        return streaming_bulk(self.client, data, **options)
+
+
+@backoff(limit_of_retries=10)
+def tune_index_for_bulk(client: Elasticsearch, index_name: str) -> None:
+    """
+    Function turns off refresh and replicas of the index for a full load.
+    Previous settings are kept in the mapping, so that they are restored even after the ETL has failed.
+    :param client: Client of elasticsearch.
+    :param index_name: Name of index.
+    :return: None
+    """
+    meta = _index_meta(client, index_name)
+    if RESTORE_SETTINGS_META not in meta:
+        response = client.indices.get_settings(index=index_name, flat_settings=True, include_defaults=True)
+        current = next(iter(response.values()))
+        restore = {key: current["settings"].get(key, current["defaults"].get(key)) for key in BULK_SETTINGS}
+        client.indices.put_mapping(index=index_name, meta={**meta, RESTORE_SETTINGS_META: restore})
+    client.indices.put_settings(index=index_name, settings=BULK_SETTINGS)
+    logging.info(f"Refresh and replicas of '{index_name}' were turned off for a full load.")
+
+
+@backoff(limit_of_retries=10)
+def restore_index_after_bulk(client: Elasticsearch, index_name: str) -> None:
+    """
+    Function restores settings of the index changed by `tune_index_for_bulk`, if they were changed.
+    :param client: Client of elasticsearch.
+    :param index_name: Name of index.
+    :return: None
+    """
+    meta = _index_meta(client, index_name)
+    restore = meta.pop(RESTORE_SETTINGS_META, None)
+    if restore is None:
+        return
+    client.indices.put_settings(index=index_name, settings=restore)
+    client.indices.put_mapping(index=index_name, meta=meta)
+    client.indices.refresh(index=index_name)
+    logging.info(f"Refresh and replicas of '{index_name}' were restored.")
+
+
+def _index_meta(client: Elasticsearch, index_name: str) -> dict:
+    response = client.indices.get_mapping(index=index_name)
+    return next(iter(response.values()))["mappings"].get("_meta", {})
+
+
+def partial_updates(data: list) -> list:
+    """
+    Function turns prepared data into partial updates, fields the data does not have keep their values,
+    e.g. similar films of films.
+    :param data: List with prepared data for inserting to the Elasticsearch.
+    :return: List of update actions, documents missing from the index are created.
+    """
+    return [{"_op_type": "update", "_index": action["_index"], "_id": action["_id"], "doc": action["_source"],
+             "doc_as_upsert": True} for action in data]
+
 
 @backoff(limit_of_retries=10)
-def load_data_to_elastic_search(elasticsearch_host: str, data: list):
+def linked_ids(client: Elasticsearch, index_name: str, film_ids: list[str]) -> dict:
+    """
+    Function for reading ids of genres and persons the films are linked to in the index, before the films are
+    loaded again: genres and persons a film loses are affected by the load as well.
+    :param client: Client of elasticsearch.
+    :param index_name: Name of index of films.
+    :param film_ids: Ids of the films.
+    :return: Ids of the linked documents by the name of index, films missing from the index have none.
+    """
+    ids = {"genres": set(), "persons": set()}
+    if not film_ids:
+        return ids
+    response = client.mget(index=index_name, ids=film_ids, source_includes=["genre_ids", *PERSON_ID_FIELDS])
+    for doc in response["docs"]:
+        source = doc.get("_source") or {}
+        ids["genres"].update(source.get("genre_ids") or [])
+        ids["persons"].update(person_id for field in PERSON_ID_FIELDS for person_id in source.get(field) or [])
+    return ids
+
+
+def changed_ids(data: list, previous: Optional[dict] = None) -> dict:
+    """
+    Function for collecting ids of the documents affected by the loaded data.
+    Films also affect their genres and persons: lists of films of those are cached by the API too.
+    :param data: List of data loaded to the Elasticsearch.
+    :param previous: Ids of documents the data was linked to before the load by the name of index.
+    :return: Ids of the affected documents by the name of index.
+    """
+    ids = {index_name: set(doc_ids) for index_name, doc_ids in (previous or {}).items()}
+    for action in data:
+        ids.setdefault(action["_index"], set()).add(action["_id"])
+        if action["_index"] == "movies":
+            source = action["_source"]
+            ids.setdefault("genres", set()).update(source.get("genre_ids") or [])
+            ids.setdefault("persons", set()).update(
+                person_id for field in PERSON_ID_FIELDS for person_id in source.get(field) or [])
+    return {index_name: sorted(doc_ids) for index_name, doc_ids in ids.items() if doc_ids}
+
+
+def evict_cached_responses(redis_client: Redis, ids: dict) -> int:
     """
-    Function for loading data to Elasticsearch.
-    :param elasticsearch_host: Host of elasticsearch.
-    :param data: List with prepared data for inserting to the Elasticsearch
-    :return: Result of loading to ES.
+    Function deletes responses cached by the API for the documents, by the sets of keys the API keeps per path param.
+    :param redis_client: Redis client.
+    :param ids: Ids of the documents by the name of index.
+    :return: Number of deleted keys.
     """
-    client = Elasticsearch(hosts=elasticsearch_host)
-    result = bulk(client, data)
-    return result
+    key_sets = [f"{CACHE_PREFIX}:keys:{INDEX_PATH_PARAMS[index_name]}={doc_id}"
+                for index_name, doc_ids in ids.items() if index_name in INDEX_PATH_PARAMS for doc_id in doc_ids]
+    if not key_sets:
+        return 0
+    with redis_client.pipeline(transaction=False) as pipe:
+        for key_set in key_sets:
+            pipe.smembers(key_set)
+        keys = set().union(*pipe.execute())
+    return redis_client.unlink(*keys, *key_sets)
 
+
+def evict_all_cached_responses(redis_client: Redis) -> int:
+    """
+    Function deletes all responses cached by the API.
+    :param redis_client: Redis client.
+    :return: Number of deleted keys.
+    """
+    evicted = 0
+    batch = []
+    for key in redis_client.scan_iter(match=f"{CACHE_PREFIX}:*", count=1000):
+        batch.append(key)
+        if len(batch) >= 1000:
+            evicted += redis_client.unlink(*batch)
+            batch = []
+    if batch:
+        evicted += redis_client.unlink(*batch)
+    return evicted
+
+
+@backoff(limit_of_retries=10)
+def publish_changes(redis_client: Redis, channel: str, data: list, previous: Optional[dict] = None) -> None:
+    """
+    Function for evicting cached responses of changed documents. Redis entries are deleted here once,
+    then the API is notified to drop them from the memory of its workers.
+    :param redis_client: Redis client.
+    :param channel: Channel the API listens to.
+    :param data: List of data loaded to the Elasticsearch.
+    :param previous: Ids of documents the data was linked to before the load by the name of index.
+    :return: None
+    """
+    ids = changed_ids(data, previous)
+    if ids:
+        evict_cached_responses(redis_client, ids)
+        redis_client.publish(channel, json.dumps(ids))
+
+
+@backoff(limit_of_retries=10)
+def publish_reindexed(redis_client: Redis, channel: str, index_name: str) -> None:
+    """
+    Function for evicting all cached responses after an index was rebuilt. Redis entries are deleted here once,
+    then the API is notified to drop them from the memory of its workers.
+    :param redis_client: Redis client.
+    :param channel: Channel the API listens to.
+    :param index_name: Name of the index, the alias moved to another version of it.
+    :return: None
+    """
+    evict_all_cached_responses(redis_client)
+    redis_client.publish(channel, json.dumps({"reindexed": [index_name]}))
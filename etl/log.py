@@ -13,4 +13,54 @@ def log_es_result(result, table_name):
     elif result[0] == 1:
         logging.info(f"{result[0]} document was added to ES. State was updated.")
     else:
-        logging.info(f"{result[0]} documents were added to ES. State was updated.")
\ No newline at end of file
+        logging.info(f"{result[0]} documents were added to ES. State was updated.")
+
+
+def log_throughput(table_name, rows, seconds):
+    """
+    Function for logging throughput of ETL process.
+    :param table_name: Name of DB table.
+    :param rows: Number of rows loaded to ES.
+    :param seconds: Duration of the process.
+    :return: None
+    """
+    if rows:
+        logging.info(f"{rows} rows of '{table_name}' were loaded in {seconds:.1f}s ({rows / seconds:.0f} rows/s).")
+
+
+def log_bulk_throughput(table_name, docs, seconds, rejections):
+    """
+    Function for logging throughput of bulk loading to ES.
+    :param table_name: Name of DB table.
+    :param docs: Number of documents loaded to ES.
+    :param seconds: Time spent in bulk requests.
+    :param rejections: Number of documents rejected by ES and sent again.
+    :return: None
+    """
+    if docs:
+        logging.info(f"{docs} documents of '{table_name}' were loaded to ES in {seconds:.1f}s "
+                     f"({docs / seconds:.0f} docs/s), {rejections} rejections.")
+
+
+def log_stage_timings(table_name, stages):
+    """
+    Function for logging timings of the stages of ETL process, the busiest stage is the bottleneck.
+    :param table_name: Name of DB table.
+    :param stages: Timings of the stages.
+    :return: None
+    """
+    if any(stage.batches for stage in stages):
+        bottleneck = max(stages, key=lambda stage: stage.busy)
+        logging.info(f"Stages of '{table_name}': {'; '.join(str(stage) for stage in stages)}. "
+                     f"Bottleneck: {bottleneck.name}.")
+
+
+def log_linked_films(table_name, entries, films):
+    """
+    Function for logging films queued for reloading after changes of the entries they embed.
+    :param table_name: Name of DB table.
+    :param entries: Number of changed entries.
+    :param films: Number of films linked to the entries.
+    :return: None
+    """
+    logging.info(f"{films} films linked to {entries} changed entries of '{table_name}' were queued for reloading.")
@@ -31,3 +31,8 @@ class Film(Base):
     actors: List[PersonData] | None = []
     directors: List[PersonData] | None = []
     writers: List[PersonData] | None = []
+    # Flat ids of genres and persons for filtering films without nested queries.
+    genre_ids: List[str] = []
+    actor_ids: List[str] = []
+    director_ids: List[str] = []
+    writer_ids: List[str] = []
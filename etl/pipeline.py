@@ -0,0 +1,144 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable
+
+# Marks the end of the batches in a queue.
+_DONE = object()
+
+# How often a stage blocked on a full or empty queue checks whether the pipeline was stopped.
+_POLL_SECONDS = 0.5
+
+
+class PipelineStopped(Exception):
+    """Raised inside a stage when another stage of the pipeline has failed."""
+
+
+class Stage:
+    """Timings of a stage: time spent on work and time spent waiting for the neighbour stages."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.batches = 0
+        self.busy = 0.0
+        self.waiting = 0.0
+
+    def __str__(self):
+        return f"{self.name}: {self.batches} batches, busy {self.busy:.1f}s, waiting {self.waiting:.1f}s"
+
+
+class Pipeline:
+    """
+    Runs extract, transform and load of batches concurrently, stages are threads joined by bounded queues.
+    A full queue holds the stage before it, so no more than `queue_size` batches wait between two stages.
+    Load runs in the calling thread and gets batches in the order they were extracted.
+    """
+
+    def __init__(self, queue_size: int = 4):
+        self.queue_size = queue_size
+        self.stages = [Stage("extract"), Stage("transform"), Stage("load")]
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._error = None
+
+    def run(self, extract: Iterable, transform: Callable[[Any], Any], load: Callable[[Any], None]) -> list[Stage]:
+        """
+        Method runs the pipeline until all batches are loaded or a stage fails, the error is raised again.
+        :param extract: Batches to process.
+        :param transform: Function transforming a batch.
+        :param load: Function loading a transformed batch.
+        :return: Timings of the stages.
+        """
+        extract_stage, transform_stage, load_stage = self.stages
+        extracted = queue.Queue(maxsize=self.queue_size)
+        transformed = queue.Queue(maxsize=self.queue_size)
+
+        threads = [
+            threading.Thread(target=self._produce, args=(extract_stage, extract, extracted), daemon=True),
+            threading.Thread(target=self._process, args=(transform_stage, extracted, transform, transformed),
+                             daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while (batch := self._get(load_stage, transformed)) is not _DONE:
+                started = time.perf_counter()
+                load(batch)
+                self._count(load_stage, started)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._stopped.set()
+            for thread in threads:
+                thread.join()
+
+        if self._error is not None and not isinstance(self._error, PipelineStopped):
+            raise self._error
+        return self.stages
+
+    def _produce(self, stage: Stage, batches: Iterable, output: queue.Queue) -> None:
+        try:
+            iterator = iter(batches)
+            while True:
+                started = time.perf_counter()
+                batch = next(iterator, _DONE)
+                if batch is _DONE:
+                    break
+                self._count(stage, started)
+                self._put(stage, output, batch)
+            self._put(stage, output, _DONE)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            # Let a generator release its connection in this thread.
+            close = getattr(batches, "close", None)
+            if close is not None:
+                close()
+
+    def _process(self, stage: Stage, source: queue.Queue, function: Callable, output: queue.Queue) -> None:
+        try:
+            while (batch := self._get(stage, source)) is not _DONE:
+                started = time.perf_counter()
+                result = function(batch)
+                self._count(stage, started)
+                self._put(stage, output, result)
+            self._put(stage, output, _DONE)
+        except BaseException as e:
+            self._fail(e)
+
+    def _get(self, stage: Stage, source: queue.Queue) -> Any:
+        started = time.perf_counter()
+        while True:
+            if self._stopped.is_set():
+                raise PipelineStopped
+            try:
+                batch = source.get(timeout=_POLL_SECONDS)
+                stage.waiting += time.perf_counter() - started
+                return batch
+            except queue.Empty:
+                continue
+
+    def _put(self, stage: Stage, output: queue.Queue, batch: Any) -> None:
+        started = time.perf_counter()
+        while True:
+            if self._stopped.is_set():
+                raise PipelineStopped
+            try:
+                output.put(batch, timeout=_POLL_SECONDS)
+                stage.waiting += time.perf_counter() - started
+                return
+            except queue.Full:
+                continue
+
+    @staticmethod
+    def _count(stage: Stage, started: float) -> None:
+        stage.batches += 1
+        stage.busy += time.perf_counter() - started
+
+    def _fail(self, error: BaseException) -> None:
+        # The first error stops the pipeline, stages stopped after it only report PipelineStopped.
+        with self._lock:
+            if self._error is None or isinstance(self._error, PipelineStopped):
+                self._error = error
+            self._stopped.set()
@@ -1,8 +1,111 @@
-def generate_filmwork_query(last_modified, size_of_batch):
+def limit(size_of_batch):
+    """
+    Function generate LIMIT clause.
+    :param size_of_batch: Size of batch, None for all rows.
+    :return: Clause
+    """
+    return f"LIMIT {size_of_batch}" if size_of_batch is not None else ""
+
+
+def before(column, until):
+    """
+    Function generate condition of rows modified before the horizon.
+    :param column: Column of modified datetime.
+    :param until: Horizon, None for all rows.
+    :return: Condition
+    """
+    return f"AND {column} < '{until}'" if until is not None else ""
+
+
+def generate_horizon_query(lag_seconds, application_name):
+    """
+    Function generate query of the horizon rows are read up to: rows modified before it are committed already.
+    Rows are modified no earlier than their transaction started, so the horizon is held back by the oldest open
+    transaction of other clients, connections of the ETL itself are not counted.
+    :param lag_seconds: Lag of the horizon covering clocks of the clients that differ from the one of DB.
+    :param application_name: Application name of connections of the ETL.
+    :return: Query
+    """
+    return f"""SELECT LEAST(now(), min(xact_start)) - interval '{lag_seconds} seconds' AS horizon
+               FROM pg_stat_activity
+               WHERE datname = current_database()
+                 AND backend_type = 'client backend'
+                 AND pid <> pg_backend_pid()
+                 AND application_name <> '{application_name}';
+            """
+
+
+def generate_count_query(table_name, until=None):
+    """
+    Function generate query of the number of rows of the table.
+    :param table_name: Name of the table.
+    :param until: Horizon, None for all rows.
+    :return: Query
+    """
+    return f"SELECT count(*) AS count FROM {table_name} WHERE true {before('modified', until)};"
+
+
+def generate_filmwork_query(last_modified, last_id, size_of_batch=None, until=None):
     """
     Function generate filmwork query.
+    Rows are paged by (modified, id), so rows sharing modified datetime are neither skipped nor read twice.
     :param last_modified: Last modified datetime for query.
-    :param size_of_batch: Size of batch.
+    :param last_id: Id of the last row with last_modified.
+    :param size_of_batch: Size of batch, None for all rows.
+    :param until: Horizon rows are read up to, None for all rows.
+    :return: Query
+    """
+    return filmwork_query(f"(fw.modified, fw.id) > ('{last_modified}', '{last_id}') {before('fw.modified', until)}",
+                          f"ORDER BY fw.modified, fw.id {limit(size_of_batch)}")
+
+
+def generate_filmwork_by_ids_query(film_ids):
+    """
+    Function generate query of filmworks with the given ids.
+    :param film_ids: Ids of filmworks.
+    :return: Query
+    """
+    return filmwork_query(f"fw.id = ANY({uuid_array(film_ids)})", "ORDER BY fw.id")
+
+
+def generate_films_of_genres_query(genre_ids):
+    """
+    Function generate query of ids of filmworks with any of the given genres.
+    :param genre_ids: Ids of genres.
+    :return: Query
+    """
+    return f"""SELECT DISTINCT gfw.film_work_id as id
+               FROM genre_film_work as gfw
+               WHERE gfw.genre_id = ANY({uuid_array(genre_ids)});
+            """
+
+
+def generate_films_of_persons_query(person_ids):
+    """
+    Function generate query of ids of filmworks with any of the given persons.
+    :param person_ids: Ids of persons.
+    :return: Query
+    """
+    return f"""SELECT DISTINCT pfw.film_work_id as id
+               FROM person_film_work as pfw
+               WHERE pfw.person_id = ANY({uuid_array(person_ids)});
+            """
+
+
+def uuid_array(ids):
+    """
+    Function generate array of uuids.
+    :param ids: Ids read from DB.
+    :return: Array literal
+    """
+    return "ARRAY[{}]::uuid[]".format(", ".join(f"'{id_}'" for id_ in ids))
+
+
+def filmwork_query(condition, tail):
+    """
+    Function generate query of filmworks with their genres and persons.
+    :param condition: Condition on filmworks `fw`.
+    :param tail: Clauses after GROUP BY.
     :return: Query
     """
     query = f"""
@@ -37,29 +140,30 @@ def generate_filmwork_query(last_modified, size_of_batch):
                 LEFT JOIN person_film_work as pfw ON pfw.film_work_id = fw.id
                 LEFT JOIN genre as g ON g.id = gfw.genre_id
                 LEFT JOIN person as p ON p.id = pfw.person_id
-                WHERE fw.modified > '{last_modified}'
+                WHERE {condition}
                 GROUP BY fw.id
-                ORDER BY fw.modified
-                LIMIT {size_of_batch};
+                {tail};
             """
     return query
 
 
-def generate_person_query(last_modified, size_of_batch):
+def generate_person_query(last_modified, last_id, size_of_batch=None, until=None):
     query = f"""SELECT person.id, person.full_name as name, person.modified
                                             FROM person
-                                            WHERE person.modified > '{last_modified}'
-                                            ORDER BY person.modified
-                                            LIMIT {size_of_batch};
+                                            WHERE (person.modified, person.id) > ('{last_modified}', '{last_id}')
+                                            {before('person.modified', until)}
+                                            ORDER BY person.modified, person.id
+                                            {limit(size_of_batch)};
                                             """
     return query
 
 
-def generate_genre_query(last_modified, size_of_batch):
+def generate_genre_query(last_modified, last_id, size_of_batch=None, until=None):
     query = f"""SELECT genre.id, genre.name, genre.description, genre.modified
                                                             FROM genre
-                                                            WHERE genre.modified > '{last_modified}'
-                                                            ORDER BY genre.modified
-                                                            LIMIT {size_of_batch};
+                                                            WHERE (genre.modified, genre.id) > ('{last_modified}', '{last_id}')
+                                                            {before('genre.modified', until)}
+                                                            ORDER BY genre.modified, genre.id
+                                                            {limit(size_of_batch)};
                                                             """
     return query
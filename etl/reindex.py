@@ -0,0 +1,128 @@
+"""
+Rebuilds an index from Postgres under a new version while the API reads the current one, then moves the alias.
+
+    python etl/reindex.py movies
+    python etl/reindex.py movies --rollback
+"""
+import argparse
+import logging
+import sys
+
+from elasticsearch import Elasticsearch
+from redis import Redis
+
+from aliases import aliased_index, aliased_versions, create_versioned_index, delete_index, index_versions, move_alias
+from etl_process_data import ETL
+from indices import genre_index, movie_index, person_index
+from load import publish_reindexed
+from queries import generate_count_query
+from settings import BaseConfigs
+from similar import SimilarFilms
+from state.etl_state import StateETL
+from state.redis_state_storage import MemoryStorage, State
+
+logging.getLogger().setLevel(logging.INFO)
+
+# Table and index settings by the name of the alias.
+INDICES = {
+    "movies": ("film_work", movie_index),
+    "genres": ("genre", genre_index),
+    "persons": ("person", person_index),
+}
+
+
+def reindex(configs: BaseConfigs, alias: str, keep: int) -> bool:
+    """
+    Function loads all entries of the table to a new version of the index, with refresh and replicas turned off.
+    Entries changed meanwhile are loaded again before the document count is checked and the alias is moved,
+    and once more after it, since the ETL writes to the previous version until the alias moves.
+    The new version is deleted if the load fails or misses entries.
+    :param configs: Configs of ETL.
+    :param alias: Name of the index the API reads.
+    :param keep: Number of previously aliased versions to keep for rollback, other versions are deleted.
+    :return: True if the alias was moved.
+    """
+    table_name, index = INDICES[alias]
+    client = Elasticsearch(hosts=configs.es_url)
+    if aliased_index(client, alias) is None:
+        create_versioned_index(client, alias, index, version=1, aliased=True)
+
+    new_version = max(index_versions(client, alias), default=0) + 1
+    new_index = create_versioned_index(client, alias, index, version=new_version)
+    # State of the rebuild, the state of the running ETL stays as it is.
+    etl = ETL(configs, table_name=table_name, index_name=alias, index=index, write_index=new_index,
+              etl_state=StateETL(State(MemoryStorage())))
+    similar_films = SimilarFilms(client, index_name=new_index, top_k=configs.similar_films_top_k,
+                                 batch_size=configs.similar_films_batch)
+
+    def load() -> None:
+        loaded_ids = etl.run_etl()
+        if alias == "movies" and loaded_ids:
+            similar_films.update(loaded_ids)
+
+    try:
+        load()
+        # All entries counted here are loaded by the next run, entries made after it may be loaded too.
+        horizon = etl.extractor.safe_horizon()
+        expected = etl.extractor.fetch_all(generate_count_query(table_name, horizon))[0]["count"]
+        load()
+        client.indices.refresh(index=new_index)
+        loaded = client.count(index=new_index)["count"]
+    except BaseException:
+        logging.error(f"Rebuild of {new_index} failed, alias {alias} was not moved.")
+        delete_index(client, new_index)
+        raise
+    if loaded < expected:
+        logging.error(f"Index {new_index} has {loaded} documents of {expected} entries of '{table_name}', "
+                      f"alias {alias} was not moved.")
+        delete_index(client, new_index)
+        return False
+    logging.info(f"Index {new_index} has {loaded} documents of {expected} entries of '{table_name}'.")
+
+    move_alias(client, alias, new_index)
+    load()
+    publish_reindexed(etl.redis, configs.cache_invalidation_channel, alias)
+
+    # Versions left by rebuilds that were killed before the alias moved are never kept.
+    previous = [index_name for index_name in aliased_versions(client, alias) if index_name != new_index]
+    kept = set(previous[-keep:]) if keep else set()
+    for version, index_name in sorted(index_versions(client, alias).items()):
+        if version < new_version and index_name not in kept:
+            delete_index(client, index_name)
+    return True
+
+
+def rollback(configs: BaseConfigs, alias: str) -> bool:
+    """
+    Function points the alias back to the version of the index it pointed to before the current one.
+    Changes loaded since the alias was moved are not in the previous version, reset the state of the ETL
+    of the index to load them.
+    :param configs: Configs of ETL.
+    :param alias: Name of the index the API reads.
+    :return: True if the alias was moved.
+    """
+    client = Elasticsearch(hosts=configs.es_url)
+    current = aliased_index(client, alias)
+    # Versions the alias never pointed to may be incomplete.
+    previous = [index_name for index_name in aliased_versions(client, alias) if index_name != current]
+    if not previous:
+        logging.error(f"There is no previous version of {alias} to roll back to.")
+        return False
+
+    move_alias(client, alias, previous[-1])
+    redis = Redis(host=configs.redis_settings['redis_host'], port=configs.redis_settings['redis_port'])
+    publish_reindexed(redis, configs.cache_invalidation_channel, alias)
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild an index under a new version and move its alias to it.")
+    parser.add_argument("index", choices=list(INDICES), help="Index to rebuild.")
+    parser.add_argument("--keep", type=int, default=1, choices=range(0, 100), metavar="N",
+                        help="Number of previous versions to keep for rollback.")
+    parser.add_argument("--rollback", action="store_true", help="Move the alias back to the previous version.")
+    args = parser.parse_args()
+
+    configs = BaseConfigs()
+    moved = rollback(configs, args.index) if args.rollback else reindex(configs, args.index, args.keep)
+    sys.exit(0 if moved else 1)
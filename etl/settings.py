@@ -1,5 +1,5 @@
 from os.path import dirname, join
-from typing import ClassVar
+from typing import ClassVar, Optional
 
 from pydantic import BaseSettings, Field
 from redis import StrictRedis
@@ -39,6 +39,27 @@ class BaseConfigs(BaseSettings):
     batch: int = Field(100, env='BATCH_SIZE')
     border_sleep_time: float = Field(10.0, env='BORDER_SLEEP_TIME')
     run_etl_every_seconds: int = Field(60, env='RUN_ETL_EVERY_SECONDS')
+    # Intervals of the ETL of every index, RUN_ETL_EVERY_SECONDS if not set.
+    run_movies_etl_every_seconds: Optional[int] = Field(None, env='RUN_MOVIES_ETL_EVERY_SECONDS')
+    run_genres_etl_every_seconds: Optional[int] = Field(None, env='RUN_GENRES_ETL_EVERY_SECONDS')
+    run_persons_etl_every_seconds: Optional[int] = Field(None, env='RUN_PERSONS_ETL_EVERY_SECONDS')
+    cache_invalidation_channel: str = Field('cache-invalidation', env='CACHE_INVALIDATION_CHANNEL')
+    # Read changed rows through a server-side cursor instead of a query per batch.
+    extract_streaming: bool = Field(True, env='EXTRACT_STREAMING')
+    extract_itersize: int = Field(1000, env='EXTRACT_ITERSIZE')
+    # Rows are read up to the start of the oldest open transaction, less the lag covering clocks of app servers.
+    extract_horizon_lag_seconds: float = Field(1.0, env='EXTRACT_HORIZON_LAG_SECONDS')
+    # Run the ETL of a table as soon as Postgres notifies about its changes, polling stays as a fallback.
+    change_feed: bool = Field(False, env='CHANGE_FEED')
+    change_feed_debounce_seconds: float = Field(1.0, env='CHANGE_FEED_DEBOUNCE_SECONDS')
+    # Bulk requests to ES are limited by bytes, concurrency shrinks and grows back on rejections.
+    bulk_max_chunk_bytes: int = Field(10 * 1024 * 1024, env='BULK_MAX_CHUNK_BYTES')
+    bulk_concurrency: int = Field(2, env='BULK_CONCURRENCY')
+    bulk_max_retries: int = Field(8, env='BULK_MAX_RETRIES')
+    # Batches waiting between two stages of the ETL pipeline.
+    pipeline_queue_size: int = Field(4, env='PIPELINE_QUEUE_SIZE')
+    similar_films_top_k: int = Field(50, env='SIMILAR_FILMS_TOP_K')
+    similar_films_batch: int = Field(256, env='SIMILAR_FILMS_BATCH')
     es_url: str = EsSettings().get_url()
     redis_settings: dict = RedisSettings().dict()
     dsn: dict = DbSettings().dict()
@@ -0,0 +1,211 @@
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import bulk, scan
+from scipy import sparse
+
+from backoff import backoff
+
+# Fields of a film the similarity is computed from.
+FEATURE_FIELDS = ("genre_ids", "actor_ids", "writer_ids", "director_ids")
+
+# Max number of ids in one `terms` query for films that list changed films as similar.
+TERMS_CHUNK = 10000
+
+
+class SimilarFilms:
+    """
+    Offline stage computing top-K similar films of every film by cosine similarity of their genres and persons.
+    Results are written to the `similar_ids` field of the films.
+    """
+
+    def __init__(self, client: Elasticsearch, index_name: str = "movies", top_k: int = 50, batch_size: int = 256):
+        self.client = client
+        self.index_name = index_name
+        self.top_k = top_k
+        self.batch_size = batch_size
+        # Features of all films are read by the first update, later updates read only the changed films.
+        self.film_ids: list[str] = []
+        self.position: dict[str, int] = {}
+        self.vocabulary: dict[str, int] = {}
+        self.features: Optional[sparse.csr_matrix] = None
+
+    def _columns(self, source: dict) -> list[int]:
+        """
+        Method gets columns of genres and persons of a film, new ones are added to the vocabulary.
+        :param source: Source of the film.
+        :return: Sorted columns.
+        """
+        columns = set()
+        for field in FEATURE_FIELDS:
+            # A person is one feature whatever their roles in the film are.
+            prefix = "genre:" if field == "genre_ids" else "person:"
+            for value in source.get(field) or []:
+                columns.add(self.vocabulary.setdefault(prefix + value, len(self.vocabulary)))
+        return sorted(columns)
+
+    def _binary_matrix(self, film_columns: dict[int, list[int]]) -> sparse.csr_matrix:
+        """
+        Method builds a matrix of ones in the given columns of the given rows, of the size of all films and features.
+        :param film_columns: Columns by row.
+        :return: Matrix.
+        """
+        rows = [row for row, columns in film_columns.items() for _ in columns]
+        columns = [column for columns in film_columns.values() for column in columns]
+        return sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, columns)),
+                                 shape=(len(self.film_ids), len(self.vocabulary)))
+
+    @backoff(limit_of_retries=10)
+    def load_features(self) -> None:
+        """
+        Method reads genres and persons of all films and builds their binary feature matrix.
+        :return: None
+        """
+        self.film_ids, self.position, self.vocabulary = [], {}, {}
+        film_columns = {}
+        for hit in scan(self.client, index=self.index_name, query={"_source": ["id", *FEATURE_FIELDS]}):
+            source = hit["_source"]
+            self.position[source["id"]] = len(self.film_ids)
+            film_columns[len(self.film_ids)] = self._columns(source)
+            self.film_ids.append(source["id"])
+        self.features = self._binary_matrix(film_columns)
+
+    @backoff(limit_of_retries=10)
+    def read_features(self, film_ids: list[str]) -> dict[str, dict]:
+        """
+        Method reads genres and persons of the given films.
+        :param film_ids: Ids of films.
+        :return: Sources of the films by id, films missing from the index are left out.
+        """
+        sources = {}
+        for start in range(0, len(film_ids), TERMS_CHUNK):
+            response = self.client.mget(index=self.index_name, ids=film_ids[start:start + TERMS_CHUNK],
+                                        source=["id", *FEATURE_FIELDS])
+            sources.update((doc["_id"], doc["_source"]) for doc in response["docs"] if doc.get("found"))
+        return sources
+
+    def update_features(self, film_ids: set[str]) -> set[str]:
+        """
+        Method reads features of the given films again and replaces their rows of the feature matrix.
+        :param film_ids: Ids of films.
+        :return: Ids of films with changed features, new films included.
+        """
+        changed = {}
+        indptr, indices = self.features.indptr, self.features.indices
+        for film_id, source in self.read_features(sorted(film_ids)).items():
+            columns = self._columns(source)
+            row = self.position.get(film_id)
+            if row is None or columns != sorted(indices[indptr[row]:indptr[row + 1]].tolist()):
+                changed[film_id] = columns
+        if not changed:
+            return set()
+
+        for film_id in changed:
+            if film_id not in self.position:
+                self.position[film_id] = len(self.film_ids)
+                self.film_ids.append(film_id)
+        features = self.features.copy()
+        features.resize((len(self.film_ids), len(self.vocabulary)))
+        kept = np.ones(len(self.film_ids), dtype=np.float32)
+        kept[[self.position[film_id] for film_id in changed]] = 0
+        replaced = self._binary_matrix({self.position[film_id]: columns for film_id, columns in changed.items()})
+        self.features = (sparse.diags(kept) @ features + replaced).tocsr()
+        self.features.eliminate_zeros()
+        return set(changed)
+
+    def weighted_features(self) -> sparse.csr_matrix:
+        """
+        Method weights the feature matrix by IDF, rare genres and persons say more about a film than common ones.
+        :return: L2-normalized matrix with a row per film.
+        """
+        document_frequency = np.bincount(self.features.indices, minlength=self.features.shape[1])
+        idf = np.log(self.features.shape[0] / np.maximum(document_frequency, 1)).astype(np.float32)
+        matrix = self.features.multiply(idf).tocsr()
+
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        matrix = sparse.diags(np.divide(1, norms, out=np.zeros_like(norms), where=norms > 0)) @ matrix
+        return matrix.astype(np.float32).tocsr()
+
+    def neighbours(self, matrix: sparse.csr_matrix, rows: list[int]) -> list[np.ndarray]:
+        """
+        Method finds top-K most similar films of the given rows, similarities are computed a batch of rows at a time.
+        :param matrix: Feature matrix of all films.
+        :param rows: Rows of films to find neighbours of.
+        :return: Rows of similar films per given row, most similar first.
+        """
+        transposed = matrix.T.tocsc()
+        result = []
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            scores = (matrix[batch] @ transposed).tocsr()
+            for offset, row in enumerate(batch):
+                begin, end = scores.indptr[offset], scores.indptr[offset + 1]
+                columns = scores.indices[begin:end]
+                values = scores.data[begin:end]
+
+                keep = (columns != row) & (values > 0)
+                columns, values = columns[keep], values[keep]
+                if len(values) > self.top_k:
+                    top = np.argpartition(-values, self.top_k)[:self.top_k]
+                    columns, values = columns[top], values[top]
+
+                # Most similar first, ties in the order of films in the index.
+                result.append(columns[np.lexsort((columns, -values))])
+        return result
+
+    @backoff(limit_of_retries=10)
+    def films_listing(self, film_ids: list[str]) -> set[str]:
+        """
+        Method finds films that have any of the given films among similar ones.
+        :param film_ids: Ids of films.
+        :return: Ids of films.
+        """
+        listing = set()
+        for start in range(0, len(film_ids), TERMS_CHUNK):
+            query = {"query": {"terms": {"similar_ids": film_ids[start:start + TERMS_CHUNK]}}, "_source": False}
+            listing.update(hit["_id"] for hit in scan(self.client, index=self.index_name, query=query))
+        return listing
+
+    @backoff(limit_of_retries=10)
+    def save(self, similar: dict[str, list[str]]) -> None:
+        """
+        Method writes similar films with partial updates, other fields of the films stay as they are.
+        :param similar: Ids of similar films by film id.
+        :return: None
+        """
+        actions = ({"_op_type": "update", "_index": self.index_name, "_id": film_id,
+                    "doc": {"similar_ids": similar_ids}}
+                   for film_id, similar_ids in similar.items())
+        bulk(self.client, actions)
+
+    def update(self, changed_film_ids: set[str]) -> None:
+        """
+        Method recomputes similar films of the films with changed genres or persons and of films that list them
+        as similar. Films that would newly list a changed film get it on their own next change.
+        :param changed_film_ids: Ids of films loaded by the ETL.
+        :return: None
+        """
+        started = time.perf_counter()
+        if self.features is None:
+            self.load_features()
+            changed = set(changed_film_ids) & self.position.keys()
+        else:
+            changed = self.update_features(set(changed_film_ids))
+        if not changed:
+            logging.info("Genres and persons of the loaded films did not change, similar films were not updated.")
+            return
+
+        to_update = set(changed)
+        if len(to_update) < len(self.film_ids):
+            to_update |= self.films_listing(sorted(changed)) & self.position.keys()
+
+        rows = sorted(self.position[film_id] for film_id in to_update)
+        similar = {
+            self.film_ids[row]: [self.film_ids[neighbour] for neighbour in neighbours]
+            for row, neighbours in zip(rows, self.neighbours(self.weighted_features(), rows))
+        }
+        self.save(similar)
+        logging.info(f"Similar films of {len(similar)} films were updated in {time.perf_counter() - started:.1f}s.")
@@ -3,17 +3,24 @@ import logging
 from etl.backoff import backoff
 from .redis_state_storage import State
 
+# State of a table that has not been loaded yet.
+INITIAL_STATE = "1800-01-01"
+# Id of the last loaded row sorts before any other id with the same modified datetime.
+INITIAL_ID = "00000000-0000-0000-0000-000000000000"
+
+TABLES = ("film_work", "genre", "person")
+
 
 class StateETL:
     def __init__(self, state: State):
         self.state = state
 
     @backoff(limit_of_retries=10)
-    def get_last_state(self, table_name: str) -> str:
+    def get_last_state(self, table_name: str) -> tuple[str, str]:
         """
-        Method gets last modified time.
+        Method gets last modified time and id of the last loaded entry.
         :param table_name: The name of DB table.
-        :return: Last modified time in string format.
+        :return: Last modified time in string format and id of the entry.
         """
         # Get last modified datetime.
         state_modified = self.state.get_state(f"{table_name}")
@@ -22,22 +29,26 @@ class StateETL:
         if state_modified:
             logging.info("State received successfully. The ETL process continues.")
         else:
-            state_modified = "1800-01-01"
+            state_modified = INITIAL_STATE
             self.state.set_state(f"{table_name}", state_modified)
             logging.info(f"There is no state for {table_name} ETL process. State was successfully created. The ETL "
                          f"process begins.")
 
-        return state_modified
+        # States saved before ids were kept continue from the first entry with the same modified time.
+        state_id = self.state.get_state(f"{table_name}:id") or INITIAL_ID
+
+        return state_modified, state_id
 
     @backoff(limit_of_retries=10)
-    def set_last_state(self, table_name: str, last_modified: str) -> None:
+    def set_last_state(self, table_name: str, last_state: tuple[str, str]) -> None:
         """
-        Method sets last modified time of entry in the batch data from DB.
+        Method sets last modified time and id of the last entry in the batch data from DB.
         :param table_name: The name of DB table.
-        :param last_modified: Last modified time of entry in the batch data from DB.
+        :param last_state: Last modified time and id of the last entry in the batch data from DB.
         :return: None
         """
-        self.state.set_state(f"{table_name}", last_modified)
+        last_modified, last_id = last_state
+        self.state.set_states({f"{table_name}": last_modified, f"{table_name}:id": last_id})
 
     @backoff(limit_of_retries=10)
     def reset_state(self) -> None:
@@ -45,6 +56,5 @@ class StateETL:
         Method resets all states.
         :return: None
         """
-        self.state.set_state('film_work', "1800-01-01")
-        self.state.set_state('genre', "1800-01-01")
-        self.state.set_state('person', "1800-01-01")
+        for table_name in TABLES:
+            self.state.set_states({f"{table_name}": INITIAL_STATE, f"{table_name}:id": INITIAL_ID})
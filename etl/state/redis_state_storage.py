@@ -30,6 +30,21 @@ class RedisStorage(BaseStorage):
         return self.redis_adapter.hgetall('data')
 
 
+class MemoryStorage(BaseStorage):
+    """Storage living as long as the process, for one-off loads"""
+
+    def __init__(self) -> None:
+        self.state = {}
+
+    def save_state(self, state: Dict[str, Any]) -> None:
+        """Save state to storage"""
+        self.state.update(state)
+
+    def retrieve_state(self) -> Dict[str, Any]:
+        """Retrieve state from storage"""
+        return dict(self.state)
+
+
 class State:
     """Class for working with state"""
 
@@ -40,6 +55,10 @@ class State:
         """Set state for key"""
         self.storage.save_state({key: value})
 
+    def set_states(self, states: Dict[str, Any]) -> None:
+        """Set state for several keys at once"""
+        self.storage.save_state(states)
+
     def get_state(self, key: str) -> Any:
         """Get state by key"""
         state = self.storage.retrieve_state()
@@ -0,0 +1,90 @@
+import logging
+import signal
+import threading
+import time
+from typing import Callable, Iterable
+
+
+class Worker(threading.Thread):
+    """
+    Thread running a job on its own schedule: the next run starts `every_seconds` after the previous one ended,
+    or as soon as the worker is woken up.
+    A failed run is logged and the job runs again on schedule, other workers are not affected.
+    """
+
+    def __init__(self, name: str, job: Callable[[], None], every_seconds: float, stopped: threading.Event,
+                 once: bool = False):
+        super().__init__(name=name, daemon=True)
+        self.job = job
+        self.every_seconds = every_seconds
+        self.stopped = stopped
+        self.once = once
+        self.failed = False
+        self.wakeup = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            # Wake ups during the run start the next one right after it.
+            self.wakeup.clear()
+            started = time.perf_counter()
+            try:
+                self.job()
+                self.failed = False
+            except Exception:
+                self.failed = True
+                logging.exception(f"ETL of '{self.name}' failed, it runs again in {self.every_seconds}s.")
+            else:
+                logging.info(f"ETL of '{self.name}' finished in {time.perf_counter() - started:.1f}s.")
+            if self.once:
+                return
+            self.wakeup.wait(self.every_seconds)
+
+
+class Supervisor:
+    """Runs a worker per ETL until all of them are done or the process is asked to stop."""
+
+    def __init__(self, jobs: dict[str, tuple[Callable[[], None], float]], once: bool = False):
+        """
+        :param jobs: Job and interval between its runs in seconds by the name of the ETL.
+        :param once: Run every job once and return.
+        """
+        self.stopped = threading.Event()
+        self.workers = [Worker(name, job, every_seconds, self.stopped, once)
+                        for name, (job, every_seconds) in jobs.items()]
+
+    def stop(self, *_) -> None:
+        """
+        Method asks workers to stop after their current run.
+        :return: None
+        """
+        logging.info("Stopping ETL workers.")
+        self.stopped.set()
+        for worker in self.workers:
+            worker.wakeup.set()
+
+    def wake(self, names: Iterable[str]) -> None:
+        """
+        Method runs jobs with the given names without waiting for their schedule.
+        :param names: Names of the jobs.
+        :return: None
+        """
+        names = set(names)
+        for worker in self.workers:
+            if worker.name in names:
+                worker.wakeup.set()
+
+    def run(self) -> bool:
+        """
+        Method starts the workers and waits for them.
+        :return: True if the last run of every worker succeeded.
+        """
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for worker in self.workers:
+            worker.start()
+        for worker in self.workers:
+            # Join with timeout, so that signals are handled while waiting.
+            while worker.is_alive():
+                worker.join(timeout=1)
+        return not any(worker.failed for worker in self.workers)
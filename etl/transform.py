@@ -20,7 +20,11 @@ def transform_data_from_db_for_loading_to_es(index_name, data_from_db):
                                  genres=entry["genres"],
                                  actors=entry["actors"],
                                  directors=entry["directors"],
-                                 writers=entry["writers"]
+                                 writers=entry["writers"],
+                                 genre_ids=[genre["id"] for genre in entry["genres"] or []],
+                                 actor_ids=[person["id"] for person in entry["actors"] or []],
+                                 director_ids=[person["id"] for person in entry["directors"] or []],
+                                 writer_ids=[person["id"] for person in entry["writers"] or []]
                              ).dict()
                              }
                             for entry in data_from_db]
@@ -1,53 +1,56 @@
 from http import HTTPStatus
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
-from fastapi_cache.decorator import cache
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, Response
+from fastapi.responses import ORJSONResponse
 from starlette import status
 
-from core.pagination import PaginationParams
-from models.film import FilmDetail, FilmListOutput
-from models.genre import GenreUUID
-from models.person import PersonUUID
+from core.cache import cache, cache_many
+from core.config import config
+from core.pagination import CursorPaginationParams, PaginationParams
+from models.film import FilmDetail, FilmListOutput, film_detail
 from services.film import FilmService, get_film_service
 
 router = APIRouter()
 
 
+# Declared before `/{film_id}`, otherwise "batch" would be taken for a film id.
+@router.get(
+    '/batch',
+    response_model=List[FilmDetail],
+    summary="Retrieve detailed information about several films at once")
+async def film_details_batch(
+        request: Request,
+        ids: List[str] = Query(..., max_items=100, description="IDs of the films, films not found are skipped"),
+        film_service: FilmService = Depends(get_film_service)
+) -> Response:
+    async def load(film_ids: List[str]) -> dict:
+        films = await film_service.get_films_from_elastic(film_ids)
+        return {film["id"]: orjson.dumps(film_detail(film)) for film in films}
+
+    # Films share the cache entries of `film_details`.
+    ids = list(dict.fromkeys(ids))
+    bodies = await cache_many(request, film_details, "film_id", ids, [film_service], load)
+    if not bodies:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='films not found')
+    return Response(content=b"[" + b",".join(bodies[film_id] for film_id in ids if film_id in bodies) + b"]",
+                    media_type="application/json")
+
+
 @router.get(
     '/{film_id}',
     response_model=FilmDetail,
     summary="Retrieve detailed information about a film")
-@cache(expire=60)
+@cache(expire=config.cache_expire, local=True)
 async def film_details(
         film_id: str = Path(..., description="The ID of the film"),
         film_service: FilmService = Depends(get_film_service)
-) -> FilmDetail:
+) -> ORJSONResponse:
     film = await film_service.get_film_from_elastic(film_id)
     if not film:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='film not found')
-    return FilmDetail(
-        uuid=film.get('id'),
-        title=film.get('title'),
-        imdb_rating=film.get('imdb_rating'),
-        description=film.get('description'),
-        genres=[
-            GenreUUID(uuid=genre.get('id'),
-                      name=genre.get('name')) for genre in film.get('genres')
-        ],
-        actors=[
-            PersonUUID(uuid=actor.get('id'),
-                       full_name=actor.get('name')) for actor in film.get('actors')
-        ],
-        writers=[
-            PersonUUID(uuid=writer.get('id'),
-                       full_name=writer.get('name')) for writer in film.get('writers')
-        ],
-        directors=[
-            PersonUUID(uuid=director.get('id'),
-                       full_name=director.get('name')) for director in film.get('directors')
-        ]
-    )
+    return ORJSONResponse(film_detail(film))
 
 
 @router.get(
@@ -61,19 +64,22 @@ async def list_films_imbd_sorted(
         sort: str = Query("-", description="Sort order ('+' for ascending, '-' for descending)"),
         genre: Optional[str] = Query(None, description="Filter by genre ID"),
         film_service: FilmService = Depends(get_film_service),
-        pagination: PaginationParams = Depends(PaginationParams),
-) -> List[FilmListOutput]:
+        pagination: CursorPaginationParams = Depends(CursorPaginationParams),
+) -> ORJSONResponse:
     films = await film_service.get_films_list_filtered_searched_sorted(
         query=query,
         sort=sort,
         page_size=pagination.page_size,
         page_number=pagination.page,
-        genre_id=genre)
+        genre_id=genre,
+        cursor=pagination.cursor)
 
     if not films:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No films found")
 
-    return [FilmListOutput(uuid=film.uuid, title=film.title, imdb_rating=film.imdb_rating) for film in films]
+    response = ORJSONResponse(films)
+    pagination.set_next_cursor(response)
+    return response
 
 
 @router.get(
@@ -85,7 +91,7 @@ async def list_films_imbd_sorted(
         film_id: str = Path(..., description="The ID of the film for which to find similar films"),
         pagination: PaginationParams = Depends(PaginationParams),
         film_service: FilmService = Depends(get_film_service)
-) -> List[FilmListOutput]:
+) -> ORJSONResponse:
     films = await film_service.get_similar_films(
         film_id=film_id,
         page_size=pagination.page_size,
@@ -95,4 +101,4 @@ async def list_films_imbd_sorted(
     if not films:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No films found")
 
-    return [FilmListOutput(uuid=film.uuid, title=film.title, imdb_rating=film.imdb_rating) for film in films]
+    return ORJSONResponse(films)
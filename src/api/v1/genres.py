@@ -1,9 +1,12 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
-from fastapi_cache.decorator import cache
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
+from fastapi.responses import ORJSONResponse
+from starlette import status
 
-from core.pagination import PaginationParams
+from core.cache import cache
+from core.config import config
+from core.pagination import CursorPaginationParams, PaginationParams
 from models.film import FilmListOutput
 from models.genre import Genre
 from services.genres import GenreService, genre_service
@@ -17,14 +20,16 @@ router = APIRouter()
     response_model_by_alias=False,
     summary="Список жанров",
 )
-@cache(expire=60)
+@cache(expire=60, local=True)
 async def genres(
         genre_service: GenreService = Depends(genre_service),
-        pagination: PaginationParams = Depends(PaginationParams),
+        pagination: CursorPaginationParams = Depends(CursorPaginationParams),
+        response: Response = None,
 ) -> list[Genre]:
     genres_list = await genre_service.genre_list(
-        pagination.page, pagination.page_size
+        pagination.page, pagination.page_size, cursor=pagination.cursor
     )
+    pagination.set_next_cursor(response)
     return genres_list
 
 
@@ -34,7 +39,7 @@ async def genres(
     response_model_by_alias=False,
     summary="Деталка жанра",
 )
-@cache(expire=60)
+@cache(expire=config.cache_expire, local=True)
 async def genres(
         genre_id: str,
         genre_service: GenreService = Depends(genre_service),
@@ -50,12 +55,12 @@ async def genres(
     response_model=List[FilmListOutput],
     summary="Get popular films by genre"
 )
-@cache(expire=60)
+@cache(expire=config.cache_expire, local=True)
 async def genres(
         genre_id: str = Path(..., description="The ID of the genre for which to find films"),
         pagination: PaginationParams = Depends(PaginationParams),
         genre_service: GenreService = Depends(genre_service)
-) -> List[FilmListOutput]:
+) -> ORJSONResponse:
     films = await genre_service.get_popular_films(
         genre_id=genre_id,
         page_number=pagination.page,
@@ -65,4 +70,4 @@ async def genres(
     if not films:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No films found for this genre")
 
-    return [FilmListOutput(uuid=film.uuid, title=film.title, imdb_rating=film.imdb_rating) for film in films]
+    return ORJSONResponse(films)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from fastapi_cache import FastAPICache
+
+from db.elastic import get_pool_stats
+
+router = APIRouter()
+
+
+@router.get(
+    '/elastic',
+    summary="Connection pool usage of the Elasticsearch client in this worker")
+async def elastic_pool() -> dict:
+    return get_pool_stats()
+
+
+@router.get(
+    '/cache',
+    summary="Hit, miss and eviction counters of the in-process and Redis cache tiers")
+async def cache_stats() -> dict:
+    return await FastAPICache.get_backend().stats()
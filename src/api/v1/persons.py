@@ -1,10 +1,12 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
-from fastapi_cache.decorator import cache
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Response
+from fastapi.responses import ORJSONResponse
 from starlette import status
 
-from core.pagination import PaginationParams
+from core.cache import cache
+from core.config import config
+from core.pagination import CursorPaginationParams, PaginationParams
 from models.film import FilmListOutput
 from models.person import PersonUUID, PersonWithFilms
 from services.persons import PersonService, person_service
@@ -42,17 +44,21 @@ async def person_search(
 )
 @cache(expire=60)
 async def person(
-        pagination: PaginationParams = Depends(PaginationParams),
-        person_service: PersonService = Depends(person_service)
+        pagination: CursorPaginationParams = Depends(CursorPaginationParams),
+        person_service: PersonService = Depends(person_service),
+        response: Response = None,
 ) -> list[PersonUUID]:
     person_list = await person_service.person_list(
         page_size=pagination.page_size,
-        page_number=pagination.page
+        page_number=pagination.page,
+        cursor=pagination.cursor
     )
 
     if not person_list:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"There is no persons.")
 
+    pagination.set_next_cursor(response)
+
     return person_list
 
 
@@ -61,7 +67,7 @@ async def person(
     response_model=PersonWithFilms,
     summary="Person detail with films and roles in those films.",
 )
-@cache(expire=60)
+@cache(expire=config.cache_expire)
 async def persons(
         person_id: str = Path(..., description="The ID of person to find films with this person."),
         pagination: PaginationParams = Depends(PaginationParams),
@@ -84,12 +90,12 @@ async def persons(
     response_model=List[FilmListOutput],
     summary="Films with person.",
 )
-@cache(expire=60)
+@cache(expire=config.cache_expire)
 async def films_with_person(
         person_id: str,
         pagination: PaginationParams = Depends(PaginationParams),
         person_service: PersonService = Depends(person_service),
-) -> list[FilmListOutput] | None:
+) -> ORJSONResponse:
     films = await person_service.person_films(
         person_id=person_id,
         page_number=pagination.page,
@@ -98,7 +104,7 @@ async def films_with_person(
     if not films:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No films found with this person")
 
-    return films
+    return ORJSONResponse(films)
 
 
 
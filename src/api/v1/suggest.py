@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+
+from core.cache import cache
+from models.suggest import Suggestions
+from services.suggest import SuggestService, suggest_service
+
+router = APIRouter()
+
+
+@router.get(
+    "/",
+    response_model=Suggestions,
+    summary="Подсказки поиска фильмов и персон по началу названия или имени",
+)
+@cache(expire=300, local=True)
+async def suggest(
+        query: str = Query(..., min_length=1, max_length=50, description="Начало названия фильма или имени персоны"),
+        size: int = Query(5, ge=1, le=20, description="Количество подсказок каждого вида"),
+        suggest_service: SuggestService = Depends(suggest_service),
+) -> ORJSONResponse:
+    return ORJSONResponse(await suggest_service.suggest(prefix=query, size=size))
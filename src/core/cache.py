@@ -0,0 +1,532 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from functools import wraps
+from inspect import Parameter
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from fastapi.dependencies.utils import get_typed_return_annotation, get_typed_signature
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.decorator import _augment_signature, _locate_param, _uncacheable
+from fastapi_cache.types import Backend
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.status import HTTP_304_NOT_MODIFIED
+
+from core.config import config
+from core.pagination import PaginationParams
+
+logger = logging.getLogger(__name__)
+
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+# Namespace of keys that are also kept in the in-process cache of the worker.
+LOCAL_NAMESPACE = "local"
+
+# Namespace of Redis sets of cached keys per path param, the ETL evicts entries of changed documents by them.
+KEY_SETS_NAMESPACE = "keys"
+
+
+def _is_plain(value: Any) -> bool:
+    """Значение можно положить в ключ как есть: скаляр или список скаляров."""
+    if isinstance(value, (list, tuple)):
+        return all(isinstance(item, SCALAR_TYPES) for item in value)
+    return isinstance(value, SCALAR_TYPES)
+
+
+def _index_names(values) -> list[str]:
+    """Имена индексов, с которыми работают внедрённые сервисы (атрибуты `index*` их классов)."""
+    indices = set()
+    for value in values:
+        for name, attr in vars(type(value)).items():
+            if name.startswith("index") and isinstance(attr, str):
+                indices.add(attr)
+    return sorted(indices)
+
+
+def build_key(namespace: str, indices: list[str], route_path: str, path_params: dict, query_params: dict) -> str:
+    """
+    Собирает ключ кеша вида `<namespace>:<indices>:<route>:<path params>:<hash of query params>`.
+    Path-параметры остаются читаемыми, чтобы ключи сущности можно было найти и удалить.
+    """
+    path_part = "&".join(f"{name}={value}" for name, value in sorted(path_params.items()))
+    query_hash = hashlib.md5(json.dumps(query_params, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{namespace.rstrip(':')}:{','.join(indices)}:{route_path}:{path_part}:{query_hash}"
+
+
+def _key_path_params(key: str) -> list[str]:
+    """Path params (`name=value`) of a key made by `build_key`."""
+    parts = key.rsplit(":", 2)
+    return parts[1].split("&") if len(parts) == 3 and parts[1] else []
+
+
+def key_builder(
+        func: Callable[..., Any],
+        namespace: str = "",
+        *,
+        request: Optional[Request] = None,
+        response: Optional[Response] = None,
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+) -> str:
+    """
+    Построитель ключей для `fastapi_cache`.
+    Ключ зависит только от маршрута, path-параметров и query-параметров (со значениями по умолчанию),
+    внедрённые сервисы в ключ не попадают, кроме имён их индексов.
+    """
+    route = request.scope.get("route") if request else None
+    route_path = route.path if route else f"{func.__module__}.{func.__name__}"
+    path_params = dict(request.path_params) if request else {}
+
+    query_params = {}
+    dependencies = []
+    for name, value in kwargs.items():
+        if name in path_params:
+            continue
+        if isinstance(value, PaginationParams):
+            query_params.update(page=value.page, page_size=value.page_size)
+        elif _is_plain(value):
+            query_params[name] = value
+        else:
+            dependencies.append(value)
+
+    return build_key(namespace, _index_names(dependencies), route_path, path_params, query_params)
+
+
+class LocalCache:
+    """In-process LRU cache with TTL, bounded by number of entries and total size in bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, Tuple[Optional[float], bytes]] = OrderedDict()
+
+    def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        """
+        Get value and its remaining TTL in seconds (-1 if the value never expires).
+        :return: (0, None) if there is no fresh value.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return 0, None
+
+        expires_at, value = entry
+        now = time.monotonic()
+        if expires_at is not None and expires_at <= now:
+            self._remove(key)
+            self.misses += 1
+            return 0, None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return (int(expires_at - now) if expires_at is not None else -1), value
+
+    def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        expires_at = time.monotonic() + expire if expire else None
+        self._entries[key] = (expires_at, value)
+        self.size_bytes += size
+
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def delete(self, key: str) -> int:
+        if key not in self._entries:
+            return 0
+        self._remove(key)
+        return 1
+
+    def clear(self, prefix: str = "") -> int:
+        return self.delete_matching(lambda key: key.startswith(prefix))
+
+    def delete_matching(self, predicate: Callable[[str], bool]) -> int:
+        keys = [key for key in self._entries if predicate(key)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self.size_bytes -= len(key) + len(value)
+
+
+class TwoTierBackend(Backend):
+    """
+    Cache backend with the in-process `LocalCache` (L1) in front of Redis (L2).
+    Only keys of the `LOCAL_NAMESPACE` namespace go to L1, TTL in L1 never outlives the one in Redis.
+    Keys with path params are added to Redis sets per param, `key_set_expire` is at least the longest TTL of entries.
+    """
+
+    def __init__(self, redis_backend: RedisBackend, local_cache: LocalCache, prefix: str, key_set_expire: int):
+        self.redis_backend = redis_backend
+        self.local_cache = local_cache
+        self.prefix = prefix
+        self.key_set_expire = key_set_expire
+        self.local_prefix = f"{prefix}:{LOCAL_NAMESPACE}:"
+        self.redis_hits = 0
+        self.redis_misses = 0
+
+    def _is_local(self, key: str) -> bool:
+        return key.startswith(self.local_prefix)
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        if self._is_local(key):
+            ttl, value = self.local_cache.get_with_ttl(key)
+            if value is not None:
+                return ttl, value
+
+        ttl, value = await self.redis_backend.get_with_ttl(key)
+        if value is None:
+            self.redis_misses += 1
+            return ttl, value
+
+        self.redis_hits += 1
+        # Redis returns -1 for keys without expiry.
+        if self._is_local(key) and ttl != 0:
+            self.local_cache.set(key, value, ttl if ttl > 0 else None)
+        return ttl, value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        _, value = await self.get_with_ttl(key)
+        return value
+
+    async def get_many_with_ttl(self, keys: list[str]) -> Dict[str, Tuple[int, bytes]]:
+        """Values and TTLs of several keys, Redis is queried with one round trip. Missing keys are left out."""
+        found = {}
+        remote_keys = []
+        for key in keys:
+            if self._is_local(key):
+                ttl, value = self.local_cache.get_with_ttl(key)
+                if value is not None:
+                    found[key] = ttl, value
+                    continue
+            remote_keys.append(key)
+        if not remote_keys:
+            return found
+
+        async with self.redis_backend.redis.pipeline(transaction=False) as pipe:
+            for key in remote_keys:
+                pipe.ttl(key).get(key)
+            replies = await pipe.execute()
+
+        for key, ttl, value in zip(remote_keys, replies[::2], replies[1::2]):
+            if value is None:
+                self.redis_misses += 1
+                continue
+            self.redis_hits += 1
+            if self._is_local(key) and ttl != 0:
+                self.local_cache.set(key, value, ttl if ttl > 0 else None)
+            found[key] = ttl, value
+        return found
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        await self.set_many({key: value}, expire)
+
+    async def set_many(self, values: Dict[str, bytes], expire: Optional[int] = None) -> None:
+        async with self.redis_backend.redis.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, value, ex=expire)
+                for key_set in self._key_sets(key):
+                    pipe.sadd(key_set, key)
+                    # Sets outlive their keys, so that every cached key of an entity can be evicted.
+                    if expire:
+                        pipe.expire(key_set, max(expire, self.key_set_expire))
+                    else:
+                        pipe.persist(key_set)
+            await pipe.execute()
+        for key, value in values.items():
+            if self._is_local(key):
+                self.local_cache.set(key, value, expire)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        if namespace:
+            self.local_cache.clear(f"{namespace}:")
+        elif key:
+            self.local_cache.delete(key)
+        return await self.redis_backend.clear(namespace, key)
+
+    def _key_sets(self, key: str) -> list[str]:
+        """Redis sets the key is added to, one per path param of the key (`<prefix>:keys:film_id=<id>`)."""
+        return [f"{self.prefix}:{KEY_SETS_NAMESPACE}:{param}" for param in _key_path_params(key)]
+
+    def evict(self, path_params: Set[str]) -> int:
+        """
+        Delete entries of endpoints called with any of the given path params (`film_id=<id>`) from L1.
+        Redis entries are deleted once by the ETL, by the key sets of the params, before it notifies the workers.
+        """
+        return self.local_cache.delete_matching(lambda key: not path_params.isdisjoint(_key_path_params(key)))
+
+    def evict_all(self) -> int:
+        """Delete all entries from L1, e.g. after an index was rebuilt. The ETL deletes Redis entries itself."""
+        return self.local_cache.clear()
+
+    async def stats(self) -> dict:
+        """Hit, miss and eviction counters of both tiers. Redis counters of evictions are server-wide."""
+        redis_info = await self.redis_backend.redis.info("stats")
+        return {
+            "local": self.local_cache.stats(),
+            "redis": {
+                "hits": self.redis_hits,
+                "misses": self.redis_misses,
+                "evictions": redis_info.get("evicted_keys", 0),
+                "expirations": redis_info.get("expired_keys", 0),
+            },
+        }
+
+
+# Backend calls in progress per cache key and background refreshes of stale entries of this worker.
+_in_flight: Dict[str, asyncio.Future] = {}
+_background_tasks: Set[asyncio.Task] = set()
+
+
+async def _single_flight(key: str, call: Callable[[], Awaitable[Any]], store: Callable[[Any], Awaitable[None]]) -> Any:
+    """
+    Run `call` once per key within the worker: concurrent callers with the same key await the same result.
+    The result is stored in the cache before waiting callers are released.
+    """
+    while (future := _in_flight.get(key)) is not None:
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The leading request was cancelled (client went away), not us: the first waiter to get here
+            # leads the next call, the others wait for it.
+            if not future.cancelled():
+                raise
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        result = await call()
+        await store(result)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark the exception as retrieved in case nobody else is waiting for it.
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        if _in_flight.get(key) is future:
+            del _in_flight[key]
+
+
+async def _refresh(key: str, call: Callable[[], Awaitable[Any]], store: Callable[[Any], Awaitable[None]]) -> None:
+    """Background refresh of a stale entry."""
+    try:
+        await _single_flight(key, call, store)
+    except Exception:
+        logger.warning(f"Error refreshing cache key '{key}':", exc_info=True)
+
+
+def _raw_response(body: bytes, response: Optional[Response]) -> Response:
+    """Response with the JSON body as is, headers set on the injected response are carried over."""
+    headers = None
+    if response:
+        headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cache(expire: Optional[int] = None, local: bool = False, stale_ttl: Optional[int] = None):
+    """
+    Cache responses of the endpoint.
+    Concurrent misses of one key share a single call of the endpoint within the worker.
+    During `stale_ttl` seconds after expiry the old value is served while one background task refreshes it.
+    Endpoints annotated to return a `Response` are cached as their body bytes and served from the cache as is,
+    without decoding and validation.
+    :param expire: TTL of the entry in seconds.
+    :param local: Keep the entry in the worker memory as well (for the hottest endpoints).
+    :param stale_ttl: Stale-while-revalidate window in seconds, `CACHE_STALE_TTL` by default.
+    """
+    namespace = LOCAL_NAMESPACE if local else ""
+    injected_request = Parameter(name="__fastapi_cache_request", annotation=Request, kind=Parameter.KEYWORD_ONLY)
+    injected_response = Parameter(name="__fastapi_cache_response", annotation=Response, kind=Parameter.KEYWORD_ONLY)
+
+    def wrapper(func):
+        wrapped_signature = get_typed_signature(func)
+        to_inject = []
+        request_param = _locate_param(wrapped_signature, injected_request, to_inject)
+        response_param = _locate_param(wrapped_signature, injected_response, to_inject)
+        return_type = get_typed_return_annotation(func)
+        raw = isinstance(return_type, type) and issubclass(return_type, Response)
+
+        @wraps(func)
+        async def inner(*args, **kwargs):
+            copy_kwargs = kwargs.copy()
+            request: Optional[Request] = copy_kwargs.pop(request_param.name, None)
+            response: Optional[Response] = copy_kwargs.pop(response_param.name, None)
+            func_kwargs = {name: value for name, value in kwargs.items()
+                           if name not in (injected_request.name, injected_response.name)}
+
+            async def call():
+                return await func(*args, **func_kwargs)
+
+            async def load():
+                result = await call()
+                # Waiting requests share the body, each of them gets its own response object.
+                return result.body if raw else result
+
+            # Cursor pages hand the next cursor over in a header and are one-off anyway.
+            if _uncacheable(request) or (request is not None and "cursor" in request.query_params):
+                return await call()
+
+            fresh_ttl = expire or FastAPICache.get_expire()
+            stale = config.cache_stale_ttl if stale_ttl is None else stale_ttl
+            coder = FastAPICache.get_coder()
+            backend = FastAPICache.get_backend()
+            cache_status_header = FastAPICache.get_cache_status_header()
+            cache_key = FastAPICache.get_key_builder()(func, f"{FastAPICache.get_prefix()}:{namespace}",
+                                                       request=request, response=response,
+                                                       args=args, kwargs=copy_kwargs)
+
+            async def store(result):
+                try:
+                    # The entry outlives its freshness by the stale window.
+                    await backend.set(cache_key, result if raw else coder.encode(result),
+                                      fresh_ttl + stale if fresh_ttl else None)
+                except Exception:
+                    logger.warning(f"Error setting cache key '{cache_key}' in backend:", exc_info=True)
+
+            try:
+                ttl, cached = await backend.get_with_ttl(cache_key)
+            except Exception:
+                logger.warning(f"Error retrieving cache key '{cache_key}' from backend:", exc_info=True)
+                ttl, cached = 0, None
+
+            if cached is None or (request is not None and request.headers.get("Cache-Control") == "no-cache"):
+                result = await _single_flight(cache_key, load, store)
+                if response:
+                    response.headers.update({
+                        "Cache-Control": f"max-age={fresh_ttl}",
+                        cache_status_header: "MISS",
+                    })
+                return _raw_response(result, response) if raw else result
+
+            # Redis reports -1 for entries without expiry, those are always fresh.
+            is_stale = bool(fresh_ttl) and 0 <= ttl <= stale
+            if is_stale and cache_key not in _in_flight:
+                task = asyncio.create_task(_refresh(cache_key, load, store))
+                _background_tasks.add(task)
+                task.add_done_callback(_background_tasks.discard)
+
+            if response:
+                etag = f"W/{hash(cached)}"
+                response.headers.update({
+                    "Cache-Control": f"max-age={max(ttl - stale, 0) if ttl > 0 else fresh_ttl}",
+                    "ETag": etag,
+                    cache_status_header: "STALE" if is_stale else "HIT",
+                })
+                if request and request.headers.get("if-none-match") == etag:
+                    response.status_code = HTTP_304_NOT_MODIFIED
+                    return response
+
+            if raw:
+                return _raw_response(cached, response)
+            return coder.decode_as_type(cached, type_=return_type)
+
+        inner.__signature__ = _augment_signature(wrapped_signature, *to_inject)
+        # Settings of the entries are needed by `cache_many` to share them.
+        inner.cache_namespace = namespace
+        inner.cache_expire = expire
+        inner.cache_stale_ttl = stale_ttl
+        return inner
+
+    return wrapper
+
+
+async def _refresh_many(ids: list[str], load_and_store: Callable[[list[str]], Awaitable[Any]]) -> None:
+    """Background refresh of stale entries of `cache_many`."""
+    try:
+        await load_and_store(ids)
+    except Exception:
+        logger.warning(f"Error refreshing cache entries of {ids}:", exc_info=True)
+
+
+async def cache_many(
+        request: Request,
+        endpoint: Callable[..., Any],
+        path_param: str,
+        ids: list[str],
+        dependencies: list,
+        load: Callable[[list[str]], Awaitable[Dict[str, bytes]]],
+) -> Dict[str, bytes]:
+    """
+    Response bodies of a `cache`-decorated endpoint for several ids, sharing the cache entries of the endpoint.
+    Ids missing in the cache are loaded with one call of `load` and stored one entry per id,
+    stale ones are served and refreshed in the background.
+    :param endpoint: Endpoint returning a `Response` that takes the id as path param `path_param`.
+    :param dependencies: Services the endpoint gets injected, they contribute the names of their indices to the keys.
+    :param load: Loads the bodies of the given ids, ids that do not exist are left out.
+    :return: Bodies per id, ids that do not exist are left out.
+    """
+    route_path = next(route.path for route in request.app.routes if getattr(route, "endpoint", None) is endpoint)
+    fresh_ttl = endpoint.cache_expire or FastAPICache.get_expire()
+    stale = config.cache_stale_ttl if endpoint.cache_stale_ttl is None else endpoint.cache_stale_ttl
+    backend = FastAPICache.get_backend()
+    namespace = f"{FastAPICache.get_prefix()}:{endpoint.cache_namespace}"
+    indices = _index_names(dependencies)
+    keys = {item_id: build_key(namespace, indices, route_path, {path_param: item_id}, {}) for item_id in ids}
+
+    async def load_and_store(item_ids: list[str]) -> Dict[str, bytes]:
+        loaded = {item_id: body for item_id, body in (await load(item_ids)).items() if item_id in keys}
+        try:
+            await backend.set_many({keys[item_id]: body for item_id, body in loaded.items()},
+                                   fresh_ttl + stale if fresh_ttl else None)
+        except Exception:
+            logger.warning(f"Error setting cache entries of {list(loaded)} in backend:", exc_info=True)
+        return loaded
+
+    cached = {}
+    if not _uncacheable(request) and request.headers.get("Cache-Control") != "no-cache":
+        try:
+            cached = await backend.get_many_with_ttl(list(keys.values()))
+        except Exception:
+            logger.warning(f"Error retrieving cache entries of {ids} from backend:", exc_info=True)
+
+    bodies = {}
+    missing = []
+    stale_ids = []
+    for item_id, key in keys.items():
+        if key not in cached:
+            missing.append(item_id)
+            continue
+        ttl, bodies[item_id] = cached[key]
+        if fresh_ttl and 0 <= ttl <= stale:
+            stale_ids.append(item_id)
+
+    if missing:
+        bodies.update(await load_and_store(missing))
+    if stale_ids:
+        task = asyncio.create_task(_refresh_many(stale_ids, load_and_store))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    return bodies
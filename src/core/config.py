@@ -16,10 +16,24 @@ class Settings(BaseSettings):
     elastic_host: str = Field(env="ES_HOST", default="127.0.0.1")
     elastic_port: int = Field(env="ES_PORT", default=9200)
     elastic_schema = os.getenv("ES_SCHEMA", "http://")
+    # Пул соединений к Elasticsearch (на один воркер gunicorn)
+    elastic_connections_per_node: int = Field(env="ES_CONNECTIONS_PER_NODE", default=100)
+    elastic_keepalive_timeout: float = Field(env="ES_KEEPALIVE_TIMEOUT", default=15.0)
+    elastic_request_timeout: float = Field(env="ES_REQUEST_TIMEOUT", default=10.0)
 
     redis_host: str = Field(env="REDIS_HOST", default="127.0.0.1")
     redis_port: int = Field(env="REDIS_PORT", default=6379)
 
+    # Кеш ответов в памяти воркера перед Redis
+    cache_local_max_entries: int = Field(env="CACHE_LOCAL_MAX_ENTRIES", default=10000)
+    cache_local_max_bytes: int = Field(env="CACHE_LOCAL_MAX_BYTES", default=64 * 1024 * 1024)
+    # Сколько секунд после истечения TTL отдаётся устаревшее значение, пока оно обновляется в фоне
+    cache_stale_ttl: int = Field(env="CACHE_STALE_TTL", default=30)
+    # TTL ответов о фильмах, жанрах и персонах, которые сбрасываются по событиям ETL
+    cache_expire: int = Field(env="CACHE_EXPIRE", default=3600)
+    # Канал Redis, в который ETL публикует id изменённых документов
+    cache_invalidation_channel: str = Field(env="CACHE_INVALIDATION_CHANNEL", default="cache-invalidation")
+
     def es_url(self):
         return f'{self.elastic_schema}{self.elastic_host}:{self.elastic_port}'
 
@@ -0,0 +1,61 @@
+import asyncio
+import json
+import logging
+
+from redis.asyncio import Redis
+
+from core.cache import TwoTierBackend
+
+logger = logging.getLogger(__name__)
+
+# Path param the endpoints take the id of a document of the index as.
+INDEX_PATH_PARAMS = {
+    "movies": "film_id",
+    "genres": "genre_id",
+    "persons": "person_id",
+}
+
+# Key of a message of the ETL about rebuilt indices, every cached response can be stale then.
+REINDEXED = "reindexed"
+
+RESUBSCRIBE_DELAY = 1.0
+
+
+def path_params_of(message: dict) -> set[str]:
+    """
+    Path params of the cache entries affected by a message of the ETL.
+    :param message: Ids of changed documents per index, `{"movies": [...], "genres": [...], "persons": [...]}`.
+    """
+    return {
+        f"{INDEX_PATH_PARAMS[index]}={doc_id}"
+        for index, doc_ids in message.items() if index in INDEX_PATH_PARAMS
+        for doc_id in doc_ids
+    }
+
+
+async def listen_for_invalidation(redis: Redis, channel: str, backend: TwoTierBackend) -> None:
+    """
+    Evict entries of the documents the ETL reports as changed from the worker memory, until cancelled.
+    The ETL has deleted them from Redis before publishing.
+    Messages published while the subscription is down are lost, so the worker memory is dropped on resubscribe.
+    """
+    while True:
+        try:
+            async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                await pubsub.subscribe(channel)
+                async for message in pubsub.listen():
+                    try:
+                        data = json.loads(message["data"])
+                        if REINDEXED in data:
+                            evicted = backend.evict_all()
+                        else:
+                            evicted = backend.evict(path_params_of(data))
+                        logger.debug(f"Evicted {evicted} cache entries.")
+                    except (ValueError, TypeError, AttributeError):
+                        logger.warning(f"Malformed cache invalidation message: {message['data']!r}")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning(f"Subscription to '{channel}' failed, resubscribing:", exc_info=True)
+            backend.local_cache.clear()
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
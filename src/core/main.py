@@ -1,7 +1,7 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 import uvicorn
-from elasticsearch import AsyncElasticsearch
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import ORJSONResponse
@@ -9,8 +9,11 @@ from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from redis.asyncio import Redis
 
-from api.v1 import films, genres, persons
+from api.v1 import films, genres, health, persons, suggest
+from core.cache import LocalCache, TwoTierBackend, key_builder
 from core.config import config
+from core.invalidation import listen_for_invalidation
+from core.pagination import NEXT_CURSOR_HEADER
 from db import redis, elastic
 
 
@@ -19,12 +22,18 @@ async def lifespan(app: FastAPI):
     # Startup: initialize Redis and Elasticsearch
     redis.redis = Redis(host=config.redis_host, port=config.redis_port)
     await redis.redis.ping()  # Ensure Redis is ready
-    FastAPICache.init(RedisBackend(redis.redis), prefix="fastapi-cache")
-    elastic.es = AsyncElasticsearch(hosts=[config.es_url()])
+    local_cache = LocalCache(max_entries=config.cache_local_max_entries, max_bytes=config.cache_local_max_bytes)
+    cache_backend = TwoTierBackend(RedisBackend(redis.redis), local_cache, prefix="fastapi-cache",
+                                   key_set_expire=config.cache_expire + config.cache_stale_ttl)
+    FastAPICache.init(cache_backend, prefix="fastapi-cache", key_builder=key_builder)
+    invalidation = asyncio.create_task(
+        listen_for_invalidation(redis.redis, config.cache_invalidation_channel, cache_backend))
+    elastic.es = elastic.create_elastic()
 
     yield
 
-    # Shutdown: close Redis and Elasticsearch connections
+    # Shutdown: stop cache invalidation, close Redis and Elasticsearch connections
+    invalidation.cancel()
     await redis.redis.close()
     await elastic.es.close()
 
@@ -49,11 +58,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(films.router, prefix='/api/v1/films', tags=['films'])
 app.include_router(genres.router, prefix='/api/v1/genres', tags=['genres'])
 app.include_router(persons.router, prefix='/api/v1/persons', tags=['persons'])
+app.include_router(suggest.router, prefix='/api/v1/suggest', tags=['suggest'])
+app.include_router(health.router, prefix='/api/v1/health', tags=['health'])
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8080)
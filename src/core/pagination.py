@@ -1,4 +1,119 @@
+import base64
+import json
+from http import HTTPStatus
+from typing import Optional
+
+from elasticsearch import AsyncElasticsearch, BadRequestError, NotFoundError
+from fastapi import HTTPException, Query, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Cursor:
+    """Opaque cursor of search_after pagination, optionally bound to a point in time of the index."""
+
+    keep_alive = "1m"
+
+    def __init__(self, search_after: Optional[list] = None, pit_id: Optional[str] = None, use_pit: bool = False):
+        self.search_after = search_after
+        self.pit_id = pit_id
+        self.use_pit = use_pit or pit_id is not None
+        # Cursor of the page after the current one, None when the current page is the last one.
+        self.next: Optional[str] = None
+
+    @classmethod
+    def decode(cls, token: str, use_pit: bool = False) -> "Cursor":
+        """Empty token starts from the first page."""
+        if not token:
+            return cls(use_pit=use_pit)
+        try:
+            data = json.loads(base64.urlsafe_b64decode(token.encode()))
+            search_after, pit_id = data["search_after"], data.get("pit_id")
+            # Values of a tampered cursor would reach Elasticsearch and fail there.
+            if not isinstance(search_after, list) or not isinstance(pit_id, (str, type(None))) \
+                    or not all(isinstance(value, (str, int, float, type(None))) for value in search_after):
+                raise TypeError("Invalid cursor")
+            return cls(search_after=search_after, pit_id=pit_id, use_pit=use_pit)
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Invalid cursor")
+
+    @staticmethod
+    def encode(search_after: list, pit_id: Optional[str] = None) -> str:
+        data = {"search_after": search_after}
+        if pit_id:
+            data["pit_id"] = pit_id
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+    async def search(
+            self,
+            elastic: AsyncElasticsearch,
+            index: str,
+            query_body: dict,
+            filter_path: Optional[list[str]] = None
+    ) -> dict:
+        """
+        Run the query for the page of the cursor and remember the cursor of the next page.
+        The sort of the query gets `id` as a tiebreaker unless it has one, `from` is ignored.
+        """
+        # Values of the cursor come from the client, errors of Elasticsearch about them are errors of the client.
+        from_client = bool(self.search_after) or self.pit_id is not None
+        body = {key: value for key, value in query_body.items() if key != "from"}
+        body["sort"] = query_body.get("sort", [{"_score": {"order": "desc"}}])
+        if not any("id" in sort for sort in body["sort"]):
+            body["sort"] = body["sort"] + [{"id": {"order": "asc"}}]
+        if self.search_after:
+            body["search_after"] = self.search_after
+
+        search_kwargs = {"index": index}
+        if filter_path:
+            search_kwargs["filter_path"] = filter_path + ["hits.hits.sort", "pit_id"]
+        if self.use_pit:
+            if self.pit_id is None:
+                pit = await elastic.open_point_in_time(index=index, keep_alive=self.keep_alive)
+                self.pit_id = pit["id"]
+            # Search with a point in time must not name the index.
+            body["pit"] = {"id": self.pit_id, "keep_alive": self.keep_alive}
+            search_kwargs.pop("index")
+
+        try:
+            response = await elastic.search(body=body, **search_kwargs)
+        except (BadRequestError, NotFoundError):
+            # Sort values that do not fit the sort of the query, or a point in time that expired or never existed.
+            if from_client:
+                raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Invalid or expired cursor")
+            raise
+
+        hits = response.get("hits", {}).get("hits", [])
+        pit_id = response.get("pit_id", self.pit_id)
+        if hits and len(hits) == body["size"]:
+            self.next = self.encode(hits[-1]["sort"], pit_id)
+        elif pit_id:
+            await elastic.close_point_in_time(id=pit_id)
+
+        return response
+
+
 class PaginationParams:
     def __init__(self, page: int = 1, page_size: int = 10):
         self.page = page
         self.page_size = page_size
+
+
+class CursorPaginationParams(PaginationParams):
+    """Page number pagination for shallow pages and cursor pagination for deep ones."""
+
+    def __init__(
+            self,
+            page: int = 1,
+            page_size: int = 10,
+            cursor: Optional[str] = Query(
+                None, description="Cursor of the page for deep pagination, empty value starts from the first page"),
+            pit: bool = Query(False, description="Keep a consistent snapshot of the index while paging by cursor"),
+    ):
+        super().__init__(page, page_size)
+        self.cursor = Cursor.decode(cursor, pit) if cursor is not None else None
+
+    def set_next_cursor(self, response: Response) -> None:
+        """Pass the cursor of the next page to the client."""
+        if self.cursor and self.cursor.next:
+            response.headers[NEXT_CURSOR_HEADER] = self.cursor.next
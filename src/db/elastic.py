@@ -1,5 +1,6 @@
 from typing import Optional
 
+from elastic_transport import AiohttpHttpNode
 from elasticsearch import AsyncElasticsearch
 
 from core.config import config
@@ -7,7 +8,55 @@ from core.config import config
 
 es: Optional[AsyncElasticsearch] = None
 
+# Parts of a search response the services read, everything else is cut off by Elasticsearch.
+HITS_FILTER_PATH = ["hits.hits._source"]
+
+
+class KeepAliveAiohttpNode(AiohttpHttpNode):
+    """aiohttp-нода с настраиваемым временем жизни простаивающих соединений."""
+
+    def _create_aiohttp_session(self) -> None:
+        super()._create_aiohttp_session()
+        # TCPConnector не принимает keepalive_timeout через elastic_transport, выставляем после создания.
+        # Атрибут приватный, версия aiohttp закреплена, без него остаётся таймаут aiohttp по умолчанию.
+        if hasattr(self.session.connector, "_keepalive_timeout"):
+            self.session.connector._keepalive_timeout = config.elastic_keepalive_timeout
+
+
+def create_elastic() -> AsyncElasticsearch:
+    """Создаёт клиент Elasticsearch, общий для всех запросов воркера."""
+    return AsyncElasticsearch(
+        hosts=[config.es_url()],
+        node_class=KeepAliveAiohttpNode,
+        connections_per_node=config.elastic_connections_per_node,
+        request_timeout=config.elastic_request_timeout,
+    )
+
+
+def get_pool_stats() -> dict:
+    """
+    Статистика пула соединений клиента Elasticsearch.
+    :return: Размер пула, количество занятых и простаивающих соединений.
+    """
+    in_use = 0
+    idle = 0
+    if es is not None:
+        for node in es.transport.node_pool.all():
+            # Сессия aiohttp создаётся лениво, при первом запросе к ноде.
+            session = getattr(node, "session", None)
+            if session is None:
+                continue
+            # Приватные атрибуты TCPConnector, без них статистика пула нулевая, а не ошибка health-check.
+            in_use += len(getattr(session.connector, "_acquired", ()))
+            idle += sum(len(conns) for conns in getattr(session.connector, "_conns", {}).values())
+
+    return {
+        "connections_per_node": config.elastic_connections_per_node,
+        "in_use": in_use,
+        "idle": idle,
+    }
+
 
 # Функция понадобится при внедрении зависимостей
 async def get_elastic() -> AsyncElasticsearch:
-    return AsyncElasticsearch(hosts=[f'{config.es_url()}'])
+    return es
@@ -1,6 +1,6 @@
 from typing import Optional, List
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel
 
 from models.genre import GenreUUID
 from models.person import PersonUUID
@@ -19,12 +19,11 @@ class FilmDetail(BaseModel):
     directors: List[PersonUUID]
 
 
-class FilmListInput(BaseModel):
-    """Model for film data used for input purposes from Elasticsearch."""
+# Fields of a film document needed for film lists.
+FILM_LIST_FIELDS = ["id", "title", "imdb_rating"]
 
-    uuid: str = Field(alias="id")
-    title: Optional[str]
-    imdb_rating: Optional[float]
+# Sort of top rated lists, the same as the index sort of `movies` so that Elasticsearch can stop early.
+TOP_RATED_SORT = [{"imdb_rating": {"order": "desc"}}, {"id": {"order": "asc"}}]
 
 
 class FilmListOutput(BaseModel):
@@ -35,3 +34,24 @@ class FilmListOutput(BaseModel):
     imdb_rating: Optional[float]
 
 
+def film_list_item(source: dict) -> dict:
+    """Map `_source` of a film document straight into the shape of `FilmListOutput`."""
+    return {"uuid": source["id"], "title": source.get("title"), "imdb_rating": source.get("imdb_rating")}
+
+
+def _persons(persons: Optional[list]) -> list:
+    return [{"uuid": person["id"], "full_name": person["name"]} for person in persons or ()]
+
+
+def film_detail(source: dict) -> dict:
+    """Map `_source` of a film document straight into the shape of `FilmDetail`."""
+    return {
+        "uuid": source["id"],
+        "title": source.get("title"),
+        "imdb_rating": source.get("imdb_rating"),
+        "description": source.get("description"),
+        "genres": [{"uuid": genre["id"], "name": genre["name"]} for genre in source.get("genres") or ()],
+        "actors": _persons(source.get("actors")),
+        "writers": _persons(source.get("writers")),
+        "directors": _persons(source.get("directors")),
+    }
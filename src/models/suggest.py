@@ -0,0 +1,19 @@
+from typing import List
+
+from pydantic import BaseModel
+
+from models.person import PersonUUID
+
+
+class FilmSuggestion(BaseModel):
+    """Фильм в подсказках поиска."""
+
+    uuid: str
+    title: str
+
+
+class Suggestions(BaseModel):
+    """Подсказки поиска по началу названия фильма или имени персоны."""
+
+    films: List[FilmSuggestion]
+    persons: List[PersonUUID]
@@ -3,8 +3,9 @@ from typing import Optional, List
 from elasticsearch import AsyncElasticsearch, NotFoundError
 from fastapi import Depends
 
-from db.elastic import get_elastic
-from models.film import FilmDetail, FilmListInput
+from core.pagination import Cursor
+from db.elastic import HITS_FILTER_PATH, get_elastic
+from models.film import FILM_LIST_FIELDS, TOP_RATED_SORT, film_list_item
 
 
 class FilmService:
@@ -15,30 +16,45 @@ class FilmService:
     def __init__(self, elastic: AsyncElasticsearch):
         self.elastic = elastic
 
-    async def _search_films(self, query_body: dict) -> List[FilmListInput]:
-        """Perform the search and return a list of FilmIMBDSortedInput."""
-        response = await self.elastic.search(body=query_body, index=self.index)
+    async def _search_films(self, query_body: dict, cursor: Optional[Cursor] = None) -> List[dict]:
+        """Perform the search and return a list of films in the shape of FilmListOutput."""
+        # Lists never show the total, counting it would keep Elasticsearch from stopping early.
+        query_body = {**query_body, "_source": FILM_LIST_FIELDS, "track_total_hits": False}
+        if cursor:
+            response = await cursor.search(self.elastic, self.index, query_body, filter_path=HITS_FILTER_PATH)
+        else:
+            response = await self.elastic.search(body=query_body, index=self.index, filter_path=HITS_FILTER_PATH)
         hits = response.get("hits", {}).get("hits", [])
         if not hits:
             return []
-        return [FilmListInput(**item["_source"]) for item in hits]
+        return [film_list_item(item["_source"]) for item in hits]
 
-    async def get_film_from_elastic(self, film_id: str) -> Optional[FilmDetail]:
-        """Retrieve a single film from Elasticsearch."""
+    async def get_film_from_elastic(self, film_id: str, source: Optional[List[str]] = None) -> Optional[dict]:
+        """Retrieve a single film from Elasticsearch, `source` limits the fields to return."""
         try:
-            doc = await self.elastic.get(index=self.index, id=film_id)
+            doc = await self.elastic.get(index=self.index, id=film_id, source=source)
             return doc['_source']
         except NotFoundError:
             return None
 
+    async def get_films_from_elastic(self, film_ids: List[str], source: Optional[List[str]] = None) -> List[dict]:
+        """
+        Retrieve several films from Elasticsearch with one request, ids that are not found are skipped.
+        `source` limits the fields to return.
+        """
+        response = await self.elastic.mget(index=self.index, ids=film_ids, source=source,
+                                           filter_path=["docs.found", "docs._source"])
+        return [doc["_source"] for doc in response.get("docs", []) if doc.get("found")]
+
     async def get_films_list_filtered_searched_sorted(
             self,
             query: Optional[str] = None,
             genre_id: Optional[str] = None,
             sort: Optional[str] = None,
             page_number: int = 1,
-            page_size: int = 50
-    ) -> List[FilmListInput] | None:
+            page_size: int = 50,
+            cursor: Optional[Cursor] = None
+    ) -> List[dict] | None:
         """Retrieve a list of films with optional sorting, genre filtering, and full-text search."""
 
         sort_dict = {"+": "asc", "-": "desc"}
@@ -46,18 +62,7 @@ class FilmService:
         # Construct filter conditions
         filter_conditions = []
         if genre_id:
-            filter_conditions.append({
-                "nested": {
-                    "path": "genres",
-                    "query": {
-                        "bool": {
-                            "must": [
-                                {"term": {"genres.id": genre_id}}
-                            ]
-                        }
-                    }
-                }
-            })
+            filter_conditions.append({"term": {"genre_ids": genre_id}})
 
         # Construct search conditions
         search_conditions = []
@@ -81,43 +86,43 @@ class FilmService:
             sort_field = sort[1:] if sort.startswith(('+', '-')) else "imdb_rating"
             sort_order = sort_dict.get(sort[0], "desc") if sort.startswith(('+', '-')) else "desc"
             query_body["sort"] = [{sort_field: {"order": sort_order}}]
+            if query_body["sort"] == TOP_RATED_SORT[:1]:
+                query_body["sort"] = TOP_RATED_SORT
 
-        return await self._search_films(query_body)
+        return await self._search_films(query_body, cursor)
 
     async def get_similar_films(
             self,
             film_id: str,
             page_number: int = 1,
             page_size: int = 50
-    ) -> List[FilmListInput]:
-        """Retrieve similar films based on genre."""
+    ) -> List[dict]:
+        """
+        Retrieve similar films precomputed by the ETL (etl/similar.py).
+        Films the ETL has not processed yet get films of the same genres.
+        """
 
         # Retrieve the film details from Elasticsearch
-        film = await self.get_film_from_elastic(film_id)
+        film = await self.get_film_from_elastic(film_id, source=["genre_ids", "similar_ids"])
         if not film:
             return []
 
+        if "similar_ids" in film:
+            page = film["similar_ids"][(page_number - 1) * page_size:page_number * page_size]
+            if not page:
+                return []
+            return [film_list_item(source) for source in await self.get_films_from_elastic(page, FILM_LIST_FIELDS)]
+
         # Extract genres from the retrieved film
-        genres = [genre["id"] for genre in film.get("genres", [])]
+        genres = film.get("genre_ids", [])
 
         # Build the query to find similar films based on the extracted genres
         query_body = {
             "size": page_size,
             "query": {
                 "bool": {
-                    "must": [
-                        {
-                            "nested": {
-                                "path": "genres",
-                                "query": {
-                                    "bool": {
-                                        "must": [
-                                            {"terms": {"genres.id": genres}}  # Match any of the genres
-                                        ]
-                                    }
-                                }
-                            }
-                        }
+                    "filter": [
+                        {"terms": {"genre_ids": genres}}  # Match any of the genres
                     ],
                     "must_not": [
                         {"term": {"id": film_id}}  # Exclude the original film
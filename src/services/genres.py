@@ -2,10 +2,14 @@ from typing import Optional, List
 
 from elasticsearch import AsyncElasticsearch
 from fastapi import Depends
+from redis.asyncio import Redis
 
-from db.elastic import get_elastic
-from models.film import FilmListInput
+from core.pagination import Cursor
+from db.elastic import HITS_FILTER_PATH, get_elastic
+from db.redis import get_redis
+from models.film import FILM_LIST_FIELDS, TOP_RATED_SORT, film_list_item
 from models.genre import Genre
+from services.film import FilmService
 
 
 class GenreService:
@@ -14,8 +18,14 @@ class GenreService:
     index_genres = "genres"
     index_movies = "movies"
 
-    def __init__(self, elastic: AsyncElasticsearch):
+    # Рейтинги фильмов по жанрам, которые ведёт ETL (etl/leaderboards.py).
+    # Счёт - рейтинг с минусом, фильмы с одинаковым рейтингом идут по id, как в сортировке Elasticsearch.
+    genre_leaderboard_key = "leaderboard:v2:genre:{genre_id}"
+    leaderboards_complete_key = "leaderboard:v2:complete"
+
+    def __init__(self, elastic: AsyncElasticsearch, redis: Optional[Redis] = None):
         self.elastic = elastic
+        self.redis = redis
 
     async def genre_detail(self, id: str) -> Genre | None:
         """Деталка жанра"""
@@ -31,16 +41,25 @@ class GenreService:
 
         return genre
 
-    async def genre_list(self, page_number: int, page_size: int) -> list[Genre] | None:
+    async def genre_list(
+            self,
+            page_number: int,
+            page_size: int,
+            cursor: Optional[Cursor] = None
+    ) -> list[Genre] | None:
         """Получение списка жанров."""
 
         query = {
             "size": page_size,
             "query": {"match_all": {}},
+            "_source": ["id", "name"],
             "from": (page_number - 1) * page_size,
         }
 
-        response = await self.elastic.search(body=query, index=self.index_genres)
+        if cursor:
+            response = await cursor.search(self.elastic, self.index_genres, query, filter_path=HITS_FILTER_PATH)
+        else:
+            response = await self.elastic.search(body=query, index=self.index_genres, filter_path=HITS_FILTER_PATH)
 
         hits = response.get("hits")
         if not hits:
@@ -49,54 +68,72 @@ class GenreService:
         genres = [Genre(**item["_source"]) for item in hits.get("hits")]
         return genres
 
+    async def _popular_film_ids(self, genre_id: str, page_number: int, page_size: int) -> Optional[List[str]]:
+        """
+        Page of ids of films of the genre from the leaderboard in Redis.
+        :return: None if the leaderboard is not built yet.
+        """
+        if self.redis is None:
+            return None
+
+        start = (page_number - 1) * page_size
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.exists(self.leaderboards_complete_key)
+            pipe.exists(self.genre_leaderboard_key.format(genre_id=genre_id))
+            pipe.zrange(self.genre_leaderboard_key.format(genre_id=genre_id), start, start + page_size - 1)
+            complete, exists, film_ids = await pipe.execute()
+
+        if not complete or not exists:
+            return None
+        return [film_id.decode() if isinstance(film_id, bytes) else film_id for film_id in film_ids]
+
     async def get_popular_films(
             self,
             genre_id: str,
             page_number: int = 1,
             page_size: int = 50
-    ) -> Optional[List[FilmListInput]]:
-        """Retrieve films sorted by IMDb rating based on genre ID."""
-
-        # Build the query to filter by nested genre and sort by IMDb rating
+    ) -> Optional[List[dict]]:
+        """
+        Retrieve films sorted by IMDb rating based on genre ID.
+        Pages are taken from the leaderboard of the genre in Redis, Elasticsearch is searched while there is none.
+        """
+        film_ids = await self._popular_film_ids(genre_id, page_number, page_size)
+        if film_ids is not None:
+            if not film_ids:
+                return None
+            films = await FilmService(self.elastic).get_films_from_elastic(film_ids, FILM_LIST_FIELDS)
+            return [film_list_item(film) for film in films] or None
+
+        # Build the query to filter by genre and sort by IMDb rating
         query_body = {
             "size": page_size,
             "query": {
                 "bool": {
-                    "must": [
-                        {
-                            "nested": {
-                                "path": "genres",
-                                "query": {
-                                    "bool": {
-                                        "must": [
-                                            {"term": {"genres.id": genre_id}}  # Filter by genre ID
-                                        ]
-                                    }
-                                }
-                            }
-                        }
+                    "filter": [
+                        {"term": {"genre_ids": genre_id}}  # Filter by genre ID
                     ]
                 }
             },
-            "sort": [
-                {"imdb_rating": {"order": "desc"}}  # Sort by IMDb rating in descending order
-            ],
+            "sort": TOP_RATED_SORT,  # Sort by IMDb rating in descending order
+            "_source": FILM_LIST_FIELDS,
+            "track_total_hits": False,
             "from": (page_number - 1) * page_size  # Pagination
         }
 
-        response = await self.elastic.search(body=query_body, index=self.index_movies)
+        response = await self.elastic.search(body=query_body, index=self.index_movies, filter_path=HITS_FILTER_PATH)
 
         hits = response.get("hits", {}).get("hits", [])
         if not hits:
             return None
 
-        films = [FilmListInput(**item["_source"]) for item in hits]
+        films = [film_list_item(item["_source"]) for item in hits]
         return films
 
 
 def genre_service(
         elastic: AsyncElasticsearch = Depends(get_elastic),
+        redis: Redis = Depends(get_redis),
 ) -> GenreService:
     """Прослайка для внедрения зависимости сервиса жанров."""
 
-    return GenreService(elastic)
+    return GenreService(elastic, redis)
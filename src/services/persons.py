@@ -2,8 +2,10 @@ from typing import Optional
 
 from elasticsearch import AsyncElasticsearch
 from fastapi import Depends
-from db.elastic import get_elastic
-from models.film import FilmListOutput
+
+from core.pagination import Cursor
+from db.elastic import HITS_FILTER_PATH, get_elastic
+from models.film import FILM_LIST_FIELDS, film_list_item
 from models.person import PersonUUID, PersonWithFilms, FilmWithPersonRoles
 
 
@@ -12,51 +14,74 @@ class PersonService:
 
     index = "persons"
 
+    # Roles of a person in a film by the flat field of the film with ids of persons in the role.
+    role_fields = {"actor": "actor_ids", "director": "director_ids", "writer": "writer_ids"}
+
+    # Roles come back as names of the matched queries, so only the id of a film is needed.
+    film_roles_fields = ["id"]
+    films_filter_path = HITS_FILTER_PATH + ["hits.hits.matched_queries"]
+
     def __init__(self, elastic: AsyncElasticsearch):
         self.elastic = elastic
 
-    async def _get_films_with_person(
-            self,
-            person_id: str,
-            page_size: int,
-            page_number: int
-    ) -> dict:
+    @classmethod
+    def _films_with_person_query(cls, person_id: str, page_size: int, page_number: int, source: list[str]) -> dict:
         """
-        Query to ES for getting films with person.
-        :return: Hits of ElasticSearch query.
+        Query to ES for getting films with person, `source` is the list of film fields to return.
+        Every role is a named term filter, so hits report roles of the person in `matched_queries`.
         """
-        query_films_with_person = {
+        return {
             "size": page_size,
+            "_source": source,
             "query": {
                 "bool": {
-                    "should": [
-                        {
-                            "nested": {
-                                "path": "directors",
-                                "query": {"bool": {"should": {"term": {"directors.id": f"{person_id}"}}}},
-                            }
-                        },
-                        {
-                            "nested": {
-                                "path": "writers",
-                                "query": {"bool": {"should": {"term": {"writers.id": f"{person_id}"}}}},
-                            }
-                        },
-                        {
-                            "nested": {
-                                "path": "actors",
-                                "query": {"bool": {"should": {"term": {"actors.id": f"{person_id}"}}}},
-                            }
-                        },
-                    ]
+                    "filter": {
+                        "bool": {
+                            "should": [
+                                {"term": {field: {"value": person_id, "_name": role}}}
+                                for role, field in cls.role_fields.items()
+                            ],
+                            "minimum_should_match": 1,
+                        }
+                    }
                 }
             },
             "from": (page_number - 1) * page_size  # Pagination
         }
 
-        search_films_with_person = await self.elastic.search(body=query_films_with_person, index='movies')
+    async def _get_films_with_person(
+            self,
+            person_id: str,
+            page_size: int,
+            page_number: int,
+            source: list[str],
+            filter_path: list[str] = HITS_FILTER_PATH
+    ) -> dict:
+        """
+        Query to ES for getting films with person.
+        :return: Hits of ElasticSearch query.
+        """
+        query_films_with_person = self._films_with_person_query(person_id, page_size, page_number, source)
+
+        search_films_with_person = await self.elastic.search(body=query_films_with_person, index='movies',
+                                                             filter_path=filter_path)
         return search_films_with_person.body
 
+    @classmethod
+    def _person_with_films(cls, person_source: dict, search_films_with_person: dict) -> PersonWithFilms:
+        """Build person with films and roles of the person in those films."""
+        person_id = person_source.get('id')
+        hits_films = search_films_with_person.get("hits", {}).get("hits", {})
+
+        films_with_person_roles = []
+
+        for film in hits_films:
+            matched_roles = film.get("matched_queries", [])
+            person_roles = [role for role in cls.role_fields if role in matched_roles]
+            films_with_person_roles.append(FilmWithPersonRoles(uuid=film["_source"]["id"], roles=person_roles))
+
+        return PersonWithFilms(uuid=person_id, full_name=person_source.get('name'), films=films_with_person_roles)
+
     async def person_detail(
             self,
             person_id: str,
@@ -72,46 +97,30 @@ class PersonService:
         if not response["_source"]:
             return None
 
-        search_films_with_person = await self._get_films_with_person(person_id, page_size, page_number)
-
-        hits_films = search_films_with_person.get("hits", {}).get("hits", {})
+        search_films_with_person = await self._get_films_with_person(person_id, page_size, page_number,
+                                                                     self.film_roles_fields, self.films_filter_path)
 
-        films_with_person_roles = []
+        return self._person_with_films(response["_source"], search_films_with_person)
 
-        for film in hits_films:
-            film_source = film["_source"]
-            person_roles = []
-            if film_source["actors"]:
-                for actor in film_source["actors"]:
-                    if actor["id"] == person_id:
-                        person_roles.append('actor')
-            if film_source["directors"]:
-                for director in film_source["directors"]:
-                    if director["id"] == person_id:
-                        person_roles.append("director")
-
-            if film_source["writers"]:
-                for writer in film_source["writers"]:
-                    if writer["id"] == person_id:
-                        person_roles.append("writer")
-
-            films_with_person_roles.append(FilmWithPersonRoles(uuid=film_source["id"], roles=person_roles))
-
-        person = PersonWithFilms(uuid=response["_source"].get('id'), full_name=response["_source"].get('name'),
-                                 films=films_with_person_roles)
-
-        return person
-
-    async def person_list(self, page_number: int, page_size: int) -> list[PersonUUID] | None:
+    async def person_list(
+            self,
+            page_number: int,
+            page_size: int,
+            cursor: Optional[Cursor] = None
+    ) -> list[PersonUUID] | None:
         """Get list of person"""
 
         query = {
             "size": page_size,
             "query": {"match_all": {}},
+            "_source": ["id", "name"],
             "from": (page_number - 1) * page_size,
         }
 
-        response = await self.elastic.search(body=query, index=self.index)
+        if cursor:
+            response = await cursor.search(self.elastic, self.index, query, filter_path=HITS_FILTER_PATH)
+        else:
+            response = await self.elastic.search(body=query, index=self.index, filter_path=HITS_FILTER_PATH)
 
         hits = response.get("hits")
         if not hits:
@@ -126,15 +135,15 @@ class PersonService:
             person_id,
             page_number: int = 1,
             page_size: int = 50
-    ) -> list[FilmListOutput] | None:
+    ) -> list[dict] | None:
         """
         Get films with person
         """
-        search_films_with_person = await self._get_films_with_person(person_id, page_size, page_number)
+        search_films_with_person = await self._get_films_with_person(person_id, page_size, page_number,
+                                                                     FILM_LIST_FIELDS)
 
         hits_films = search_films_with_person.get("hits", {}).get("hits", {})
-        films = [FilmListOutput(uuid=film["_source"]['id'], title=film["_source"]['title'], imdb_rating=film["_source"][
-            'imdb_rating']) for film in hits_films]
+        films = [film_list_item(film["_source"]) for film in hits_films]
         return films
 
     async def person_search(self, page_number: int, page_size: int, query: Optional[str] = None) -> list[PersonWithFilms] | None:
@@ -150,20 +159,36 @@ class PersonService:
                                },
                 }
             },
+            "_source": ["id", "name"],
             "from": (page_number - 1) * page_size,
         }
 
-        response = await self.elastic.search(body=query, index="persons")
+        response = await self.elastic.search(body=query, index="persons", filter_path=HITS_FILTER_PATH)
         hits = response.get("hits")
 
         if not hits:
             return None
 
-        # Get ID of found persons.
-        founded_persons_id_list = [item["_source"].get('id') for item in hits.get("hits")]
+        founded_persons = [item["_source"] for item in hits.get("hits")]
+        if not founded_persons:
+            return []
+
+        # Get films of all found persons with one msearch instead of a detail request per person.
+        searches = []
+        for person_source in founded_persons:
+            searches.append({"index": "movies"})
+            searches.append(self._films_with_person_query(person_source.get('id'), page_size=999, page_number=1,
+                                                          source=self.film_roles_fields))
+        # `status` keeps an entry for every search even if it has no hits.
+        films_response = await self.elastic.msearch(
+            searches=searches,
+            filter_path=["responses.status"] + [f"responses.{path}" for path in self.films_filter_path],
+        )
 
-        # Get detail(full_name, films) for found persons ID's
-        founded_persons_with_details = [await self.person_detail(person_id) for person_id in founded_persons_id_list]
+        founded_persons_with_details = [
+            self._person_with_films(person_source, search_films_with_person)
+            for person_source, search_films_with_person in zip(founded_persons, films_response["responses"])
+        ]
 
         return founded_persons_with_details
 
@@ -0,0 +1,60 @@
+from elasticsearch import AsyncElasticsearch
+from fastapi import Depends
+
+from db.elastic import get_elastic
+
+
+class SuggestService:
+    """Сервис подсказок поиска."""
+
+    index_movies = "movies"
+    index_persons = "persons"
+
+    def __init__(self, elastic: AsyncElasticsearch):
+        self.elastic = elastic
+
+    @staticmethod
+    def _suggest_query(field: str, prefix: str, size: int, source: list[str]) -> dict:
+        """Запрос к completion-подполю, документы не ищутся."""
+        return {
+            "size": 0,
+            "_source": source,
+            "suggest": {
+                "suggestions": {
+                    "prefix": prefix,
+                    "completion": {"field": field, "size": size, "skip_duplicates": True},
+                }
+            },
+        }
+
+    async def suggest(self, prefix: str, size: int = 5) -> dict:
+        """
+        Фильмы и персоны, название или имя которых начинается с `prefix`.
+        Оба индекса опрашиваются одним msearch.
+        :return: Словарь в формате модели `Suggestions`.
+        """
+        searches = [
+            {"index": self.index_movies},
+            self._suggest_query("title.suggest", prefix, size, ["id", "title"]),
+            {"index": self.index_persons},
+            self._suggest_query("name.suggest", prefix, size, ["id", "name"]),
+        ]
+        response = await self.elastic.msearch(
+            searches=searches, filter_path=["responses.status", "responses.suggest.suggestions.options._source"])
+        films, persons = (
+            [option["_source"] for suggestion in result.get("suggest", {}).get("suggestions", [])
+             for option in suggestion.get("options", [])]
+            for result in response["responses"]
+        )
+        return {
+            "films": [{"uuid": film["id"], "title": film["title"]} for film in films],
+            "persons": [{"uuid": person["id"], "full_name": person["name"]} for person in persons],
+        }
+
+
+def suggest_service(
+        elastic: AsyncElasticsearch = Depends(get_elastic),
+) -> SuggestService:
+    """Прослойка для внедрения зависимости сервиса подсказок."""
+
+    return SuggestService(elastic)
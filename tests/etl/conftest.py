@@ -0,0 +1,14 @@
+import sys
+from pathlib import Path
+
+ETL_PATH = str(Path(__file__).resolve().parents[2] / 'etl')
+
+# ETL modules import each other the same way the etl container does. The path is dropped right after,
+# etl/models.py would shadow the models package of the API in unit tests otherwise.
+sys.path.insert(0, ETL_PATH)
+import aliases  # noqa: E402,F401
+import leaderboards  # noqa: E402,F401
+import linked_films  # noqa: E402,F401
+import load  # noqa: E402,F401
+import similar  # noqa: E402,F401
+sys.path.remove(ETL_PATH)
@@ -0,0 +1,59 @@
+from unittest import mock
+
+from aliases import ALIASED_META, aliased_versions, index_versions, move_alias
+
+
+def elastic(aliased=None, legacy=False, versions=()):
+    client = mock.Mock()
+    client.indices.exists_alias.return_value = aliased is not None
+    client.indices.get_alias.return_value = {aliased: {'aliases': {'movies': {}}}} if aliased else {}
+    client.indices.exists.return_value = legacy
+    client.indices.get.return_value = {name: {} for name in versions}
+    client.indices.get_mapping.return_value = {'index': {'mappings': {'_meta': {'settings_before_bulk': {}}}}}
+    return client
+
+
+def test_versions_are_read_from_index_names():
+    client = elastic(versions=['movies_v1', 'movies_v12', 'movies_v2_old', 'movies_vx'])
+
+    assert index_versions(client, 'movies') == {1: 'movies_v1', 12: 'movies_v12'}
+
+
+def test_only_aliased_versions_are_listed_by_time_the_alias_pointed_to_them():
+    client = elastic()
+    client.indices.get.return_value = {
+        'movies_v1': {'mappings': {'_meta': {ALIASED_META: 300.0}}},
+        'movies_v2': {'mappings': {'_meta': {ALIASED_META: 100.0}}},
+        'movies_v3': {'mappings': {'_meta': {ALIASED_META: 200.0}}},
+        'movies_v4': {'mappings': {}},
+    }
+
+    assert aliased_versions(client, 'movies') == ['movies_v2', 'movies_v3', 'movies_v1']
+
+
+def test_alias_is_moved_in_one_request():
+    client = elastic(aliased='movies_v1')
+
+    move_alias(client, 'movies', 'movies_v2')
+
+    client.indices.update_aliases.assert_called_once_with(actions=[
+        {'remove': {'index': 'movies_v1', 'alias': 'movies'}},
+        {'add': {'index': 'movies_v2', 'alias': 'movies'}},
+    ])
+    marked = [call.kwargs for call in client.indices.put_mapping.call_args_list]
+    assert [kwargs['index'] for kwargs in marked] == ['movies_v1', 'movies_v2']
+    # Other meta of the index is kept.
+    assert all(set(kwargs['meta']) == {'settings_before_bulk', ALIASED_META} for kwargs in marked)
+
+
+def test_index_before_versions_is_kept_as_version_zero():
+    client = elastic(legacy=True)
+
+    move_alias(client, 'movies', 'movies_v1')
+
+    client.indices.clone.assert_called_once_with(index='movies', target='movies_v0',
+                                                 settings={'index.blocks.write': False})
+    client.indices.update_aliases.assert_called_once_with(actions=[
+        {'remove_index': {'index': 'movies'}},
+        {'add': {'index': 'movies_v1', 'alias': 'movies'}},
+    ])
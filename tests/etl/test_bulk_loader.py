@@ -0,0 +1,128 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from elasticsearch.helpers import BulkIndexError
+from elasticsearch.serializer import JSONSerializer
+
+import load
+import similar
+from load import BulkLoader, partial_updates
+from similar import SimilarFilms
+
+
+class ElasticBulk:
+    """Stand-in for Elasticsearch: indexes and updates bulk requests, rejects documents with prepared statuses."""
+
+    def __init__(self, statuses=None, docs=None):
+        self.statuses = statuses or {}
+        self.requests = []
+        self.indexed = []
+        self.docs = docs or {}
+        self.transport = SimpleNamespace(serializers=SimpleNamespace(get_serializer=lambda mimetype: JSONSerializer()))
+
+    def options(self, **kwargs):
+        return self
+
+    def bulk(self, operations, **kwargs):
+        lines = [json.loads(line) for line in operations]
+        self.requests.append(sum(len(line) for line in operations))
+        items = []
+        for header, body in zip(lines[::2], lines[1::2]):
+            op_type, meta = next(iter(header.items()))
+            doc_id = meta['_id']
+            statuses = self.statuses.get(doc_id, [])
+            status = statuses.pop(0) if statuses else 201
+            if status == 201:
+                self.indexed.append(doc_id)
+                self.docs[doc_id] = {**self.docs.get(doc_id, {}), **body['doc']} if op_type == 'update' else body
+            items.append({op_type: {'_id': doc_id, 'status': status,
+                                    **({'error': {'type': 'rejected'}} if status != 201 else {})}})
+        return SimpleNamespace(body={'errors': len(self.indexed) < len(items), 'items': items})
+
+    def mget(self, index, ids, source):
+        return {'docs': [{'_id': doc_id, 'found': doc_id in self.docs,
+                          '_source': {field: self.docs[doc_id][field] for field in source
+                                      if field in self.docs.get(doc_id, {})}} for doc_id in ids]}
+
+
+def actions(count):
+    return [{'_index': 'movies', '_id': str(i), '_source': {'title': 'x' * 1000}} for i in range(count)]
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(load.time, 'sleep', lambda seconds: None)
+
+
+def test_chunks_are_limited_by_bytes():
+    client = ElasticBulk()
+
+    result = BulkLoader(client, max_chunk_bytes=10_000, concurrency=1).load(actions(50))
+
+    assert result == (50, [])
+    assert len(client.requests) > 1
+    assert max(client.requests) <= 10_000
+
+
+def test_rejected_documents_are_sent_again_with_smaller_chunks():
+    client = ElasticBulk({'3': [429, 429], '7': [429]})
+    loader = BulkLoader(client, max_chunk_bytes=1_000_000, concurrency=4)
+
+    result = loader.load(actions(10))
+
+    assert result == (10, [])
+    assert sorted(client.indexed, key=int) == [str(i) for i in range(10)]
+    assert loader.rejections == 3
+    assert loader.docs == 10
+
+
+def test_failed_documents_raise_without_sending_the_batch_again():
+    client = ElasticBulk({'3': [400] * 20})
+    loader = BulkLoader(client, concurrency=1)
+
+    with pytest.raises(BulkIndexError):
+        loader.load(actions(5))
+
+    assert len(client.requests) == 1
+
+
+def test_documents_rejected_too_many_times_raise_without_sending_the_batch_again():
+    client = ElasticBulk({'3': [429] * 20})
+    loader = BulkLoader(client, concurrency=1, max_retries=2)
+
+    with pytest.raises(BulkIndexError):
+        loader.load(actions(5))
+
+    assert len(client.requests) == 3
+
+
+def test_partial_updates_keep_similar_films():
+    client = ElasticBulk(docs={'1': {'title': 'Old', 'genres': ['Drama'], 'similar_ids': ['2', '3']}})
+
+    reloaded = [{'_index': 'movies', '_id': '1', '_source': {'title': 'Old', 'genres': ['Comedy']}}]
+    BulkLoader(client, concurrency=1).load(partial_updates(reloaded))
+
+    assert client.docs['1'] == {'title': 'Old', 'genres': ['Comedy'], 'similar_ids': ['2', '3']}
+
+
+def test_reloaded_film_with_same_features_keeps_similar_films(monkeypatch):
+    client = ElasticBulk()
+    loader = BulkLoader(client, concurrency=1)
+    monkeypatch.setattr(similar, 'scan', lambda es, index, query: (
+        [] if 'similar_ids' in str(query) else [{'_source': source} for source in client.docs.values()]))
+    monkeypatch.setattr(similar, 'bulk', lambda es, actions: loader.load(list(actions)))
+
+    films = [{'id': '1', 'title': 'Old', 'genre_ids': ['drama'], 'actor_ids': ['a']},
+             {'id': '2', 'title': 'Other', 'genre_ids': ['drama'], 'actor_ids': ['a', 'b']},
+             {'id': '3', 'title': 'Comedy', 'genre_ids': ['comedy'], 'actor_ids': ['c']}]
+    loader.load(partial_updates([{'_index': 'movies', '_id': film['id'], '_source': film} for film in films]))
+    similar_films = SimilarFilms(client, top_k=1)
+    similar_films.update({'1', '2', '3'})
+
+    # Only the title changed, similar films of the film are not computed again.
+    reloaded = {**films[0], 'title': 'New'}
+    loader.load(partial_updates([{'_index': 'movies', '_id': '1', '_source': reloaded}]))
+    similar_films.update({'1'})
+
+    assert client.docs['1'] == {**reloaded, 'similar_ids': ['2']}
@@ -0,0 +1,92 @@
+import json
+from unittest import mock
+
+from load import evict_all_cached_responses, linked_ids, publish_changes
+
+
+class RedisKeys:
+    """Stand-in for the Redis client: keeps keys and sets of keys, records published messages."""
+
+    def __init__(self, keys, sets):
+        self.keys = set(keys) | set(sets)
+        self.sets = sets
+        self.published = []
+
+    def pipeline(self, transaction=True):
+        return RedisKeysPipeline(self)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def unlink(self, *keys):
+        deleted = self.keys & set(keys)
+        self.keys -= deleted
+        return len(deleted)
+
+    def scan_iter(self, match, count):
+        return iter([key for key in sorted(self.keys) if key.startswith(match.rstrip('*'))])
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+
+class RedisKeysPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.replies = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.replies = []
+
+    def smembers(self, key):
+        self.replies.append(self.redis.smembers(key))
+
+    def execute(self):
+        return self.replies
+
+
+def test_changed_documents_are_evicted_by_key_sets_before_publishing():
+    redis = RedisKeys(
+        keys={'fastapi-cache:local:film-1', 'fastapi-cache::genre-1', 'fastapi-cache::film-2'},
+        sets={'fastapi-cache:keys:film_id=1': {'fastapi-cache:local:film-1'},
+              'fastapi-cache:keys:genre_id=g': {'fastapi-cache::genre-1'},
+              'fastapi-cache:keys:film_id=2': {'fastapi-cache::film-2'}},
+    )
+
+    publish_changes(redis, 'cache-invalidation', [{'_index': 'movies', '_id': '1', '_source': {'genre_ids': ['g']}}])
+
+    assert redis.keys == {'fastapi-cache::film-2', 'fastapi-cache:keys:film_id=2'}
+    assert redis.published == [('cache-invalidation', {'movies': ['1'], 'genres': ['g']})]
+
+
+def test_genres_and_persons_a_film_lost_are_evicted():
+    redis = RedisKeys(
+        keys={'fastapi-cache::genre-old', 'fastapi-cache::person-old', 'fastapi-cache::genre-new'},
+        sets={'fastapi-cache:keys:genre_id=old': {'fastapi-cache::genre-old'},
+              'fastapi-cache:keys:person_id=old': {'fastapi-cache::person-old'},
+              'fastapi-cache:keys:genre_id=new': {'fastapi-cache::genre-new'}},
+    )
+    client = mock.Mock()
+    client.mget.return_value = {'docs': [
+        {'_id': '1', 'found': True, '_source': {'genre_ids': ['old'], 'actor_ids': ['old'], 'writer_ids': []}},
+        {'_id': '2', 'found': False},
+    ]}
+
+    previous = linked_ids(client, 'movies', ['1', '2'])
+    publish_changes(redis, 'cache-invalidation',
+                    [{'_index': 'movies', '_id': '1', '_source': {'genre_ids': ['new'], 'actor_ids': []}}], previous)
+
+    assert redis.keys == set()
+    assert redis.published == [
+        ('cache-invalidation', {'genres': ['new', 'old'], 'persons': ['old'], 'movies': ['1']}),
+    ]
+
+
+def test_all_cached_responses_are_evicted():
+    redis = RedisKeys(keys={'fastapi-cache::film-1', 'etl-state'}, sets={'fastapi-cache:keys:film_id=1': set()})
+
+    assert evict_all_cached_responses(redis) == 2
+    assert redis.keys == {'etl-state'}
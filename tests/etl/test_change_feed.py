@@ -0,0 +1,87 @@
+import os
+import threading
+import uuid
+
+import pytest
+
+psycopg = pytest.importorskip('psycopg')
+
+from etl.change_feed import SQL_PATH, ChangeFeed  # noqa: E402
+
+
+@pytest.fixture
+def database_params():
+    params = {
+        'dbname': os.getenv('POSTGRES_DB', 'db'),
+        'user': os.getenv('POSTGRES_USER', 'user'),
+        'password': os.getenv('POSTGRES_PASSWORD', 'password'),
+        'host': os.getenv('POSTGRES_HOST', '127.0.0.1'),
+        'port': os.getenv('POSTGRES_PORT', 5432),
+        'connect_timeout': 3,
+    }
+    try:
+        connection = psycopg.connect(**params, autocommit=True)
+    except psycopg.OperationalError:
+        pytest.skip('Postgres is not available.')
+
+    schema = f'etl_test_{uuid.uuid4().hex}'
+    connection.execute(f'CREATE SCHEMA {schema}')
+    connection.execute(f'SET search_path TO {schema}')
+    for table in ('film_work', 'genre', 'person'):
+        connection.execute(f'CREATE TABLE {table} (id uuid PRIMARY KEY, modified timestamptz NOT NULL)')
+    for table, column in (('genre_film_work', 'genre_id'), ('person_film_work', 'person_id')):
+        connection.execute(f'CREATE TABLE {table} (id uuid PRIMARY KEY, film_work_id uuid NOT NULL, '
+                           f'{column} uuid NOT NULL)')
+    connection.execute(SQL_PATH.read_text())
+
+    yield {**params, 'options': f'-c search_path={schema}'}
+
+    connection.execute(f'DROP SCHEMA {schema} CASCADE')
+    connection.close()
+
+
+def test_burst_of_changes_is_one_wake_up(database_params):
+    feed = ChangeFeed(database_params, debounce_seconds=0.3)
+    feed.connection
+
+    with psycopg.connect(**database_params, autocommit=True) as connection:
+        for _ in range(100):
+            connection.execute("INSERT INTO person VALUES (gen_random_uuid(), now())")
+        connection.execute("INSERT INTO genre VALUES (gen_random_uuid(), now())")
+
+    assert feed.wait(timeout=5) == {'person', 'genre'}
+    assert feed.wait(timeout=0.1) == set()
+    feed.close()
+
+
+def test_changed_link_touches_film(database_params):
+    feed = ChangeFeed(database_params, debounce_seconds=0.1)
+    film_id = uuid.uuid4()
+
+    with psycopg.connect(**database_params, autocommit=True) as connection:
+        connection.execute("INSERT INTO film_work VALUES (%s, '2020-01-01')", (film_id,))
+        feed.connection
+        connection.execute("INSERT INTO person_film_work VALUES (gen_random_uuid(), %s, gen_random_uuid())",
+                           (film_id,))
+        modified = connection.execute("SELECT modified FROM film_work WHERE id = %s", (film_id,)).fetchone()[0]
+
+    assert modified.year > 2020
+    assert feed.wait(timeout=5) == {'film_work'}
+    feed.close()
+
+
+def test_listen_wakes_tables_until_stopped(database_params):
+    feed = ChangeFeed(database_params, debounce_seconds=0.1)
+    feed.connection
+    stopped = threading.Event()
+    woken = []
+
+    def wake(tables):
+        woken.extend(tables)
+        stopped.set()
+
+    with psycopg.connect(**database_params, autocommit=True) as connection:
+        connection.execute("INSERT INTO genre VALUES (gen_random_uuid(), now())")
+    feed.listen(stopped, wake)
+
+    assert woken == ['genre']
@@ -0,0 +1,64 @@
+import os
+import uuid
+
+import pytest
+
+from etl.queries import generate_genre_query
+
+psycopg = pytest.importorskip('psycopg')
+
+INITIAL_STATE = ('1800-01-01', '00000000-0000-0000-0000-000000000000')
+ROWS = 5000
+BATCH = 100
+
+
+@pytest.fixture
+def cursor():
+    try:
+        connection = psycopg.connect(dbname=os.getenv('POSTGRES_DB', 'db'),
+                                     user=os.getenv('POSTGRES_USER', 'user'),
+                                     password=os.getenv('POSTGRES_PASSWORD', 'password'),
+                                     host=os.getenv('POSTGRES_HOST', '127.0.0.1'),
+                                     port=os.getenv('POSTGRES_PORT', 5432),
+                                     connect_timeout=3)
+    except psycopg.OperationalError:
+        pytest.skip('Postgres is not available.')
+
+    schema = f'etl_test_{uuid.uuid4().hex}'
+    with connection, connection.cursor() as cursor:
+        cursor.execute(f'CREATE SCHEMA {schema}')
+        cursor.execute(f'SET search_path TO {schema}')
+        cursor.execute('CREATE TABLE genre (id uuid PRIMARY KEY, name text, description text, '
+                       'modified timestamptz NOT NULL)')
+        cursor.execute('CREATE INDEX genre_modified_id_idx ON genre USING btree (modified, id)')
+        yield cursor
+        connection.rollback()
+    connection.close()
+
+
+def test_rows_sharing_modified_are_paged_once(cursor):
+    cursor.execute("INSERT INTO genre SELECT gen_random_uuid(), 'Action', NULL, '2024-01-01 00:00:00+00' "
+                   "FROM generate_series(1, %s)", (ROWS,))
+    cursor.execute("INSERT INTO genre VALUES (gen_random_uuid(), 'Comedy', NULL, '2024-01-02 00:00:00+00')")
+
+    last_state = INITIAL_STATE
+    seen = []
+    while True:
+        cursor.execute(generate_genre_query(*last_state, BATCH))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        seen.extend(row[0] for row in rows)
+        last_state = str(rows[-1][3]), str(rows[-1][0])
+
+    assert len(seen) == ROWS + 1
+    assert len(set(seen)) == ROWS + 1
+
+
+def test_rows_after_horizon_are_left_to_next_run(cursor):
+    cursor.execute("INSERT INTO genre VALUES (gen_random_uuid(), 'Action', NULL, '2024-01-01 00:00:00+00'), "
+                   "(gen_random_uuid(), 'Comedy', NULL, '2024-01-03 00:00:00+00')")
+
+    cursor.execute(generate_genre_query(*INITIAL_STATE, BATCH, until='2024-01-02 00:00:00+00'))
+
+    assert [row[1] for row in cursor.fetchall()] == ['Action']
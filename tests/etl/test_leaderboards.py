@@ -0,0 +1,46 @@
+from unittest import mock
+
+import leaderboards
+from leaderboards import (GENRE_LEADERBOARD_KEY, LEADERBOARDS_COMPLETE_KEY, backfill_genre_leaderboards,
+                          update_genre_leaderboards)
+
+
+def redis():
+    client = mock.MagicMock()
+    client.hmget.side_effect = lambda key, ids: [None] * len(ids)
+    client.scan_iter.return_value = [b'leaderboard:genre:drama']
+    return client
+
+
+def film(film_id, rating, genre_ids=('drama',)):
+    return {'_index': 'movies', '_id': film_id,
+            '_source': {'id': film_id, 'imdb_rating': rating, 'genre_ids': list(genre_ids)}}
+
+
+def scores(client):
+    pipe = client.pipeline.return_value.__enter__.return_value
+    return {member: score for call in pipe.zadd.call_args_list for member, score in call.args[1].items()}
+
+
+def test_scores_are_negated_ratings_so_that_ties_go_by_id():
+    client = redis()
+
+    update_genre_leaderboards(client, [film('b', 8.5), film('a', 8.5), film('c', None)])
+
+    # Sets are read in ascending order of score, then of member, as Elasticsearch sorts by rating desc, id asc.
+    assert scores(client) == {'a': -8.5, 'b': -8.5, 'c': float('inf')}
+    pipe = client.pipeline.return_value.__enter__.return_value
+    assert {call.args[0] for call in pipe.zadd.call_args_list} == {GENRE_LEADERBOARD_KEY.format(genre_id='drama')}
+
+
+def test_backfill_builds_leaderboards_from_index_and_drops_legacy_keys(monkeypatch):
+    client = redis()
+    monkeypatch.setattr(leaderboards, 'scan', lambda es_client, index, query: [
+        {'_source': film('a', 7.0)['_source']}, {'_source': film('b', 9.0)['_source']}])
+
+    assert backfill_genre_leaderboards(client, mock.Mock()) == 2
+
+    assert scores(client) == {'a': -7.0, 'b': -9.0}
+    client.set.assert_called_once_with(LEADERBOARDS_COMPLETE_KEY, 1)
+    client.unlink.assert_called_once_with('leaderboard:film-genres', 'leaderboard:complete',
+                                          b'leaderboard:genre:drama')
@@ -0,0 +1,53 @@
+from linked_films import has_linked_films, linked_films_reloaded, queue_linked_films, take_linked_films
+
+
+class RedisSets:
+    """Stand-in for the Redis client: keeps sets of bytes by key."""
+
+    def __init__(self):
+        self.sets = {}
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(member.encode() for member in members)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def exists(self, *keys):
+        return sum(key in self.sets for key in keys)
+
+    def renamenx(self, key, new_key):
+        if new_key in self.sets:
+            return False
+        self.sets[new_key] = self.sets.pop(key)
+        return True
+
+    def delete(self, *keys):
+        return sum(self.sets.pop(key, None) is not None for key in keys)
+
+
+def test_films_queued_during_a_reload_are_reloaded_next_time():
+    redis = RedisSets()
+    queue_linked_films(redis, ['2', '1'])
+
+    assert take_linked_films(redis) == ['1', '2']
+    # The name of the person of film 1 changed again while the films were reloaded.
+    queue_linked_films(redis, ['1'])
+    linked_films_reloaded(redis)
+
+    assert has_linked_films(redis)
+    assert take_linked_films(redis) == ['1']
+    linked_films_reloaded(redis)
+    assert not has_linked_films(redis)
+    assert take_linked_films(redis) == []
+
+
+def test_films_of_a_failed_reload_are_taken_again_first():
+    redis = RedisSets()
+    queue_linked_films(redis, ['1'])
+    take_linked_films(redis)
+    queue_linked_films(redis, ['2'])
+
+    assert take_linked_films(redis) == ['1']
+    linked_films_reloaded(redis)
+    assert take_linked_films(redis) == ['2']
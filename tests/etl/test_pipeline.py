@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from etl.pipeline import Pipeline
+
+
+def test_batches_are_loaded_in_order_of_extraction():
+    loaded = []
+
+    stages = Pipeline(queue_size=2).run(iter(range(100)), lambda batch: batch * 2, loaded.append)
+
+    assert loaded == [batch * 2 for batch in range(100)]
+    assert [stage.batches for stage in stages] == [100, 100, 100]
+
+
+def test_extract_is_held_by_full_queues():
+    extracted = []
+    release = threading.Event()
+
+    def extract():
+        for batch in range(100):
+            extracted.append(batch)
+            yield batch
+
+    def load(batch):
+        release.wait()
+
+    thread = threading.Thread(target=Pipeline(queue_size=2).run, args=(extract(), lambda batch: batch, load))
+    thread.start()
+    threading.Event().wait(0.5)
+
+    # A batch in every stage and two in every queue.
+    assert len(extracted) <= 7
+    release.set()
+    thread.join()
+    assert len(extracted) == 100
+
+
+def test_failed_stage_stops_pipeline_and_error_is_raised():
+    loaded = []
+
+    def transform(batch):
+        if batch == 10:
+            raise ValueError(batch)
+        return batch
+
+    with pytest.raises(ValueError):
+        Pipeline(queue_size=2).run(iter(range(100)), transform, loaded.append)
+
+    # Batches transformed before the failure may be dropped, none after it are loaded.
+    assert loaded == list(range(len(loaded)))
+    assert len(loaded) <= 10
@@ -0,0 +1,64 @@
+from unittest import mock
+
+import pytest
+
+import similar
+from similar import SimilarFilms
+
+FILMS = {
+    '1': {'id': '1', 'genre_ids': ['drama'], 'actor_ids': ['a']},
+    '2': {'id': '2', 'genre_ids': ['drama'], 'actor_ids': ['a', 'b']},
+    '3': {'id': '3', 'genre_ids': ['comedy'], 'actor_ids': ['c']},
+    '4': {'id': '4', 'genre_ids': ['comedy'], 'actor_ids': ['c', 'd']},
+}
+
+
+@pytest.fixture(name='saved')
+def saved(monkeypatch):
+    saved = {}
+    # Films are read by `scan`, no film lists others as similar yet.
+    monkeypatch.setattr(similar, 'scan', lambda client, index, query: (
+        [] if 'similar_ids' in str(query) else [{'_source': source} for source in FILMS.values()]))
+    monkeypatch.setattr(similar, 'bulk', lambda client, actions: saved.update(
+        (action['_id'], action['doc']['similar_ids']) for action in actions))
+    return saved
+
+
+def changed(*sources):
+    client = mock.Mock()
+    client.mget.return_value = {'docs': [{'_id': source['id'], 'found': True, '_source': source}
+                                         for source in sources]}
+    return client
+
+
+def test_first_update_reads_all_films(saved):
+    SimilarFilms(mock.Mock(), top_k=1).update({'1', '3'})
+
+    assert saved == {'1': ['2'], '3': ['4']}
+
+
+def test_films_with_same_features_are_not_updated(saved):
+    films = SimilarFilms(mock.Mock(), top_k=1)
+    films.update({'1'})
+    saved.clear()
+
+    films.client = changed(FILMS['1'])
+    films.update({'1'})
+
+    assert saved == {}
+
+
+def test_changed_rows_are_replaced_without_reading_all_films(saved):
+    films = SimilarFilms(mock.Mock(), top_k=1)
+    films.update({'1'})
+    saved.clear()
+
+    films.client = changed({'id': '1', 'genre_ids': ['comedy'], 'actor_ids': ['d']},
+                           {'id': '5', 'genre_ids': ['drama'], 'actor_ids': ['b']})
+    with mock.patch.object(similar, 'scan', return_value=[]) as scan:
+        films.update({'1', '5'})
+
+    # Only films listing the changed ones are searched, features are not read again.
+    assert 'similar_ids' in str(scan.call_args)
+    assert saved == {'1': ['4'], '5': ['2']}
+    assert films.features.shape == (5, 6)
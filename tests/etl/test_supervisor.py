@@ -0,0 +1,45 @@
+import threading
+
+from etl.supervisor import Supervisor
+
+
+def test_failed_job_does_not_block_others():
+    runs = []
+    slow_started = threading.Event()
+
+    def failing():
+        raise RuntimeError('Database is down')
+
+    def slow():
+        slow_started.set()
+        threading.Event().wait(0.2)
+        runs.append('movies')
+
+    def fast():
+        # Runs while the slow job is still working.
+        assert slow_started.wait(1)
+        runs.append('genres')
+
+    supervisor = Supervisor({'movies': (slow, 60), 'genres': (fast, 60), 'persons': (failing, 60)}, once=True)
+
+    assert supervisor.run() is False
+    assert runs == ['genres', 'movies']
+
+
+def test_job_runs_again_on_schedule_until_stopped():
+    runs = []
+    supervisor = Supervisor({'genres': (lambda: runs.append(1), 0.01)})
+    threading.Timer(0.2, supervisor.stop).start()
+
+    assert supervisor.run() is True
+    assert len(runs) > 1
+
+
+def test_woken_job_runs_before_schedule():
+    runs = []
+    supervisor = Supervisor({'genres': (lambda: runs.append(1), 60), 'persons': (lambda: runs.append(2), 60)})
+    threading.Timer(0.2, supervisor.wake, args=((name for name in ['genres']),)).start()
+    threading.Timer(0.5, supervisor.stop).start()
+
+    assert supervisor.run() is True
+    assert sorted(runs) == [1, 1, 2]
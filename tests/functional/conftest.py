@@ -5,6 +5,7 @@ import aiohttp
 import pytest_asyncio
 from elasticsearch.helpers import async_bulk
 from elasticsearch import AsyncElasticsearch
+from redis.asyncio import Redis
 from tests.functional.settings import test_settings
 from tests.functional.testdata.models import Response
 
@@ -23,6 +24,13 @@ async def es_client():
     await es_client.close()
 
 
+@pytest_asyncio.fixture(name='redis_client', scope='session')
+async def redis_client():
+    redis_client = Redis(host=test_settings.redis_host, port=test_settings.redis_port)
+    yield redis_client
+    await redis_client.close()
+
+
 @pytest_asyncio.fixture(name='es_remove_and_create_index')
 def es_remove_and_create_index(es_client):
     async def inner(index_name: str, index_settings: dict):
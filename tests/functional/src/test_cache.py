@@ -0,0 +1,62 @@
+import pytest
+
+from tests.functional.testdata.film_data import film_data
+from tests.functional.testdata.indices import movie_index, person_index
+from tests.functional.testdata.person_data import person_data
+from tests.functional.utils.es_utils import create_bulk_query
+
+index_name = 'persons'
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_cache_key(es_remove_and_create_index, es_write_data, make_get_request,
+                                                  redis_client):
+    person_bulk_query = create_bulk_query(index_name=index_name, data=person_data)
+
+    await es_remove_and_create_index(index_name=index_name, index_settings=person_index)
+    await es_write_data(index_name=index_name, data=person_bulk_query)
+    await redis_client.flushdb()
+
+    first_response = await make_get_request('/api/v1/persons')
+    # Same query with the default pagination spelled out must hit the same entry.
+    second_response = await make_get_request('/api/v1/persons', params={'page': 1, 'page_size': 10})
+
+    assert first_response.status == 200
+    assert second_response.status == 200
+    assert second_response.headers['X-FastAPI-Cache'] == 'HIT'
+    assert second_response.body == first_response.body
+
+    cache_keys = await redis_client.keys('fastapi-cache:*/api/v1/persons/*')
+    assert len(cache_keys) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_shares_cache_entries_of_film_details(es_remove_and_create_index, es_write_data,
+                                                          make_get_request, redis_client):
+    await es_remove_and_create_index(index_name='movies', index_settings=movie_index)
+    await es_write_data(index_name='movies', data=create_bulk_query(index_name='movies', data=film_data))
+    await redis_client.flushdb()
+    cached, loaded, _ = [film['id'] for film in film_data]
+
+    await make_get_request(f'/api/v1/films/{cached}')
+    # A hit, a miss, an id that does not exist and a duplicate.
+    response = await make_get_request('/api/v1/films/batch', params=[
+        ('ids', loaded), ('ids', 'missing-id'), ('ids', cached), ('ids', loaded)])
+
+    assert response.status == 200
+    assert [film['uuid'] for film in response.body] == [loaded, cached]
+    assert response.body[0]['title'] == 'The Star'
+
+    # The film loaded by the batch is cached for its details endpoint.
+    details = await make_get_request(f'/api/v1/films/{loaded}')
+    assert details.headers['X-FastAPI-Cache'] == 'HIT'
+    assert details.body == response.body[0]
+
+
+@pytest.mark.asyncio
+async def test_batch_of_missing_films_is_not_found(es_remove_and_create_index, make_get_request):
+    await es_remove_and_create_index(index_name='movies', index_settings=movie_index)
+
+    response = await make_get_request('/api/v1/films/batch', params=[('ids', 'missing-id'), ('ids', 'other-id')])
+
+    assert response.status == 404
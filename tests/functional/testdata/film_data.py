@@ -0,0 +1,16 @@
+import uuid
+
+film_data = [{
+    'id': str(uuid.uuid4()),
+    'title': 'The Star',
+    'imdb_rating': 8.5,
+    'description': 'New World',
+    'genres': [{'id': 'ef86b8ff-3c82-4d31-ad8e-72b69f4e3f95', 'name': 'Action'}],
+    'genre_ids': ['ef86b8ff-3c82-4d31-ad8e-72b69f4e3f95'],
+    'actors': [{'id': 'ef86b8ff-3c82-4d31-ad8e-72b69f4e3f96', 'name': 'Ann'}],
+    'actor_ids': ['ef86b8ff-3c82-4d31-ad8e-72b69f4e3f96'],
+    'writers': [],
+    'writer_ids': [],
+    'directors': [],
+    'director_ids': [],
+} for _ in range(3)]
@@ -0,0 +1,115 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Unit tests import the API modules the same way the backend container does.
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+
+
+class ApiResponse(dict):
+    """Dict with the `body` attribute, like responses of the elasticsearch client."""
+
+    @property
+    def body(self) -> dict:
+        return dict(self)
+
+
+class ElasticRecorder:
+    """Stand-in for AsyncElasticsearch: records requests and returns prepared responses."""
+
+    def __init__(self):
+        self.requests = []
+        self.responses = {}
+
+    def _record(self, method: str, kwargs: dict) -> dict:
+        self.requests.append((method, kwargs))
+        return ApiResponse(self.responses.get(method, {}))
+
+    async def search(self, **kwargs):
+        return self._record('search', kwargs)
+
+    async def msearch(self, **kwargs):
+        return self._record('msearch', kwargs)
+
+    async def get(self, **kwargs):
+        return self._record('get', kwargs)
+
+    async def mget(self, **kwargs):
+        return self._record('mget', kwargs)
+
+
+class RedisPipeline:
+    """Pipeline of `RedisStub`: commands are queued and run by `execute`."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.redis, name), args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        return [await command(*args, **kwargs) for command, args, kwargs in self.commands]
+
+
+class RedisStub:
+    """Stand-in for the asyncio Redis client: values, sets and TTLs are kept in dicts, time does not pass."""
+
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+        self.sorted_sets = {}
+        self.ttls = {}
+
+    def pipeline(self, transaction=True):
+        return RedisPipeline(self)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+        await self.persist(key)
+        if ex:
+            self.ttls[key] = ex
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def ttl(self, key):
+        if key not in self.values and key not in self.sets:
+            return -2
+        return self.ttls.get(key, -1)
+
+    async def exists(self, key):
+        return int(key in self.values or key in self.sets or key in self.sorted_sets)
+
+    async def zrange(self, key, start, end):
+        members = sorted(self.sorted_sets.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+        return [member.encode() for member, _ in members[start:end + 1]]
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    async def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    async def persist(self, key):
+        self.ttls.pop(key, None)
+
+
+@pytest.fixture(name='es_recorder')
+def es_recorder():
+    return ElasticRecorder()
+
+
+@pytest.fixture(name='redis_stub')
+def redis_stub():
+    return RedisStub()
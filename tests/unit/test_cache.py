@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from fastapi_cache import FastAPICache
+from fastapi_cache.types import Backend
+
+from core import cache as cache_module
+from core.cache import cache, key_builder
+
+
+class MemoryBackend(Backend):
+    """Stand-in for the cache backend: values and their TTLs in dicts, time does not pass."""
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+
+    async def get_with_ttl(self, key):
+        if key not in self.values:
+            return 0, None
+        return self.ttls.get(key, -1), self.values[key]
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, expire=None):
+        self.values[key] = value
+        self.ttls[key] = expire if expire else -1
+
+    async def clear(self, namespace=None, key=None):
+        self.values.clear()
+        return 0
+
+
+@pytest.fixture(name='backend')
+def backend():
+    backend = MemoryBackend()
+    FastAPICache.init(backend, prefix='test', key_builder=key_builder)
+    yield backend
+    FastAPICache.reset()
+
+
+class Film:
+    """Endpoint counting its calls, it waits for `release` before it returns."""
+
+    def __init__(self, title='Star Wars'):
+        self.title = title
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.error = None
+
+        @cache(expire=60, stale_ttl=30)
+        async def film_details(film_id: str) -> dict:
+            self.calls += 1
+            await self.release.wait()
+            if self.error:
+                raise self.error
+            return {'id': film_id, 'title': self.title}
+
+        self.endpoint = film_details
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_call_endpoint_once(backend):
+    film = Film()
+
+    requests = [asyncio.create_task(film.endpoint(film_id='1')) for _ in range(5)]
+    await asyncio.sleep(0)
+    film.release.set()
+    results = await asyncio.gather(*requests)
+
+    assert film.calls == 1
+    assert results == [{'id': '1', 'title': 'Star Wars'}] * 5
+    # Entries outlive their freshness by the stale window.
+    assert list(backend.ttls.values()) == [90]
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_while_it_is_refreshed(backend):
+    film = Film()
+    film.release.set()
+    await film.endpoint(film_id='1')
+    key = next(iter(backend.values))
+    # Fresh for 60s of 90s, 10s are left.
+    backend.ttls[key] = 10
+    film.title = 'Star Wars: Episode IV'
+
+    assert await film.endpoint(film_id='1') == {'id': '1', 'title': 'Star Wars'}
+
+    await asyncio.gather(*cache_module._background_tasks)
+    assert film.calls == 2
+    assert await film.endpoint(film_id='1') == {'id': '1', 'title': 'Star Wars: Episode IV'}
+
+
+@pytest.mark.asyncio
+async def test_error_of_endpoint_reaches_every_waiting_request(backend):
+    film = Film()
+    film.error = RuntimeError('Elasticsearch is down')
+
+    requests = [asyncio.create_task(film.endpoint(film_id='1')) for _ in range(3)]
+    await asyncio.sleep(0)
+    film.release.set()
+    results = await asyncio.gather(*requests, return_exceptions=True)
+
+    assert film.calls == 1
+    assert all(result is film.error for result in results)
+    assert backend.values == {}
+    assert cache_module._in_flight == {}
+
+
+@pytest.mark.asyncio
+async def test_waiting_requests_share_one_call_after_the_leading_request_is_cancelled(backend):
+    film = Film()
+
+    leader = asyncio.create_task(film.endpoint(film_id='1'))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(film.endpoint(film_id='1')) for _ in range(2)]
+    await asyncio.sleep(0)
+    leader.cancel()
+    # One of the waiting requests calls the endpoint again, the other one waits for it.
+    while film.calls < 2:
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    film.release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+
+    assert leader.cancelled()
+    assert film.calls == 2
+    assert results == [{'id': '1', 'title': 'Star Wars'}] * 2
+    assert cache_module._in_flight == {}
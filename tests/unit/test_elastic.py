@@ -0,0 +1,53 @@
+import aiohttp
+import pytest
+from elastic_transport import NodeConfig
+
+from core.config import config
+from db import elastic
+from db.elastic import KeepAliveAiohttpNode, get_pool_stats
+
+
+class NodePool:
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def all(self):
+        return self.nodes
+
+
+class Transport:
+    def __init__(self, nodes):
+        self.node_pool = NodePool(nodes)
+
+
+class Client:
+    def __init__(self, nodes):
+        self.transport = Transport(nodes)
+
+
+@pytest.mark.asyncio
+async def test_tcp_connector_has_private_attributes_of_the_pool():
+    # db/elastic.py falls back silently without them, the pinned version of aiohttp must keep them.
+    connector = aiohttp.TCPConnector()
+    try:
+        assert isinstance(connector._keepalive_timeout, float)
+        assert len(connector._acquired) == 0
+        assert sum(len(conns) for conns in connector._conns.values()) == 0
+    finally:
+        await connector.close()
+
+
+@pytest.mark.asyncio
+async def test_node_sets_keepalive_timeout_and_pool_stats_are_read(monkeypatch):
+    node = KeepAliveAiohttpNode(NodeConfig('http', 'localhost', 9200))
+    node._create_aiohttp_session()
+    monkeypatch.setattr(elastic, 'es', Client([node, object()]))
+    try:
+        assert node.session.connector._keepalive_timeout == config.elastic_keepalive_timeout
+        assert get_pool_stats() == {
+            'connections_per_node': config.elastic_connections_per_node,
+            'in_use': 0,
+            'idle': 0,
+        }
+    finally:
+        await node.close()
@@ -0,0 +1,41 @@
+import pytest
+from fastapi_cache.backends.redis import RedisBackend
+
+from core.cache import LocalCache, TwoTierBackend, _key_path_params, build_key
+from core.invalidation import path_params_of
+
+FILM_KEY = build_key('fastapi-cache:local', ['movies'], '/api/v1/films/{film_id}', {'film_id': 'film-id'}, {})
+
+
+def test_message_maps_to_path_params_of_endpoints():
+    message = {'movies': ['film-id'], 'genres': ['genre-id'], 'persons': ['person-id'], 'unknown': ['id']}
+
+    assert path_params_of(message) == {'film_id=film-id', 'genre_id=genre-id', 'person_id=person-id'}
+
+
+def test_path_params_are_read_back_from_key():
+    assert _key_path_params(FILM_KEY) == ['film_id=film-id']
+    assert _key_path_params(build_key('fastapi-cache:', ['movies'], '/api/v1/films/', {}, {'page': 1})) == []
+
+
+@pytest.mark.asyncio
+async def test_keys_are_added_to_sets_of_their_path_params(redis_stub):
+    backend = TwoTierBackend(RedisBackend(redis_stub), LocalCache(100, 10_000), 'fastapi-cache', key_set_expire=90)
+
+    await backend.set(FILM_KEY, b'{}', expire=60)
+
+    assert redis_stub.sets == {'fastapi-cache:keys:film_id=film-id': {FILM_KEY}}
+    assert redis_stub.ttls['fastapi-cache:keys:film_id=film-id'] == 90
+
+
+@pytest.mark.asyncio
+async def test_eviction_drops_entries_from_worker_memory_only(redis_stub):
+    local_cache = LocalCache(100, 10_000)
+    backend = TwoTierBackend(RedisBackend(redis_stub), local_cache, 'fastapi-cache', key_set_expire=90)
+    await backend.set(FILM_KEY, b'{}', expire=60)
+
+    assert backend.evict({'film_id=other-id'}) == 0
+    assert backend.evict({'film_id=film-id'}) == 1
+    assert local_cache.stats()['entries'] == 0
+    # The ETL deletes Redis entries once, workers do not.
+    assert FILM_KEY in redis_stub.values
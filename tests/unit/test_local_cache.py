@@ -0,0 +1,69 @@
+import pytest
+
+from core import cache
+from core.cache import LocalCache
+
+
+@pytest.fixture(name='clock')
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    local_cache = LocalCache(max_entries=10, max_bytes=1000)
+    local_cache.set('key', b'value', expire=60)
+    local_cache.set('forever', b'value')
+
+    clock[0] += 59.5
+    assert local_cache.get_with_ttl('key') == (0, b'value')
+
+    clock[0] += 0.5
+    assert local_cache.get_with_ttl('key') == (0, None)
+    assert local_cache.get_with_ttl('forever') == (-1, b'value')
+    assert local_cache.stats()['entries'] == 1
+    assert local_cache.stats()['bytes'] == len('forever') + len(b'value')
+
+
+def test_least_recently_used_entries_are_evicted_over_max_entries(clock):
+    local_cache = LocalCache(max_entries=2, max_bytes=1000)
+    local_cache.set('a', b'1')
+    local_cache.set('b', b'2')
+    local_cache.get_with_ttl('a')
+
+    local_cache.set('c', b'3')
+
+    assert local_cache.get_with_ttl('b') == (0, None)
+    assert local_cache.get_with_ttl('a') == (-1, b'1')
+    assert local_cache.get_with_ttl('c') == (-1, b'3')
+    assert local_cache.stats()['evictions'] == 1
+
+
+def test_entries_are_evicted_over_max_bytes(clock):
+    local_cache = LocalCache(max_entries=10, max_bytes=20)
+    local_cache.set('a', b'x' * 9)
+    local_cache.set('b', b'x' * 9)
+
+    local_cache.set('c', b'x' * 9)
+
+    assert local_cache.get_with_ttl('a') == (0, None)
+    assert local_cache.stats()['bytes'] == 20
+
+    # Values larger than the whole cache are not kept and evict nothing.
+    local_cache.set('d', b'x' * 100)
+    assert local_cache.get_with_ttl('d') == (0, None)
+    assert local_cache.stats()['entries'] == 2
+
+
+def test_keys_are_isolated(clock):
+    local_cache = LocalCache(max_entries=10, max_bytes=1000)
+    local_cache.set('fastapi-cache:local:/films/{film_id}:film_id=1:hash', b'film 1', expire=60)
+    local_cache.set('fastapi-cache:local:/films/{film_id}:film_id=2:hash', b'film 2', expire=60)
+    local_cache.set('other:local:/films/{film_id}:film_id=1:hash', b'other', expire=60)
+
+    local_cache.set('fastapi-cache:local:/films/{film_id}:film_id=1:hash', b'film 1 changed', expire=60)
+    assert local_cache.get_with_ttl('fastapi-cache:local:/films/{film_id}:film_id=2:hash')[1] == b'film 2'
+
+    assert local_cache.clear('fastapi-cache:') == 2
+    assert local_cache.get_with_ttl('other:local:/films/{film_id}:film_id=1:hash')[1] == b'other'
@@ -0,0 +1,93 @@
+import base64
+import json
+
+import pytest
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+from elasticsearch import BadRequestError
+from fastapi import Depends, FastAPI, HTTPException, Response
+from fastapi.testclient import TestClient
+
+from core.pagination import NEXT_CURSOR_HEADER, Cursor, CursorPaginationParams
+
+
+def token(data) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def page(ids) -> dict:
+    return {'hits': {'hits': [{'_source': {'id': film_id}, 'sort': [8.5, film_id]} for film_id in ids]}}
+
+
+@pytest.fixture(name='client')
+def client(es_recorder):
+    app = FastAPI()
+
+    @app.get('/films')
+    async def films(response: Response, pagination: CursorPaginationParams = Depends(CursorPaginationParams)):
+        query = {'size': pagination.page_size, 'sort': [{'imdb_rating': {'order': 'desc'}}]}
+        result = await pagination.cursor.search(es_recorder, 'movies', query)
+        pagination.set_next_cursor(response)
+        return [hit['_source']['id'] for hit in result['hits']['hits']]
+
+    return TestClient(app)
+
+
+def test_cursor_is_decoded_back():
+    cursor = Cursor.decode(Cursor.encode([8.5, 'film-id'], pit_id='pit-id'))
+
+    assert cursor.search_after == [8.5, 'film-id']
+    assert cursor.pit_id == 'pit-id'
+    assert cursor.use_pit
+    assert Cursor.decode(Cursor.encode([8.5, 'film-id'])).pit_id is None
+    # Empty cursor starts from the first page.
+    assert Cursor.decode('').search_after is None
+
+
+@pytest.mark.parametrize('value', [
+    'not a cursor',
+    base64.urlsafe_b64encode(b'not json').decode(),
+    token(['search_after']),
+    token({'pit_id': 'pit-id'}),
+    token({'search_after': 'film-id'}),
+    token({'search_after': [{'script': 'x'}]}),
+    token({'search_after': [8.5], 'pit_id': ['pit-id']}),
+])
+def test_tampered_cursor_is_bad_request(value):
+    with pytest.raises(HTTPException) as error:
+        Cursor.decode(value)
+
+    assert error.value.status_code == 400
+
+
+def test_tampered_cursor_gets_400_response(client):
+    response = client.get('/films', params={'cursor': token({'search_after': 'film-id'})})
+
+    assert response.status_code == 400
+
+
+def test_cursor_rejected_by_elasticsearch_gets_400_response(client, es_recorder):
+    async def search(**kwargs):
+        meta = ApiResponseMeta(status=400, http_version='1.1', headers=HttpHeaders(), duration=0.0,
+                               node=NodeConfig('http', 'localhost', 9200))
+        raise BadRequestError('search_phase_execution_exception', meta, {})
+    es_recorder.search = search
+
+    response = client.get('/films', params={'cursor': Cursor.encode(['not a rating', 'film-id'])})
+
+    assert response.status_code == 400
+
+
+def test_next_cursor_is_passed_until_last_page(client, es_recorder):
+    es_recorder.responses['search'] = page(['film-1', 'film-2'])
+    response = client.get('/films', params={'cursor': '', 'page_size': 2})
+
+    assert response.json() == ['film-1', 'film-2']
+    assert Cursor.decode(response.headers[NEXT_CURSOR_HEADER]).search_after == [8.5, 'film-2']
+
+    es_recorder.responses['search'] = page(['film-3'])
+    response = client.get('/films', params={'cursor': response.headers[NEXT_CURSOR_HEADER], 'page_size': 2})
+
+    assert response.json() == ['film-3']
+    assert NEXT_CURSOR_HEADER not in response.headers
+    _, request = es_recorder.requests[-1]
+    assert request['body']['search_after'] == [8.5, 'film-2']
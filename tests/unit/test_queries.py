@@ -0,0 +1,128 @@
+import pytest
+
+from models.film import FILM_LIST_FIELDS, TOP_RATED_SORT
+from services.film import FilmService
+from services.genres import GenreService
+from services.persons import PersonService
+from services.suggest import SuggestService
+
+
+@pytest.mark.asyncio
+async def test_film_list_query_requests_only_list_fields(es_recorder):
+    await FilmService(es_recorder).get_films_list_filtered_searched_sorted(query='star', sort='-imdb_rating')
+
+    method, request = es_recorder.requests[0]
+    assert method == 'search'
+    assert request['body']['_source'] == FILM_LIST_FIELDS
+    assert request['filter_path'] == ['hits.hits._source']
+
+
+@pytest.mark.asyncio
+async def test_popular_films_query_requests_only_list_fields(es_recorder):
+    await GenreService(es_recorder).get_popular_films(genre_id='genre-id')
+
+    _, request = es_recorder.requests[0]
+    assert request['body']['_source'] == FILM_LIST_FIELDS
+    assert request['filter_path'] == ['hits.hits._source']
+
+
+@pytest.mark.asyncio
+async def test_person_films_query_requests_only_list_fields(es_recorder):
+    await PersonService(es_recorder).person_films(person_id='person-id')
+
+    _, request = es_recorder.requests[0]
+    assert request['body']['_source'] == FILM_LIST_FIELDS
+    assert request['filter_path'] == ['hits.hits._source']
+
+
+@pytest.mark.asyncio
+async def test_person_search_takes_roles_from_matched_queries(es_recorder):
+    es_recorder.responses['search'] = {'hits': {'hits': [{'_source': {'id': 'person-id', 'name': 'Adam'}}]}}
+    es_recorder.responses['msearch'] = {'responses': [{'status': 200, 'hits': {'hits': [
+        {'_source': {'id': 'film-id'}, 'matched_queries': ['writer', 'actor']},
+    ]}}]}
+
+    persons = await PersonService(es_recorder).person_search(page_number=1, page_size=10, query='Adam')
+
+    _, search_request = es_recorder.requests[0]
+    assert search_request['body']['_source'] == ['id', 'name']
+    _, msearch_request = es_recorder.requests[1]
+    assert msearch_request['searches'][1]['_source'] == ['id']
+    assert 'responses.hits.hits.matched_queries' in msearch_request['filter_path']
+    assert persons[0].films[0].roles == ['actor', 'writer']
+
+
+@pytest.mark.asyncio
+async def test_films_by_ids_use_one_mget(es_recorder):
+    es_recorder.responses['mget'] = {'docs': [{'found': True, '_source': {'id': 'film-id'}}, {'found': False}]}
+
+    films = await FilmService(es_recorder).get_films_from_elastic(['film-id', 'missing-id'])
+
+    assert [method for method, _ in es_recorder.requests] == ['mget']
+    assert es_recorder.requests[0][1]['ids'] == ['film-id', 'missing-id']
+    assert films == [{'id': 'film-id'}]
+
+
+@pytest.mark.asyncio
+async def test_genre_filters_use_flat_field_in_filter_context(es_recorder):
+    await FilmService(es_recorder).get_films_list_filtered_searched_sorted(genre_id='genre-id', sort='-imdb_rating')
+    await GenreService(es_recorder).get_popular_films(genre_id='genre-id')
+
+    for _, request in es_recorder.requests:
+        assert request['body']['query']['bool']['filter'] == [{'term': {'genre_ids': 'genre-id'}}]
+
+
+@pytest.mark.asyncio
+async def test_top_rated_lists_follow_index_sort_without_total(es_recorder):
+    await FilmService(es_recorder).get_films_list_filtered_searched_sorted(sort='-imdb_rating')
+    await GenreService(es_recorder).get_popular_films(genre_id='genre-id')
+
+    for _, request in es_recorder.requests:
+        assert request['body']['sort'] == TOP_RATED_SORT
+        assert request['body']['track_total_hits'] is False
+
+
+@pytest.mark.asyncio
+async def test_similar_films_are_one_get_and_one_mget(es_recorder):
+    es_recorder.responses['get'] = {'_source': {'genre_ids': ['genre-id'], 'similar_ids': ['a', 'b', 'c']}}
+    es_recorder.responses['mget'] = {'docs': [{'found': True, '_source': {'id': 'c', 'title': 'C'}}]}
+
+    films = await FilmService(es_recorder).get_similar_films('film-id', page_number=2, page_size=2)
+
+    assert [method for method, _ in es_recorder.requests] == ['get', 'mget']
+    assert es_recorder.requests[1][1]['ids'] == ['c']
+    assert es_recorder.requests[1][1]['source'] == FILM_LIST_FIELDS
+    assert films == [{'uuid': 'c', 'title': 'C', 'imdb_rating': None}]
+
+
+@pytest.mark.asyncio
+async def test_suggest_queries_both_completion_fields_with_one_msearch(es_recorder):
+    es_recorder.responses['msearch'] = {'responses': [
+        {'status': 200, 'suggest': {'suggestions': [{'options': [{'_source': {'id': 'film-id', 'title': 'Star'}}]}]}},
+        {'status': 200, 'suggest': {'suggestions': [{'options': [{'_source': {'id': 'person-id', 'name': 'Stan'}}]}]}},
+    ]}
+
+    suggestions = await SuggestService(es_recorder).suggest(prefix='sta')
+
+    assert [method for method, _ in es_recorder.requests] == ['msearch']
+    searches = es_recorder.requests[0][1]['searches']
+    assert [search['suggest']['suggestions']['completion']['field'] for search in searches[1::2]] == [
+        'title.suggest', 'name.suggest']
+    assert suggestions == {'films': [{'uuid': 'film-id', 'title': 'Star'}],
+                           'persons': [{'uuid': 'person-id', 'full_name': 'Stan'}]}
+
+
+@pytest.mark.asyncio
+async def test_popular_films_are_read_from_leaderboard_in_order_of_elasticsearch(es_recorder, redis_stub):
+    redis_stub.values[GenreService.leaderboards_complete_key] = b'1'
+    redis_stub.sorted_sets[GenreService.genre_leaderboard_key.format(genre_id='genre-id')] = {
+        'film-b': -8.5, 'film-a': -8.5, 'film-c': -9.0, 'film-d': float('inf')}
+    es_recorder.responses['mget'] = {'docs': [{'found': True, '_source': {'id': 'film-c'}}]}
+
+    await GenreService(es_recorder, redis_stub).get_popular_films(genre_id='genre-id', page_size=3)
+
+    method, request = es_recorder.requests[0]
+    assert method == 'mget'
+    # Rating desc, then id asc, as TOP_RATED_SORT.
+    assert request['ids'] == ['film-c', 'film-a', 'film-b']
+    assert request['source'] == FILM_LIST_FIELDS